@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Asset Library Indexer
+Builds a SQLite catalog of design files (.c2d, .dxf, .svg and G-Code) with
+their bounds, units, path and vertex counts, stock size, tools and a small
+SVG thumbnail, so the right file can be found without opening each one.
+
+Re-scans are incremental: files whose size and mtime are unchanged are
+skipped without being read, and files that were touched but still hash the
+same are only re-stamped. Changed files are read in parallel.
+
+Usage:
+    python asset_index.py scan /path/to/library
+    python asset_index.py find grapes --type c2d --max-width 300
+    python asset_index.py info "Cabin_1.c2d"
+    python asset_index.py thumb "Cabin_1.c2d" -o cabin.svg
+"""
+
+import sys
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+DEFAULT_DB = 'asset_index.db'
+
+ASSET_TYPES = {'.c2d': 'c2d', '.dxf': 'dxf', '.svg': 'svg', '.nc': 'nc', '.gcode': 'nc', '.ngc': 'nc'}
+
+# DXF $INSUNITS codes with a known size in mm
+DXF_UNITS = {1: ('inch', 25.4), 2: ('feet', 304.8), 4: ('mm', 1.0), 5: ('cm', 10.0), 6: ('m', 1000.0)}
+
+THUMBNAIL_SIZE = 96
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets(
+    path TEXT PRIMARY KEY,      -- absolute path of the file
+    name TEXT,                  -- file name
+    type TEXT,                  -- c2d, dxf, svg or nc
+    size INT,                   -- file size in bytes
+    mtime_ns INT,               -- modification time when indexed
+    sha1 TEXT,                  -- content hash when indexed
+    units TEXT,                 -- drawing units (NULL for unitless DXF)
+    min_x REAL, min_y REAL,     -- bounds in drawing units
+    max_x REAL, max_y REAL,
+    width_mm REAL,              -- size of the bounds in mm (NULL if units unknown)
+    height_mm REAL,
+    path_count INT,
+    vertex_count INT,           -- flattened points, or cutting moves for G-Code
+    stock_width_mm REAL,
+    stock_height_mm REAL,
+    stock_thickness_mm REAL,
+    material TEXT,
+    tools TEXT,                 -- JSON list of {number, name, diameter}
+    thumbnail TEXT,             -- small SVG preview
+    error TEXT,                 -- why the file could not be read, if it could not
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS assets_name ON assets(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS assets_type ON assets(type);
+"""
+
+COLUMNS = ('path', 'name', 'type', 'size', 'mtime_ns', 'sha1', 'units', 'min_x', 'min_y', 'max_x', 'max_y',
+           'width_mm', 'height_mm', 'path_count', 'vertex_count', 'stock_width_mm', 'stock_height_mm',
+           'stock_thickness_mm', 'material', 'tools', 'thumbnail', 'error', 'indexed_at')
+
+
+def file_hash(path):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_thumbnail(pieces, y_up):
+    """
+    Draw point arrays as a small SVG, fitted into THUMBNAIL_SIZE pixels
+
+    Coordinates are rounded to whole pixels and repeated points dropped,
+    which keeps even dense drawings down to a few kilobytes.
+    """
+    import numpy as np
+    from line_to_gcode_multiformat import SVGExporter
+
+    all_points = np.vstack(pieces)
+    low = all_points.min(axis=0)
+    span = float((all_points.max(axis=0) - low).max()) or 1.0
+    scale = (THUMBNAIL_SIZE - 2) / span
+
+    paths = []
+    for p in pieces:
+        q = np.rint((p - low) * scale) + 1
+        if y_up:
+            q[:, 1] = THUMBNAIL_SIZE - q[:, 1]
+        keep = np.concatenate(([True], np.any(q[1:] != q[:-1], axis=1)))
+        if keep.sum() >= 2:
+            paths.append(SVGExporter.path_data(q[keep], precision=0))
+
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {THUMBNAIL_SIZE} {THUMBNAIL_SIZE}">'
+            f'<path d="{" ".join(paths)}" fill="none" stroke="black"/></svg>')
+
+
+def geometry_fields(pieces, mm_per_unit, y_up):
+    """Bounds, counts and thumbnail for a list of Nx2 point arrays"""
+    import numpy as np
+
+    if not pieces:
+        return {'path_count': 0, 'vertex_count': 0}
+    all_points = np.vstack(pieces)
+    (min_x, min_y), (max_x, max_y) = all_points.min(axis=0).tolist(), all_points.max(axis=0).tolist()
+    return {
+        'min_x': min_x, 'min_y': min_y, 'max_x': max_x, 'max_y': max_y,
+        'width_mm': (max_x - min_x) * mm_per_unit if mm_per_unit else None,
+        'height_mm': (max_y - min_y) * mm_per_unit if mm_per_unit else None,
+        'path_count': len(pieces),
+        'vertex_count': len(all_points),
+        'thumbnail': make_thumbnail(pieces, y_up),
+    }
+
+
+def read_asset(path, asset_type):
+    """
+    Read the catalog fields of one asset
+
+    Returns:
+        Dictionary of catalog columns (without the file identity columns)
+    """
+    import numpy as np
+    from line_to_gcode_multiformat import C2DProcessor, DXFProcessor, SVGProcessor
+
+    if asset_type == 'c2d':
+        elements, stock, tools = C2DProcessor.read_project(path)
+        pieces = []
+        for elem in elements:
+            if elem.get('layer', {}).get('visible', True):
+                pieces.extend(C2DProcessor.element_paths(elem, 0.05) or [])
+        record = geometry_fields(pieces, 1.0, y_up=True)
+        record.update(units='mm', tools=json.dumps(tools), material=stock.get('material'),
+                      stock_width_mm=stock.get('width'), stock_height_mm=stock.get('height'),
+                      stock_thickness_mm=stock.get('thickness'))
+        return record
+
+    if asset_type == 'dxf':
+        pieces, units, _ = DXFProcessor.read_entities(path)
+        name, mm_per_unit = DXF_UNITS.get(units, (None, None))
+        record = geometry_fields(pieces, mm_per_unit, y_up=True)
+        record['units'] = name
+        return record
+
+    if asset_type == 'svg':
+        width, height, paths = SVGProcessor.stream(path, tolerance=0.05)
+        pieces = [np.asarray(p) for p in paths]
+        record = geometry_fields(pieces, 1.0, y_up=False)
+        record.update(units='mm', stock_width_mm=width, stock_height_mm=height)
+        return record
+
+    # G-Code: summary from the analyzer, no thumbnail
+    from gcode_analyzer import analyze_gcode
+    report = analyze_gcode(path)
+    mm_per_unit = 25.4 if report['units'] == 'inch' else 1.0
+    record = {'units': report['units'], 'path_count': len(report['toolpaths']),
+              'vertex_count': report['cut_moves']}
+    bounds = report['cut_bounds']
+    if bounds:
+        record.update(min_x=bounds['min'][0], min_y=bounds['min'][1],
+                      max_x=bounds['max'][0], max_y=bounds['max'][1],
+                      width_mm=(bounds['max'][0] - bounds['min'][0]) * mm_per_unit,
+                      height_mm=(bounds['max'][1] - bounds['min'][1]) * mm_per_unit)
+    if report['stock']:
+        record.update(stock_width_mm=report['stock'][0] * mm_per_unit,
+                      stock_height_mm=report['stock'][1] * mm_per_unit,
+                      stock_thickness_mm=report['stock'][2] * mm_per_unit)
+    tools = []
+    for change in report['tool_changes']:
+        entry = {'number': change['tool'], 'name': '',
+                 'diameter': change['diameter'] * mm_per_unit if change['diameter'] is not None else None}
+        if entry not in tools:
+            tools.append(entry)
+    record['tools'] = json.dumps(tools)
+    return record
+
+
+def index_file(job):
+    """
+    Worker: hash one file and, if its contents changed, read it
+
+    Args:
+        job: (path, asset_type, size, mtime_ns, known_sha1)
+
+    Returns:
+        Full catalog row as a dict, or just the identity columns with
+        'unchanged' set when the hash matches known_sha1
+    """
+    path, asset_type, size, mtime_ns, known_sha1 = job
+    row = {'path': path, 'size': size, 'mtime_ns': mtime_ns, 'indexed_at': time.time()}
+    try:
+        row['sha1'] = file_hash(path)
+    except OSError as e:
+        row.update(name=os.path.basename(path), type=asset_type, error=str(e))
+        return row
+    if row['sha1'] == known_sha1:
+        row['unchanged'] = True
+        return row
+
+    row.update(name=os.path.basename(path), type=asset_type)
+    try:
+        row.update(read_asset(path, asset_type))
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def find_assets(roots):
+    """Yield (path, type, size, mtime_ns) for every asset under the given folders"""
+    for root in roots:
+        for folder, dirs, files in os.walk(root):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != '__pycache__')
+            for name in sorted(files):
+                asset_type = ASSET_TYPES.get(os.path.splitext(name)[1].lower())
+                if asset_type and not name.startswith('.'):
+                    path = os.path.abspath(os.path.join(folder, name))
+                    st = os.stat(path)
+                    yield path, asset_type, st.st_size, st.st_mtime_ns
+
+
+def open_catalog(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def scan(conn, roots, workers=None):
+    """
+    Bring the catalog up to date with the files under the given folders
+
+    Returns:
+        Dictionary of counts: added, updated, touched, unchanged, removed, errors
+    """
+    roots = [os.path.abspath(r) for r in roots]
+    known = {row['path']: (row['size'], row['mtime_ns'], row['sha1'])
+             for row in conn.execute("SELECT path, size, mtime_ns, sha1 FROM assets")}
+
+    jobs = []
+    seen = set()
+    for path, asset_type, size, mtime_ns in find_assets(roots):
+        seen.add(path)
+        old = known.get(path)
+        if old and old[0] == size and old[1] == mtime_ns:
+            continue
+        jobs.append((path, asset_type, size, mtime_ns, old[2] if old else None))
+
+    stats = {'added': 0, 'updated': 0, 'touched': 0, 'unchanged': len(seen) - len(jobs), 'removed': 0, 'errors': 0}
+    if jobs:
+        # Biggest files first so one large project does not finish last on its own
+        jobs.sort(key=lambda job: -job[2])
+        if workers == 1 or len(jobs) == 1:
+            results = map(index_file, jobs)
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(index_file, jobs)
+
+        placeholders = ', '.join('?' * len(COLUMNS))
+        for done, row in enumerate(results, 1):
+            if row.pop('unchanged', False):
+                conn.execute("UPDATE assets SET size = ?, mtime_ns = ?, indexed_at = ? WHERE path = ?",
+                             (row['size'], row['mtime_ns'], row['indexed_at'], row['path']))
+                stats['touched'] += 1
+            else:
+                conn.execute(f"INSERT OR REPLACE INTO assets ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                             [row.get(c) for c in COLUMNS])
+                stats['updated' if row['path'] in known else 'added'] += 1
+                stats['errors'] += bool(row.get('error'))
+            if done % 50 == 0:
+                print(f"  {done}/{len(jobs)} files read")
+        if workers != 1 and len(jobs) > 1:
+            pool.shutdown()
+
+    # Forget files that have gone from the scanned folders
+    for path in known:
+        if path not in seen and any(path.startswith(root + os.sep) for root in roots):
+            conn.execute("DELETE FROM assets WHERE path = ?", (path,))
+            stats['removed'] += 1
+
+    conn.commit()
+    return stats
+
+
+def query(conn, text=None, asset_type=None, tool=None, material=None, max_width=None, max_height=None,
+          sort='name', limit=None):
+    """
+    Search the catalog
+
+    Args:
+        text: Substring of the file name or folder
+        asset_type: c2d, dxf, svg or nc
+        tool: Tool number, or substring of the tool name
+        material: Substring of the stock material
+        max_width: Largest design width in mm
+        max_height: Largest design height in mm
+        sort: name, size, vertices or width
+        limit: Maximum number of rows
+
+    Returns:
+        List of sqlite3.Row
+    """
+    where, args = [], []
+    if text:
+        where.append("path LIKE ?")
+        args.append(f"%{text}%")
+    if asset_type:
+        where.append("type = ?")
+        args.append(asset_type)
+    if tool:
+        where.append("EXISTS (SELECT 1 FROM json_each(assets.tools) "
+                     "WHERE json_extract(value, '$.number') = ? OR json_extract(value, '$.name') LIKE ?)")
+        args.extend([int(tool) if tool.isdigit() else None, f"%{tool}%"])
+    if material:
+        where.append("material LIKE ?")
+        args.append(f"%{material}%")
+    if max_width is not None:
+        where.append("width_mm <= ?")
+        args.append(max_width)
+    if max_height is not None:
+        where.append("height_mm <= ?")
+        args.append(max_height)
+
+    order = {'name': 'name COLLATE NOCASE', 'size': 'size DESC', 'vertices': 'vertex_count DESC',
+             'width': 'width_mm DESC'}[sort]
+    sql = "SELECT * FROM assets" + (" WHERE " + " AND ".join(where) if where else "") + f" ORDER BY {order}"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return conn.execute(sql, args).fetchall()
+
+
+def lookup(conn, name):
+    """Find one asset by path, or by a unique file name or path suffix"""
+    row = conn.execute("SELECT * FROM assets WHERE path = ?", (os.path.abspath(name),)).fetchone()
+    if row:
+        return row
+    rows = conn.execute("SELECT * FROM assets WHERE path LIKE ?", (f"%{name}",)).fetchall()
+    if len(rows) > 1:
+        print(f"Error: '{name}' matches {len(rows)} assets:")
+        for r in rows:
+            print(f"  {r['path']}")
+        sys.exit(1)
+    if not rows:
+        print(f"Error: '{name}' is not in the catalog")
+        sys.exit(1)
+    return rows[0]
+
+
+def display_path(path):
+    try:
+        return os.path.relpath(path)
+    except ValueError:
+        return path
+
+
+def print_rows(rows):
+    if not rows:
+        print("No matching assets")
+        return
+    print(f"{'Type':<5}{'Size (mm)':>20}{'Paths':>8}{'Vertices':>10}  {'Tools':<12}File")
+    for r in rows:
+        size = f"{r['width_mm']:.1f} x {r['height_mm']:.1f}" if r['width_mm'] is not None else '-'
+        tools = ','.join(str(t['number']) for t in json.loads(r['tools'] or '[]') if t['number'] is not None)
+        flag = '  [error]' if r['error'] else ''
+        print(f"{r['type']:<5}{size:>20}{r['path_count'] or 0:>8}{r['vertex_count'] or 0:>10}  "
+              f"{tools or '-':<12}{display_path(r['path'])}{flag}")
+    print(f"\n{len(rows)} asset(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Catalog design files (.c2d, .dxf, .svg, .nc) in SQLite')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'Catalog database (default: {DEFAULT_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan_parser = commands.add_parser('scan', help='Index new and changed files')
+    scan_parser.add_argument('folders', nargs='*', default=['.'], help='Folders to scan (default: .)')
+    scan_parser.add_argument('--workers', type=int, default=0,
+                             help='Parallel reader processes (default: 0 = all CPUs)')
+
+    find_parser = commands.add_parser('find', help='Search the catalog')
+    find_parser.add_argument('text', nargs='?', help='Part of the file name or folder')
+    find_parser.add_argument('--type', choices=sorted(set(ASSET_TYPES.values())), help='Asset type')
+    find_parser.add_argument('--tool', help='Tool number or part of the tool name')
+    find_parser.add_argument('--material', help='Part of the stock material name')
+    find_parser.add_argument('--max-width', type=float, help='Largest design width in mm')
+    find_parser.add_argument('--max-height', type=float, help='Largest design height in mm')
+    find_parser.add_argument('--sort', choices=['name', 'size', 'vertices', 'width'], default='name')
+    find_parser.add_argument('--limit', type=int, help='Show at most this many results')
+    find_parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    info_parser = commands.add_parser('info', help='Show everything known about one asset')
+    info_parser.add_argument('file', help='Path, file name or path suffix')
+
+    thumb_parser = commands.add_parser('thumb', help='Write the thumbnail of one asset')
+    thumb_parser.add_argument('file', help='Path, file name or path suffix')
+    thumb_parser.add_argument('-o', '--output', help='Output SVG file (default: <name>_thumb.svg)')
+
+    args = parser.parse_args()
+    conn = open_catalog(args.db)
+
+    if args.command == 'scan':
+        for folder in args.folders:
+            if not os.path.isdir(folder):
+                print(f"Error: Folder not found: {folder}")
+                sys.exit(1)
+        start = time.perf_counter()
+        stats = scan(conn, args.folders, workers=args.workers or None)
+        total = conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+        print(f"Indexed in {time.perf_counter() - start:.2f}s: {stats['added']} added, "
+              f"{stats['updated']} updated, {stats['touched']} touched, {stats['unchanged']} unchanged, "
+              f"{stats['removed']} removed ({total} assets in {args.db})")
+        if stats['errors']:
+            print(f"Warning: {stats['errors']} file(s) could not be read; see 'find' for [error] entries")
+
+    elif args.command == 'find':
+        rows = query(conn, args.text, args.type, args.tool, args.material,
+                     args.max_width, args.max_height, args.sort, args.limit)
+        if args.json:
+            json.dump([{k: r[k] for k in r.keys() if k != 'thumbnail'} for r in rows], sys.stdout, indent=2)
+            print()
+        else:
+            print_rows(rows)
+
+    elif args.command == 'info':
+        row = lookup(conn, args.file)
+        for key in row.keys():
+            if key == 'thumbnail':
+                value = f"{len(row[key])} bytes" if row[key] else None
+            elif key == 'tools':
+                value = ', '.join(f"{t['name'] or '#' + str(t['number'])} ({t['diameter']:g} mm)"
+                                  for t in json.loads(row[key] or '[]') if t['diameter'] is not None)
+            else:
+                value = row[key]
+            print(f"{key:>20}: {value if value not in (None, '') else '-'}")
+
+    elif args.command == 'thumb':
+        row = lookup(conn, args.file)
+        if not row['thumbnail']:
+            print(f"Error: No thumbnail for {display_path(row['path'])}")
+            sys.exit(1)
+        output = args.output or f"{Path(row['name']).stem}_thumb.svg"
+        with open(output, 'w') as f:
+            f.write(row['thumbnail'])
+        print(f"Thumbnail saved to: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the built-in DXF writer against the ezdxf backend
+
+Each backend runs in a fresh Python process so the numbers include the
+import cost of the backend and the peak memory of the export itself.
+
+Usage:
+    python benchmark_dxf.py
+    python benchmark_dxf.py --paths 2000 --points 500
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+
+def make_paths(num_paths, num_points, seed=1):
+    """Random-walk polylines, like a dense sketch trace"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    return [(np.cumsum(rng.normal(size=(num_points, 2)), axis=0) + 500).tolist()
+            for _ in range(num_paths)]
+
+
+def run_backend(backend, num_paths, num_points, output_file):
+    """Worker: time one export in this process and print the result as JSON"""
+    start = time.perf_counter()
+    if backend == 'ezdxf':
+        import ezdxf  # noqa: F401 - import cost is part of the measurement
+    else:
+        from line_to_gcode_multiformat import DXFWriter  # noqa: F401
+    import_time = time.perf_counter() - start
+
+    paths = make_paths(num_paths, num_points)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if backend == 'ezdxf':
+        doc = ezdxf.new('R2010')
+        msp = doc.modelspace()
+        for path in paths:
+            msp.add_lwpolyline(points=path, dxfattribs={'layer': 'PATHS'})
+        doc.saveas(output_file)
+    else:
+        DXFWriter.write(paths, output_file, 'mm', backend.split('-')[1])
+    export_time = time.perf_counter() - start
+
+    print(json.dumps({
+        'import': import_time,
+        'export': export_time,
+        'rss_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+        'size_mb': os.path.getsize(output_file) / 1e6,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DXF export backends')
+    parser.add_argument('--paths', type=int, default=1000, help='Number of polylines (default: 1000)')
+    parser.add_argument('--points', type=int, default=500, help='Points per polyline (default: 500)')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_backend(args.worker, args.paths, args.points, args.output)
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    vertices = args.paths * args.points
+    print(f"Exporting {args.paths} polylines x {args.points} points ({vertices:,} vertices)\n")
+    print(f"{'Backend':<16}{'Import':>10}{'Export':>10}{'Vertices/s':>14}{'Peak +RSS':>12}{'Size':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ('builtin-R2000', 'builtin-R12', 'ezdxf'):
+            output_file = os.path.join(tmp, f"{backend}.dxf")
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', backend,
+                 '--paths', str(args.paths), '--points', str(args.points), '--output', output_file],
+                cwd=here, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"{backend:<16}failed: {result.stderr.strip().splitlines()[-1]}")
+                continue
+            r = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{backend:<16}{r['import']:>9.2f}s{r['export']:>9.2f}s"
+                  f"{vertices / r['export']:>14,.0f}{r['rss_mb']:>10.1f}MB{r['size_mb']:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmark every pipeline stage and exporter on synthetic drawings
+
+Each scenario draws a seeded synthetic image with create_test_images.py
+(so every run, on every machine, traces exactly the same drawing) and
+converts it to all formats, with a preview, a saved toolpath, path
+ordering and machine resolution snapping, so every stage and exporter
+runs. Each run is a fresh Python process; the median of --runs is
+reported per stage and per phase (decode, trace, gcode, ...) as time and
+throughput, along with the run's peak memory.
+
+--save-baseline stores the results; later runs compare against them and
+exit with status 1 when a stage got slower than --threshold allows or
+the peak memory grew by more than --memory-threshold. Baselines only
+mean something on the machine that recorded them. Nothing is downloaded.
+
+Usage:
+    python benchmark_pipeline.py --save-baseline
+    python benchmark_pipeline.py
+    python benchmark_pipeline.py --scenarios small medium --runs 5 --threshold 0.15
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+
+# name: (width, height, lines, stroke, noise, components, skeleton)
+SCENARIOS = {
+    'small': (800, 600, 30, 2, 0.0, 6, False),
+    'medium': (2000, 1500, 200, 3, 0.1, 24, False),
+    'large': (4000, 3000, 800, 4, 0.2, 96, False),
+    'sketch': (600, 400, 12, 6, 0.2, 4, True),
+}
+
+# Phases that work on pixels; throughput for the rest is in points
+IMAGE_PHASES = ('load', 'binarize', 'extract', 'decode', 'threshold', 'skeleton', 'trace')
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+def converter_args(image_file, output_dir, skeleton):
+    """Options that make a conversion run every stage and exporter"""
+    argv = [image_file, '--params', '1mm detail', '--format', 'all', '--preview', '--save-toolpath',
+            '--order', '--resolution', '80', '--output-dir', output_dir, '--profile']
+    return argv + ['--skeleton'] if skeleton else argv
+
+
+def run_worker(argv):
+    """Worker: convert one drawing in this process and print its statistics as JSON"""
+    import io
+    import contextlib
+    from line_to_gcode_multiformat import build_parser, load_params_profile, convert_file
+
+    args = build_parser().parse_args(argv)
+    profile = load_params_profile(args.params)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = convert_file(args.input_files[0], args, profile, interactive=False)
+    print(json.dumps({key: result[key] for key in ('stages', 'seconds', 'cpu_seconds', 'peak_rss_mb', 'points')}))
+
+
+def flatten(stages):
+    """Stage records and their phases as one dict: 'extract', 'extract/trace', ..."""
+    rows = {}
+    for r in stages:
+        if r['skipped']:
+            continue
+        rows[r['stage']] = r
+        for span in r.get('spans', []):
+            rows[f"{r['stage']}/{span['name']}"] = dict(span, points_in=span.get('points_in', r['points_in']),
+                                                        points_out=span.get('points_out', r['points_out']))
+    return rows
+
+
+def summarize(runs, pixels):
+    """Median seconds and throughput per stage and phase over several runs"""
+    rows = {}
+    for key in flatten(runs[0]['stages']):
+        seconds = statistics.median(flatten(run['stages'])[key]['seconds'] for run in runs)
+        record = flatten(runs[0]['stages'])[key]
+        if key.split('/')[-1] in IMAGE_PHASES:
+            work, unit = pixels / 1e6, 'Mpx/s'
+        else:
+            work, unit = max(record['points_in'], record['points_out']) / 1e3, 'kpt/s'
+        rows[key] = {'seconds': seconds, 'throughput': work / seconds if seconds > 0 else None, 'unit': unit}
+    return {
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'peak_rss_mb': max(run['peak_rss_mb'] or 0 for run in runs),
+        'points': runs[0]['points'],
+        'stages': rows,
+    }
+
+
+def compare(name, current, baseline, args):
+    """Print one scenario's table against its baseline; returns the regressions found"""
+    regressions = []
+    base_stages = baseline['stages'] if baseline else {}
+    print(f"{'':<2}{'Stage':<22}{'Time':>10}{'Throughput':>16}{'Baseline':>11}{'Change':>9}")
+    for key, row in current['stages'].items():
+        throughput = f"{row['throughput']:,.1f} {row['unit']}" if row['throughput'] else '-'
+        line = f"{'':<2}{key:<22}{row['seconds'] * 1000:>8.1f}ms{throughput:>16}"
+        base = base_stages.get(key)
+        if base is not None:
+            change = (row['seconds'] - base['seconds']) / base['seconds'] if base['seconds'] > 0 else 0.0
+            line += f"{base['seconds'] * 1000:>9.1f}ms{change:>+8.0%}"
+            if (row['seconds'] > base['seconds'] * (1 + args.threshold)
+                    and (row['seconds'] - base['seconds']) * 1000 > args.min_ms):
+                line += "  SLOWER"
+                regressions.append(f"{name} {key} {change:+.0%}")
+        print(line)
+
+    line = f"{'':<2}{'total':<22}{current['seconds'] * 1000:>8.1f}ms{'':>16}"
+    if baseline:
+        line += f"{baseline['seconds'] * 1000:>9.1f}ms{(current['seconds'] - baseline['seconds']) / baseline['seconds']:>+8.0%}"
+    print(line)
+
+    line = f"{'':<2}{'peak RSS':<22}{current['peak_rss_mb']:>8.0f}MB{'':>16}"
+    if baseline:
+        base = baseline['peak_rss_mb']
+        change = (current['peak_rss_mb'] - base) / base if base else 0.0
+        line += f"{base:>9.0f}MB{change:>+8.0%}"
+        if current['peak_rss_mb'] > base * (1 + args.memory_threshold):
+            line += "  LARGER"
+            regressions.append(f"{name} peak RSS {change:+.0%}")
+    print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the conversion pipeline on synthetic drawings')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS),
+                        help='Scenarios to run (default: all)')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per scenario, median reported (default: 3)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the synthetic drawings (default: 1)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='Baseline file (default: benchmark_baseline.json next to this script)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store these results as the baseline instead of comparing')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slow-down of a stage before it counts as a regression (default: 0.25)')
+    parser.add_argument('--min-ms', type=float, default=5.0,
+                        help='Slow-downs smaller than this many ms are timing noise (default: 5)')
+    parser.add_argument('--memory-threshold', type=float, default=0.2,
+                        help='Allowed growth of peak memory (default: 0.2)')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(json.loads(args.worker))
+        return
+
+    baseline = None
+    if not args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            if baseline['machine'] != platform.node() or baseline['seed'] != args.seed:
+                print(f"Note: baseline was recorded on {baseline['machine']} with seed {baseline['seed']}")
+        else:
+            print(f"No baseline at {args.baseline}; run with --save-baseline to record one\n")
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.scenarios:
+            width, height, lines, stroke, noise, components, skeleton = SCENARIOS[name]
+            image_file = os.path.join(tmp, f"{name}.png")
+            # Drawn in its own process: peak RSS carries over into child processes, so this one stays small
+            subprocess.run([sys.executable, 'create_test_images.py', '--synthetic', '--output-dir', tmp,
+                            '-o', f"{name}.png", '--size', f"{width}x{height}", '--lines', str(lines),
+                            '--stroke', str(stroke), '--noise', str(noise), '--components', str(components),
+                            '--seed', str(args.seed)], cwd=here, check=True, capture_output=True)
+            print(f"{name}: {width}x{height}, {lines} strokes in {components} components, stroke {stroke}px, "
+                  f"noise {noise:g}, {'skeleton' if skeleton else 'contour'} tracing")
+
+            runs = []
+            argv = converter_args(image_file, tmp, skeleton)
+            for _ in range(args.runs):
+                result = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', json.dumps(argv)],
+                                        cwd=here, capture_output=True, text=True)
+                if result.returncode != 0:
+                    print(f"  failed: {result.stderr.strip().splitlines()[-1]}")
+                    break
+                runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+            if not runs:
+                continue
+
+            results[name] = summarize(runs, width * height)
+            scenario_baseline = baseline['scenarios'].get(name) if baseline else None
+            regressions += compare(name, results[name], scenario_baseline, args)
+            print()
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'machine': platform.node(), 'python': platform.python_version(), 'seed': args.seed,
+                       'recorded': time.strftime('%Y-%m-%d %H:%M'), 'scenarios': results}, f, indent=2)
+        print(f"Baseline saved to: {args.baseline}")
+        return
+    if regressions:
+        print("Regressions: " + "; ".join(regressions))
+        sys.exit(1)
+    if baseline:
+        print(f"No regressions (threshold {args.threshold:.0%} per stage, {args.memory_threshold:.0%} peak memory)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark start-up time of the converter
+
+Each scenario runs in a fresh Python process and reports how long the
+converter takes to import and parse its arguments (start-up), how long the
+run itself takes, and which heavy optional modules ended up loaded. OpenCV,
+NumPy, SciPy and ezdxf are imported on first use, so --help and runs on
+vector inputs (SVG, DXF) should not load OpenCV at all, and should start
+within --target-ms.
+
+Usage:
+    python benchmark_startup.py
+    python benchmark_startup.py --runs 10 --target-ms 50
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+
+HEAVY_MODULES = ('numpy', 'cv2', 'scipy', 'ezdxf', 'fontTools', 'multiprocessing', 'sqlite3')
+
+TEST_SVG = """<svg xmlns="http://www.w3.org/2000/svg" width="100mm" height="60mm" viewBox="0 0 100 60">
+  <path d="M10 50 C 20 10, 40 10, 50 30 S 80 50, 90 10" fill="none" stroke="black"/>
+  <circle cx="30" cy="30" r="12" fill="none" stroke="black"/>
+  <rect x="60" y="35" width="25" height="15" rx="3" fill="none" stroke="black"/>
+</svg>
+"""
+
+# Minimal ASCII DXF in mm as (group code, value) pairs: a line, a circle and a closed polyline
+TEST_DXF = [
+    (0, 'SECTION'), (2, 'HEADER'), (9, '$INSUNITS'), (70, 4), (0, 'ENDSEC'),
+    (0, 'SECTION'), (2, 'ENTITIES'),
+    (0, 'LINE'), (8, 0), (10, 10), (20, 10), (11, 90), (21, 50),
+    (0, 'CIRCLE'), (8, 0), (10, 30), (20, 30), (40, 12),
+    (0, 'LWPOLYLINE'), (8, 0), (90, 4), (70, 1), (10, 60), (20, 35), (10, 85), (20, 35),
+    (10, 85), (20, 50), (10, 60), (20, 50),
+    (0, 'ENDSEC'), (0, 'EOF'),
+]
+
+
+def scenarios(tmp):
+    """
+    (name, converter arguments, reads an image); None runs only the import.
+    Scenarios that read no image must not load OpenCV.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    svg = os.path.join(tmp, 'startup_test.svg')
+    with open(svg, 'w') as f:
+        f.write(TEST_SVG)
+    dxf = os.path.join(tmp, 'startup_test.dxf')
+    with open(dxf, 'w') as f:
+        f.write(''.join(f"{code}\n{value}\n" for code, value in TEST_DXF))
+    return [
+        ('import', None, False),
+        ('--help', ['--help'], False),
+        ('SVG -> SVG', [svg, '--format', 'svg', '--skip-gcode-params', '--output-dir', tmp], False),
+        ('SVG -> G-Code', [svg, '--params', '1mm detail', '--output-dir', tmp], False),
+        ('DXF -> G-Code', [dxf, '--params', '1mm detail', '--output-dir', tmp], False),
+        ('image -> G-Code', [os.path.join(here, 'heart.jpg'), '--params', '1mm detail', '--output-dir', tmp], True),
+    ]
+
+
+def run_worker(argv):
+    """Worker: time one converter run in this process and print the result as JSON"""
+    import io
+    import contextlib
+    start = time.perf_counter()
+    import line_to_gcode_multiformat as converter
+    imported = time.perf_counter()
+
+    if argv is not None:
+        sys.argv = ['line_to_gcode_multiformat.py'] + argv
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                converter.main()
+            except SystemExit:
+                pass
+    done = time.perf_counter()
+
+    print(json.dumps({
+        'startup': imported - start,
+        'run': done - imported,
+        'modules': [name for name in HEAVY_MODULES if name in sys.modules
+                    and not type(sys.modules[name]).__name__.startswith('_Lazy')],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark converter start-up time')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per scenario, median reported (default: 5)')
+    parser.add_argument('--target-ms', type=float, default=50.0,
+                        help='Start-up budget in ms; --help must also finish within it (default: 50)')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(json.loads(args.worker))
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'Scenario':<18}{'Start-up':>10}{'Run':>10}{'Process':>10}  Loaded")
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, argv, image in scenarios(tmp):
+            results = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                result = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', json.dumps(argv)],
+                                        cwd=here, capture_output=True, text=True)
+                wall = time.perf_counter() - start
+                if result.returncode != 0:
+                    print(f"{name:<18}failed: {result.stderr.strip().splitlines()[-1]}")
+                    break
+                r = json.loads(result.stdout.strip().splitlines()[-1])
+                r['wall'] = wall
+                results.append(r)
+            if not results:
+                continue
+
+            startup = statistics.median(r['startup'] for r in results) * 1000
+            run = statistics.median(r['run'] for r in results) * 1000
+            wall = statistics.median(r['wall'] for r in results) * 1000
+            print(f"{name:<18}{startup:>8.1f}ms{run:>8.1f}ms{wall:>8.0f}ms  {', '.join(results[0]['modules']) or '-'}")
+
+            if startup > args.target_ms:
+                failures.append(f"{name} start-up {startup:.1f}ms")
+            if argv == ['--help'] and startup + run > args.target_ms:
+                failures.append(f"--help total {startup + run:.1f}ms")
+            if not image and 'cv2' in results[0]['modules']:
+                failures.append(f"{name} loaded OpenCV")
+
+    print(f"\nTarget: start-up within {args.target_ms:g}ms (process time also includes the interpreter itself)")
+    if failures:
+        print("Missed: " + "; ".join(failures))
+        sys.exit(1)
+    print("All scenarios within target")
+
+
+if __name__ == "__main__":
+    main()
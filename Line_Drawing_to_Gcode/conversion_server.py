@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+Conversion Server
+A small HTTP service that converts drawings for everyone in the shop, so
+nobody waits for the converter and OpenCV to start on their own machine.
+
+Upload an image, SVG, DXF or Carbide Create file with the same options the
+command line takes; the file is converted on a pool of worker processes
+that are started, with OpenCV loaded, when the server starts, and the
+G-Code, DXF, SVG and preview come back as download links (or, with
+download=nc etc., as the response itself). Results are cached on disk by
+a hash of the file, the options and the converter itself, so asking for
+the same conversion again is answered at once. At most --jobs files are
+converted at a time and --max-queue more may wait; further requests get
+503 Busy. GET /metrics reports request counts, cache hits and latencies.
+
+Only the standard library is used. It listens on localhost unless --host
+says otherwise; there is no authentication, so only open it to a network
+you trust.
+
+Usage:
+    python conversion_server.py --jobs 2
+    curl --data-binary @sketch.png "http://localhost:8765/convert?name=sketch.png&params=1mm%20detail&format=all&preview=1"
+    curl -F file=@logo.svg -F format=svg "http://localhost:8765/convert?download=svg" -o logo_out.svg
+    curl http://localhost:8765/metrics
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+from collections import deque, Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+from pathlib import Path
+
+from line_to_gcode_multiformat import (build_parser, load_params_profile, read_profile_file, init_worker,
+                                       convert_job, ConversionError, BUILTIN_PROFILES, PROFILE_KEYS)
+from watch_folder import warm_up
+
+
+UPLOAD_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.svg', '.dxf', '.c2d')
+
+# Request fields passed on to the converter as options, and the ones that are plain switches
+OPTION_FLAGS = {
+    'format': '--format', 'threshold': '--threshold', 'simplify': '--simplify', 'smooth': '--smooth',
+    'tolerance': '--tolerance', 'resolution': '--resolution', 'min_feed': '--min-feed',
+    'max_feed': '--max-feed', 'corner_accel': '--corner-accel', 'svg_precision': '--svg-precision',
+    'dxf_version': '--dxf-version', 'feed_rate': '--feed-rate', 'plunge_rate': '--plunge-rate',
+    'cut_depth': '--cut-depth', 'safe_height': '--safe-height', 'spindle_speed': '--spindle-speed',
+}
+SWITCHES = {'skeleton': '--skeleton', 'spline': '--spline', 'order': '--order', 'preview': '--preview',
+            'svg_relative': '--svg-relative', 'svgz': '--svgz', 'save_toolpath': '--save-toolpath'}
+
+# Output file kinds, as named by download=
+OUTPUT_KINDS = (('_preview.png', 'preview'), ('.nc', 'nc'), ('.dxf', 'dxf'), ('.svgz', 'svg'), ('.svg', 'svg'),
+                ('.npz', 'toolpath'))
+
+CONTENT_TYPES = {'.nc': 'text/plain; charset=utf-8', '.dxf': 'application/dxf', '.svg': 'image/svg+xml',
+                 '.svgz': 'image/svg+xml', '.png': 'image/png', '.npz': 'application/octet-stream'}
+
+KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+UPLOAD_FORM = """<!doctype html>
+<title>Line Drawing to G-Code</title>
+<h1>Line Drawing to G-Code</h1>
+<form method="post" action="/convert" enctype="multipart/form-data">
+<p><input type="file" name="file" required></p>
+<p>Machining profile: <select name="params">{profiles}</select></p>
+<p>Format: <select name="format"><option>nc</option><option>svg</option><option>dxf</option>
+<option selected>all</option></select>
+<label><input type="checkbox" name="skeleton" value="1"> Skeleton (pencil lines)</label>
+<label><input type="checkbox" name="preview" value="1" checked> Preview</label></p>
+<p><button>Convert</button></p>
+</form>
+"""
+
+
+class HTTPError(Exception):
+    """A request that cannot be served; status and message go back to the client"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def converter_version():
+    """Hash of the converter's source, so cached results are redone when it changes"""
+    digest = hashlib.sha256()
+    for name in ('line_to_gcode_multiformat.py', 'gcode_preview.py'):
+        digest.update(Path(__file__).with_name(name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+
+def output_kind(name):
+    for suffix, kind in OUTPUT_KINDS:
+        if name.endswith(suffix):
+            return kind
+    return None
+
+
+def parse_upload(content_type, body, fields):
+    """
+    The uploaded file from a request body: either the raw file (named by
+    the name field) or a multipart form with a file field, whose other
+    fields are added to fields
+
+    Returns:
+        (file name, file bytes)
+    """
+    if content_type.startswith('multipart/form-data'):
+        from email.parser import BytesParser
+        from email.policy import HTTP
+        message = BytesParser(policy=HTTP).parsebytes(
+            b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+        name = data = None
+        for part in message.iter_parts():
+            field = part.get_param('name', header='content-disposition')
+            if part.get_filename():
+                name, data = part.get_filename(), part.get_payload(decode=True)
+            elif field:
+                fields[field] = part.get_payload(decode=True).decode('utf-8', 'replace')
+        if data is None:
+            raise HTTPError(400, "No file in the form (expected a file field)")
+        return name, data
+    if 'name' not in fields:
+        raise HTTPError(400, "Give the file name as ?name=drawing.png (or upload a multipart form)")
+    return fields['name'], body
+
+
+class ConversionService:
+    """Converts uploads on a warm process pool, with a content-addressed result cache"""
+
+    def __init__(self, cache_dir, jobs=None, max_queue=None, cache_entries=500, timeout=300.0,
+                 profiles_file=None, default_params=None):
+        """
+        Args:
+            cache_dir: Folder for uploads and results
+            jobs: Worker processes (default: all CPUs)
+            max_queue: Requests allowed to wait for a worker (default: 4 per worker)
+            cache_entries: Results kept before the least recently used are removed
+            timeout: Seconds a request waits for its conversion
+            profiles_file: JSON/TOML file of named machining profiles, offered
+                           next to the built-in ones
+            default_params: Profile used when a request names none
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.max_queue = self.jobs * 4 if max_queue is None else max_queue
+        self.cache_entries = cache_entries
+        self.timeout = timeout
+        self.profiles_file = profiles_file
+        self.default_params = default_params
+        self.version = converter_version()
+
+        self.profiles = {}  # lower-case name -> load_params_profile() spec
+        for name in read_profile_file(BUILTIN_PROFILES):
+            self.profiles[name.lower()] = name
+        if profiles_file:
+            for name in read_profile_file(profiles_file):
+                self.profiles[name.lower()] = f"{profiles_file}#{name}"
+
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(self.jobs + self.max_queue)
+        self.in_flight = {}  # cache key -> future, so identical requests share one conversion
+        self.started = time.time()
+        self.counts = Counter()
+        self.request_times = deque(maxlen=1000)
+        self.conversion_times = deque(maxlen=1000)
+        self.pool = None
+
+    def start(self):
+        """Start every worker now, with OpenCV loaded, instead of on the first upload"""
+        pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=init_worker)
+        for future in [pool.submit(warm_up) for _ in range(self.jobs)]:
+            future.result()
+        self.pool = pool
+
+    def stop(self):
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def resolve_options(self, fields):
+        """
+        Turn request fields into converter options and a machining profile
+
+        Returns:
+            (args, profile, canonical options for the cache key)
+        """
+        unknown = set(fields) - set(OPTION_FLAGS) - set(SWITCHES) - set(PROFILE_KEYS) - {
+            'params', 'name', 'download'}
+        if unknown:
+            raise HTTPError(400, f"Unknown option(s): {', '.join(sorted(unknown))}")
+
+        argv = ['upload']
+        for field, flag in OPTION_FLAGS.items():
+            if fields.get(field, '') != '':
+                argv += [flag, fields[field]]
+        for field, flag in SWITCHES.items():
+            if fields.get(field, '').lower() in ('1', 'true', 'yes', 'on'):
+                argv.append(flag)
+
+        parser = build_parser()
+
+        def reject(message):
+            raise HTTPError(400, f"Invalid option: {message}")
+        parser.error = reject
+        args = parser.parse_args(argv)
+
+        profile = None
+        name = fields.get('params') or self.default_params
+        if name:
+            if name.lower() not in self.profiles:
+                raise HTTPError(400, f"No machining profile '{name}' (available: {', '.join(self.profile_names())})")
+            profile = load_params_profile(self.profiles[name.lower()])
+        inline = {key: fields[key] for key in PROFILE_KEYS if fields.get(key, '') != ''}
+        if inline:
+            profile = dict(profile or {'units': 'mm'})
+            for key, value in inline.items():
+                if key == 'units':
+                    if value not in ('mm', 'inch', 'in'):
+                        raise HTTPError(400, "units must be mm or inch")
+                    profile['units'] = 'inch' if value == 'in' else value
+                    continue
+                try:
+                    profile[key] = float(value)
+                except ValueError:
+                    raise HTTPError(400, f"{key} must be a number")
+        if profile is None and args.format in ('nc', 'gcode', 'all'):
+            raise HTTPError(400, "G-Code output needs machining parameters: give params= (a profile name) "
+                                 "or format=svg/dxf")
+
+        options = {'argv': argv[1:], 'profile': profile}
+        return args, profile, options
+
+    def profile_names(self):
+        names = [spec.partition('#')[2] or spec for spec in self.profiles.values()]
+        return sorted(names, key=str.lower)
+
+    def cache_key(self, data, extension, options):
+        digest = hashlib.sha256()
+        digest.update(self.version.encode())
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        digest.update(extension.encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def convert(self, name, data, fields):
+        """
+        Convert an upload, or fetch its result from the cache
+
+        Returns:
+            The conversion result: paths, points, seconds, output file names
+            and whether it came from the cache
+        """
+        name = re.sub(r'[^\w.-]+', '_', Path(name).name) or 'upload'
+        extension = Path(name).suffix.lower()
+        if extension not in UPLOAD_EXTENSIONS:
+            raise HTTPError(415, f"Unsupported file type '{extension}' (use {', '.join(UPLOAD_EXTENSIONS)})")
+        args, profile, options = self.resolve_options(fields)
+        key = self.cache_key(data, extension, options)
+        entry = self.cache_dir / key
+
+        result = self.cached(key)
+        if result is not None:
+            self.count('cache_hits')
+            return dict(result, key=key, cached=True)
+        self.count('cache_misses')
+
+        with self.lock:
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                if not self.slots.acquire(blocking=False):
+                    self.counts['rejected'] += 1
+                    raise HTTPError(503, "Busy: every worker and queue place is taken, try again shortly")
+                entry.mkdir(exist_ok=True)
+                input_path = entry / name
+                input_path.write_bytes(data)
+                job = (input_path, args, profile, entry, input_path.stem)
+                try:
+                    future = self.pool.submit(convert_job, job)
+                except BrokenProcessPool:
+                    future = None
+                    self.slots.release()
+                else:
+                    self.in_flight[key] = future
+        if future is None:
+            self.restart_pool()
+            raise HTTPError(500, "The worker pool failed and was restarted, try again")
+        if owner:
+            # Outside the lock: the callback takes it, and runs at once if the job is already done
+            future.add_done_callback(lambda _: self.finished(key))
+
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self.count('timeouts')
+            raise HTTPError(504, f"Conversion did not finish within {self.timeout:g}s")
+        except BrokenProcessPool:
+            if owner:
+                self.restart_pool()
+            raise HTTPError(500, "A worker crashed converting this file; the pool was restarted")
+
+        if not result['ok']:
+            if owner:
+                self.count('failures')
+                shutil.rmtree(entry, ignore_errors=True)
+            raise HTTPError(422, f"Could not convert {name}: {result['error'].splitlines()[0]}")
+
+        result = {'input': name, 'paths': result['paths'], 'points': result['points'],
+                  'seconds': result['seconds'], 'outputs': [Path(f).name for f in result['outputs']]}
+        if owner:
+            self.count('conversions')
+            with self.lock:
+                self.conversion_times.append(result['seconds'])
+            (entry / 'result.json').write_text(json.dumps(result))
+            self.evict()
+        return dict(result, key=key, cached=False)
+
+    def finished(self, key):
+        with self.lock:
+            self.in_flight.pop(key, None)
+        self.slots.release()
+
+    def cached(self, key):
+        result_file = self.cache_dir / key / 'result.json'
+        try:
+            result = json.loads(result_file.read_text())
+        except (OSError, ValueError):
+            return None
+        os.utime(result_file.parent)  # recently used
+        return result
+
+    def evict(self):
+        """Remove the least recently used results beyond cache_entries"""
+        with self.lock:
+            busy = set(self.in_flight)
+        entries = [(entry.stat().st_mtime, entry) for entry in self.cache_dir.iterdir()
+                   if entry.is_dir() and entry.name not in busy]
+        entries.sort()
+        for _, entry in entries[:max(0, len(entries) - self.cache_entries)]:
+            shutil.rmtree(entry, ignore_errors=True)
+            self.count('evicted')
+
+    def restart_pool(self):
+        with self.lock:
+            old, self.pool = self.pool, None
+            if old:
+                old.shutdown(wait=False, cancel_futures=True)
+            self.counts['pool_restarts'] += 1
+        print(f"{time.strftime('%H:%M:%S')} worker pool failed, restarting it")
+        self.start()
+
+    def output_file(self, key, name):
+        """Path of a cached output, checked to stay inside the cache"""
+        if not KEY_RE.match(key) or '/' in name or name.startswith('.') or output_kind(name) is None:
+            raise HTTPError(404, "No such result")
+        path = self.cache_dir / key / name
+        if not path.is_file():
+            raise HTTPError(404, "No such result (it may have been removed from the cache)")
+        return path
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counts[name] += amount
+
+    def record_request(self, endpoint, status, seconds, received=0):
+        with self.lock:
+            self.counts['requests'] += 1
+            self.counts[f"status_{status}"] += 1
+            self.counts[f"endpoint_{endpoint}"] += 1
+            self.counts['bytes_received'] += received
+            if endpoint == 'convert':
+                self.request_times.append(seconds)
+
+    def metrics(self):
+        with self.lock:
+            counts = dict(self.counts)
+            request_times = list(self.request_times)
+            conversion_times = list(self.conversion_times)
+            in_flight = len(self.in_flight)
+        lookups = counts.get('cache_hits', 0) + counts.get('cache_misses', 0)
+        entries = [entry for entry in self.cache_dir.iterdir() if entry.is_dir()]
+
+        def latency(values):
+            return {'count': len(values), 'mean': sum(values) / len(values) if values else None,
+                    'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95), 'max': max(values, default=None)}
+
+        return {
+            'uptime_seconds': time.time() - self.started,
+            'workers': self.jobs,
+            'max_queue': self.max_queue,
+            'in_flight': in_flight,
+            'counts': counts,
+            'cache': {
+                'entries': len(entries),
+                'max_entries': self.cache_entries,
+                'hit_rate': counts.get('cache_hits', 0) / lookups if lookups else None,
+                'bytes': sum(f.stat().st_size for entry in entries for f in entry.iterdir()),
+            },
+            'convert_request_seconds': latency(request_times),
+            'conversion_seconds': latency(conversion_times),
+        }
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a ConversionService"""
+
+    service = None
+    max_upload = 50 * 1024 * 1024
+    server_version = 'LineToGcode/1.0'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        if url.path == '/':
+            options = ''.join(f'<option>{name}</option>' for name in self.service.profile_names())
+            self.respond(200, UPLOAD_FORM.format(profiles=options).encode(), 'text/html; charset=utf-8', 'form')
+        elif url.path == '/health':
+            self.respond_json(200, {'ok': True, 'workers': self.service.jobs}, 'health')
+        elif url.path == '/metrics':
+            self.respond_json(200, self.service.metrics(), 'metrics')
+        elif len(parts) == 3 and parts[0] == 'results':
+            try:
+                path = self.service.output_file(parts[1], parts[2])
+            except HTTPError as e:
+                self.respond_json(e.status, {'error': str(e)}, 'results')
+                return
+            self.send_file(path, 'results')
+        else:
+            self.respond_json(404, {'error': 'Not found'}, 'other')
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path != '/convert':
+            self.respond_json(404, {'error': 'Not found'}, 'other')
+            return
+        fields = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        received = 0
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length <= 0:
+                raise HTTPError(411, "Send the file in the request body")
+            if length > self.max_upload:
+                raise HTTPError(413, f"Upload larger than {self.max_upload // (1024 * 1024)} MB")
+            body = self.rfile.read(length)
+            received = len(body)
+            name, data = parse_upload(self.headers.get('Content-Type', ''), body, fields)
+            result = self.service.convert(name, data, fields)
+
+            outputs = {}
+            for output in result.pop('outputs'):
+                outputs.setdefault(output_kind(output), output)
+            download = fields.get('download')
+            if download:
+                if download not in outputs:
+                    raise HTTPError(404, f"No {download} output (have: {', '.join(outputs)})")
+                path = self.service.output_file(result['key'], outputs[download])
+        except HTTPError as e:
+            self.respond_json(e.status, {'error': str(e)}, 'convert', start, received)
+            return
+        except ConversionError as e:
+            self.respond_json(400, {'error': str(e)}, 'convert', start, received)
+            return
+
+        if download:
+            self.send_file(path, 'convert', start, received, cached=result['cached'])
+            return
+        files = {kind: f"/results/{result['key']}/{quote(output)}" for kind, output in outputs.items()}
+        self.respond_json(200, dict(result, files=files), 'convert', start, received)
+
+    def send_file(self, path, endpoint, start=None, received=0, cached=None):
+        # Headers are Latin-1: give an ASCII name plus the real one in RFC 5987 form
+        fallback = path.name.encode('ascii', 'replace').decode().replace('?', '_')
+        headers = {'Content-Disposition': f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(path.name)}'}
+        if cached is not None:
+            headers['X-Cache'] = 'hit' if cached else 'miss'
+        self.respond(200, path.read_bytes(), CONTENT_TYPES.get(path.suffix.lower(), 'application/octet-stream'),
+                     endpoint, start, received, headers)
+
+    def respond_json(self, status, data, endpoint, start=None, received=0):
+        headers = {'Retry-After': '5'} if status == 503 else {}
+        self.respond(status, json.dumps(data, indent=2).encode() + b'\n', 'application/json', endpoint, start,
+                     received, headers)
+
+    def respond(self, status, body, content_type, endpoint, start=None, received=0, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        seconds = time.perf_counter() - start if start is not None else 0.0
+        self.service.record_request(endpoint, status, seconds, received)
+        if endpoint == 'convert':
+            print(f"{time.strftime('%H:%M:%S')} {self.client_address[0]} {status} {self.path} ({seconds:.2f}s)")
+
+    def log_message(self, format, *args):
+        pass  # conversions are logged by respond()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve drawing conversions over HTTP on a warm worker pool')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port (default: 8765)')
+    parser.add_argument('--jobs', type=int, default=0, help='Worker processes (default: 0 = all CPUs)')
+    parser.add_argument('--max-queue', type=int,
+                        help='Conversions allowed to wait for a worker before answering 503 (default: 4 per worker)')
+    parser.add_argument('--cache-dir', default='conversion_cache',
+                        help='Folder for uploads and results (default: conversion_cache)')
+    parser.add_argument('--cache-entries', type=int, default=500,
+                        help='Results kept; the least recently used go first (default: 500)')
+    parser.add_argument('--max-upload-mb', type=int, default=50, help='Largest upload accepted (default: 50)')
+    parser.add_argument('--timeout', type=float, default=300.0,
+                        help='Seconds a request waits for its conversion (default: 300)')
+    parser.add_argument('--profiles', help='JSON/TOML file of named machining profiles to offer as well')
+    parser.add_argument('--params', help='Machining profile for requests that name none')
+    args = parser.parse_args()
+
+    try:
+        service = ConversionService(args.cache_dir, jobs=args.jobs, max_queue=args.max_queue,
+                                    cache_entries=args.cache_entries, timeout=args.timeout,
+                                    profiles_file=args.profiles, default_params=args.params)
+    except (ConversionError, OSError, ValueError) as e:
+        print(f"Error: Could not load machining profiles: {e}")
+        sys.exit(1)
+    if args.params and args.params.lower() not in service.profiles:
+        print(f"Error: No machining profile '{args.params}' (available: {', '.join(service.profile_names())})")
+        sys.exit(1)
+
+    ConversionHandler.service = service
+    ConversionHandler.max_upload = args.max_upload_mb * 1024 * 1024
+    server = ThreadingHTTPServer((args.host, args.port), ConversionHandler)
+    server.daemon_threads = True
+
+    start = time.perf_counter()
+    service.start()
+    print(f"Serving on http://{args.host}:{server.server_address[1]}/ with {service.jobs} warm worker(s) "
+          f"(started in {time.perf_counter() - start:.2f}s); Ctrl+C to stop")
+    if args.host not in ('127.0.0.1', 'localhost', '::1'):
+        print("Warning: there is no authentication; anyone who can reach this address can use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == '__main__':
+    main()
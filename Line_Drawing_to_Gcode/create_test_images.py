@@ -2,8 +2,18 @@
 """
 Test and demonstration script for skeleton mode
 Creates sample images to show the difference between standard and skeleton processing
+
+With --synthetic it draws a seeded, parametric line drawing instead, for
+benchmarking: image size, number of strokes, stroke width, paper noise and
+the number of separate components can all be scaled, and the same seed
+always gives the same image (see benchmark_pipeline.py).
+
+Usage:
+    python create_test_images.py --output-dir .
+    python create_test_images.py --synthetic --size 3000x2000 --lines 400 --stroke 6 --noise 0.3 --components 40
 """
 
+import argparse
 import numpy as np
 import cv2
 from pathlib import Path
@@ -57,12 +67,13 @@ def create_test_image_thick_lines():
     
     return img
 
-def create_test_image_sketch():
+def create_test_image_sketch(seed=0):
     """Create a test image simulating a rough pencil sketch"""
+    rng = np.random.RandomState(seed)
     img = np.ones((400, 600, 3), dtype=np.uint8) * 255
     
     # Add some texture/noise to simulate paper
-    noise = np.random.randint(240, 256, (400, 600, 3), dtype=np.uint8)
+    noise = rng.randint(240, 256, (400, 600, 3), dtype=np.uint8)
     img = cv2.addWeighted(img, 0.7, noise, 0.3, 0)
     
     # Draw irregular lines with varying pressure (thickness and intensity)
@@ -78,12 +89,12 @@ def create_test_image_sketch():
             y = int(y1 + t * (y2 - y1))
             
             # Add randomness
-            x += np.random.randint(-2, 3)
-            y += np.random.randint(-2, 3)
+            x += rng.randint(-2, 3)
+            y += rng.randint(-2, 3)
             
             # Vary thickness and intensity
-            thickness = base_thickness + np.random.randint(-2, 3)
-            intensity = np.random.randint(0, 50)
+            thickness = base_thickness + rng.randint(-2, 3)
+            intensity = rng.randint(0, 50)
             
             cv2.circle(img, (x, y), thickness // 2, (intensity, intensity, intensity), -1)
     
@@ -110,17 +121,117 @@ def create_test_image_sketch():
     
     return img
 
+def create_synthetic_image(width=1200, height=800, lines=60, stroke=3, noise=0.0, components=12, seed=0):
+    """
+    Create a seeded line drawing whose size and complexity can be scaled
+
+    The page is split into a grid of cells, one per component, and each
+    cell gets its share of the strokes: smooth open curves and closed loops
+    drawn across its middle, so they cross and trace as a tangle of paths.
+    Stroke widths vary along each curve like pencil pressure.
+
+    Args:
+        width, height: Image size in pixels
+        lines: Total number of strokes
+        stroke: Mean stroke width in pixels
+        noise: 0-1, amount of paper grain, smudges and stray specks
+        components: Number of separate drawings on the page
+        seed: Random seed; the same arguments always give the same image
+
+    Returns:
+        HxWx3 uint8 image, black lines on white
+    """
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+
+    components = max(1, min(components, lines))
+    cols = int(np.ceil(np.sqrt(components * width / height)))
+    rows = int(np.ceil(components / cols))
+    cell_w, cell_h = width / cols, height / rows
+    margin = stroke + 4
+
+    for c in range(components):
+        x0, y0 = (c % cols) * cell_w, (c // cols) * cell_h
+        cx, cy = x0 + cell_w / 2, y0 + cell_h / 2
+        rx, ry = max(cell_w / 2 - margin, 2), max(cell_h / 2 - margin, 2)
+        # Strokes shared out as evenly as possible between the cells
+        for s in range(lines // components + (c < lines % components)):
+            t = np.linspace(0, 1, 96)
+            if s % 3 == 0:
+                # Closed loop: a wobbly ellipse
+                r = 0.35 + 0.6 * rng.random()
+                wobble = 1 + 0.15 * np.sin(2 * np.pi * (rng.integers(2, 6) * t + rng.random()))
+                angle = 2 * np.pi * t
+                xs = cx + rx * r * wobble * np.cos(angle)
+                ys = cy + ry * r * wobble * np.sin(angle)
+            else:
+                # Open curve through the middle of the cell, so strokes cross
+                ends = rng.uniform(-1, 1, (4, 2)) * (rx, ry) * 0.95
+                ends[1:3] *= 0.5
+                b = np.stack([(1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t ** 2, t ** 3], axis=1)
+                xs, ys = (b @ ends).T
+                xs, ys = xs + cx, ys + cy
+            points = np.stack([xs, ys], axis=1)
+            widths = np.clip(stroke * (1 + 0.35 * np.sin(np.pi * 2 * t * rng.uniform(0.5, 2))), 1, None)
+            for i in range(len(points) - 1):
+                cv2.line(img, tuple(int(v) for v in np.rint(points[i])),
+                         tuple(int(v) for v in np.rint(points[i + 1])), (0, 0, 0), int(round(widths[i])))
+
+    if noise > 0:
+        gray = img[:, :, 0].astype(np.float32)
+        # Paper grain everywhere, lighter pencil in the strokes
+        gray += rng.normal(0, 40 * noise, gray.shape).astype(np.float32)
+        # Smudges and specks a tracer has to filter out
+        for _ in range(int(noise * width * height / 20000)):
+            x, y = int(rng.integers(width)), int(rng.integers(height))
+            cv2.circle(gray, (x, y), int(rng.integers(1, max(stroke, 2) + 1)), float(rng.uniform(60, 200)), -1)
+        img = cv2.cvtColor(np.clip(gray, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+    return img
+
+
+def parse_size(text):
+    """'1200x800' -> (1200, 800)"""
+    try:
+        width, height = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"size must look like 1200x800, not {text!r}")
+    return width, height
+
+
 def main():
     """Generate test images"""
-    output_dir = Path("/mnt/user-data/outputs")
-    output_dir.mkdir(exist_ok=True)
+    parser = argparse.ArgumentParser(description='Create test line drawings')
+    parser.add_argument('--output-dir', default='.', help='Folder for the images (default: current folder)')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='Draw one seeded synthetic drawing (synthetic.png) instead of the three samples')
+    parser.add_argument('-o', '--output', help='File name for --synthetic (default: synthetic.png)')
+    parser.add_argument('--size', type=parse_size, default=(1200, 800), help='Image size (default: 1200x800)')
+    parser.add_argument('--lines', type=int, default=60, help='Number of strokes (default: 60)')
+    parser.add_argument('--stroke', type=int, default=3, help='Mean stroke width in pixels (default: 3)')
+    parser.add_argument('--noise', type=float, default=0.0, help='Paper noise and specks, 0-1 (default: 0)')
+    parser.add_argument('--components', type=int, default=12, help='Separate drawings on the page (default: 12)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.synthetic:
+        width, height = args.size
+        img = create_synthetic_image(width, height, args.lines, args.stroke, args.noise, args.components, args.seed)
+        output_file = output_dir / (args.output or 'synthetic.png')
+        cv2.imwrite(str(output_file), img)
+        print(f"Created {output_file}: {width}x{height}, {args.lines} strokes in {args.components} "
+              f"components, stroke {args.stroke}px, noise {args.noise:g}, seed {args.seed}")
+        return
     
     print("Generating test images...")
     
     # Create test images
     img_clean = create_test_image_clean_lines()
     img_thick = create_test_image_thick_lines()
-    img_sketch = create_test_image_sketch()
+    img_sketch = create_test_image_sketch(args.seed)
     
     # Save images
     cv2.imwrite(str(output_dir / "test_clean_lines.png"), img_clean)
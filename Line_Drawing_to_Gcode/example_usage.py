@@ -206,6 +206,49 @@ def example_varying_thickness():
     print("Wood carving G-Code generated!")
 
 
+def example_pipeline():
+    """Example using the stage pipeline of line_to_gcode_multiformat"""
+    from line_to_gcode_multiformat import (Pipeline, Drawing, LoadStage, BinarizeStage, ExtractStage,
+                                           FilterStage, DedupeStage, MergeStage, OrderStage,
+                                           TransformStage, EmitStage)
+    
+    pipeline = Pipeline([
+        LoadStage(),
+        BinarizeStage(threshold=127),
+        ExtractStage(simplify_epsilon=1.0, use_skeleton=True, smooth_level=10),
+        FilterStage(min_length=20),  # Drop specks under 20 pixels long
+        DedupeStage(),
+        MergeStage(),
+        OrderStage(),                # Shortest rapids between paths
+        TransformStage(),
+        EmitStage(formats=['nc', 'svg']),
+    ])
+    
+    # Trace first, and look at the result before deciding on a size
+    drawing = Drawing('pencil_sketch.jpg')
+    pipeline.run(drawing, stop='transform')
+    print(f"Traced {len(drawing.paths)} paths from a {drawing.width}x{drawing.height} image")
+    
+    drawing.params = {
+        'filename': 'pencil_sketch.jpg',
+        'units': 'mm',
+        'material_width': 200,
+        'material_height': 150,
+        'tool_diameter': 1.0,
+        'cut_depth': 0.5,
+        'feed_rate': 400,
+        'plunge_rate': 150,
+        'safe_height': 5,
+        'spindle_speed': 20000
+    }
+    drawing.target_size = (200, 150)
+    drawing.units = 'mm'
+    pipeline.run(drawing, start='transform')
+    
+    # Time, memory and path/point counts of every stage
+    print(Pipeline.format_stats(drawing.stats))
+
+
 if __name__ == '__main__':
     print("=== Line to G-Code Examples ===\n")
     print("Uncomment the example you want to run:\n")
@@ -216,8 +259,10 @@ if __name__ == '__main__':
     # example_svg()
     # example_pencil_drawing()
     # example_varying_thickness()
+    # example_pipeline()
     
     print("\nEdit this file to uncomment an example function!")
     print("\nNew examples:")
     print("  - example_pencil_drawing(): Process pencil sketch with skeletonization")
     print("  - example_varying_thickness(): Process marker/thick line drawings")
+    print("  - example_pipeline(): Run the stages one by one and see where the time goes")
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+G-Code Analyzer
+Summarizes a G-Code program before running it: bounds, cut and rapid
+lengths, estimated time, tool changes and a per-toolpath breakdown taken
+from Carbide Create's (Toolpath: ...) comments.
+
+The file is memory-mapped and scanned in a single regex pass; modal state
+lives in local variables and plain axis-only lines are handled without
+tokenizing them, so files with 100k+ lines are analyzed in under a second.
+"""
+
+import sys
+import re
+import json
+import math
+import mmap
+import argparse
+from pathlib import Path
+
+
+NUMBER = rb'([-+]?(?:\d+\.?\d*|\.\d+))'
+
+# One match per line. Most lines of a CAM program are bare modal moves
+# ("X1.2345Y-0.5000" or "G1Z-0.0500F8.0" style continuations), so those are
+# matched whole by the first alternative; anything else falls through to
+# the second and is tokenized with WORD_RE.
+LINE_RE = re.compile(
+    rb'(?m)^[ \t]*(?:X' + NUMBER + rb')?[ \t]*(?:Y' + NUMBER + rb')?[ \t]*(?:Z' + NUMBER +
+    rb')?[ \t]*(?:F' + NUMBER + rb')?[ \t]*\r?$|^([^\n]*)$'
+)
+
+# Tokens within a general line: (comment) | ;comment | word
+WORD_RE = re.compile(rb'\(([^)\n]*)\)|;([^\n]*)|([A-Za-z])[ \t]*' + NUMBER)
+
+TOOLPATH_RE = re.compile(r'^Toolpath:\s*(.+)$')
+SECTION_RE = re.compile(r'^(.+) - (\w+)$')
+TOOL_RE = re.compile(r'^TOOL/MILL,\s*([-+\d.]+)')
+
+# Default rapid rates for the time estimate (X-Carve class machines)
+DEFAULT_RAPID_RATE = {'mm': 5000.0, 'inch': 200.0}
+
+INF = float('inf')
+
+LETTERS = {bytes([c]): chr(c).upper() for c in b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'}
+
+
+def _new_bounds():
+    return [INF, INF, INF, -INF, -INF, -INF]
+
+
+def _bounds_dict(b):
+    if b[0] == INF:
+        return None
+    return {'min': [b[0], b[1], b[2]], 'max': [b[3], b[4], b[5]]}
+
+
+def _new_section(name, line, tool):
+    return {
+        'name': name,
+        'start_line': line,
+        'tool': tool,
+        'cut_length': 0.0,
+        'rapid_length': 0.0,
+        'cut_time': 0.0,
+        'cut_moves': 0,
+        'rapid_moves': 0,
+        'bounds': _new_bounds(),
+    }
+
+
+def _arc_extent(x0, y0, x1, y1, cx, cy, clockwise):
+    """Sweep angle, radius and axis-aligned XY bounds of a G2/G3 arc"""
+    r = math.hypot(x0 - cx, y0 - cy)
+    a0 = math.atan2(y0 - cy, x0 - cx)
+    a1 = math.atan2(y1 - cy, x1 - cx)
+    if clockwise:
+        sweep = (a0 - a1) % (2 * math.pi)
+    else:
+        sweep = (a1 - a0) % (2 * math.pi)
+    if sweep == 0:
+        sweep = 2 * math.pi  # full circle
+
+    xs = [x0, x1]
+    ys = [y0, y1]
+    start = a1 if clockwise else a0
+    for k in range(4):
+        angle = k * math.pi / 2
+        if (angle - start) % (2 * math.pi) <= sweep:
+            xs.append(cx + r * math.cos(angle))
+            ys.append(cy + r * math.sin(angle))
+    return sweep, r, (min(xs), min(ys), max(xs), max(ys))
+
+
+def _arc_points(x0, y0, cx, cy, r, sweep, clockwise):
+    """Points along a G2/G3 arc at 5 degree steps, excluding the start"""
+    steps = max(1, int(math.ceil(sweep / (math.pi / 36))))
+    a0 = math.atan2(y0 - cy, x0 - cx)
+    step = (-sweep if clockwise else sweep) / steps
+    return [(cx + r * math.cos(a0 + step * k), cy + r * math.sin(a0 + step * k)) for k in range(1, steps + 1)]
+
+
+def analyze_gcode(gcode_file, rapid_rate=None, segments=None):
+    """
+    Analyze a G-Code file in one streaming pass.
+
+    Args:
+        gcode_file: Path to .nc/.gcode file
+        rapid_rate: Rapid traverse rate for the time estimate (units/min);
+                    defaults to DEFAULT_RAPID_RATE for the program's units
+        segments: Optional list; every XY move is appended to it as
+                  (x0, y0, x1, y1, is_cut, tool_diameter), with arcs split
+                  into 5 degree chords and tool_diameter NaN until a tool
+                  change names one
+
+    Returns:
+        Dictionary with the summary, tool changes and per-toolpath sections
+    """
+    gcode_file = Path(gcode_file)
+
+    # Modal state
+    motion = 0
+    absolute = True
+    units = 'mm'
+    feed = 0.0
+    spindle = 0.0
+    tool = None
+    selected_tool = -1  # last T word; M6 loads it, even from a later line
+    x = y = z = 0.0
+
+    # Totals
+    cut_length = 0.0
+    rapid_length = 0.0
+    cut_time = 0.0
+    cut_moves = 0
+    rapid_moves = 0
+    arc_moves = 0
+    line_count = 0
+    all_bounds = _new_bounds()
+    cut_bounds = _new_bounds()
+    tool_changes = []
+    spindle_speeds = set()
+    feed_rates = set()
+    warnings = []
+    stock = None
+
+    sections = []
+    section = _new_section('(no toolpath name)', 1, None)
+
+    comment_tool = None
+    z_unknown = False
+    diameter = float('nan')
+
+    with open(gcode_file, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            data = b''  # empty file
+
+        try:
+            for m in LINE_RE.finditer(data):
+                line_count += 1
+                general = m.group(5)
+
+                if general is None:
+                    # Bare modal move: X/Y/Z/F words only
+                    xs, ys, zs, fs = m.group(1, 2, 3, 4)
+                    if fs is not None:
+                        feed = float(fs)
+                        feed_rates.add(feed)
+                    if xs is None and ys is None and zs is None:
+                        continue
+                    if absolute:
+                        nx = float(xs) if xs is not None else x
+                        ny = float(ys) if ys is not None else y
+                        nz = float(zs) if zs is not None else z
+                    else:
+                        nx = x + float(xs) if xs is not None else x
+                        ny = y + float(ys) if ys is not None else y
+                        nz = z + float(zs) if zs is not None else z
+                    arc_words = None
+
+                else:
+                    if not general.strip():
+                        continue
+                    words = {}
+                    g_codes = []
+                    m_codes = []
+                    for t in WORD_RE.finditer(general):
+                        kind = t.lastindex
+                        if kind == 4:
+                            letter = LETTERS[t.group(3)]
+                            if letter == 'G':
+                                g_codes.append(float(t.group(4)))
+                            elif letter == 'M':
+                                m_codes.append(int(float(t.group(4))))
+                            else:
+                                words[letter] = float(t.group(4))
+                        elif kind == 1:
+                            text = t.group(1).decode('utf-8', 'replace').strip()
+                            named = TOOLPATH_RE.match(text) or SECTION_RE.match(text)
+                            if named:
+                                name = named.group(1).strip() if named.re is TOOLPATH_RE else text
+                                sections.append(section)
+                                section = _new_section(name, line_count, tool)
+                                continue
+                            tool_match = TOOL_RE.match(text)
+                            if tool_match:
+                                comment_tool = float(tool_match.group(1))
+                            elif text.startswith('STOCK/BLOCK'):
+                                stock = [float(v) for v in text.split(',')[1:]]
+
+                    machine_coords = False
+                    for g in g_codes:
+                        if g in (0, 1, 2, 3):
+                            motion = int(g)
+                        elif g == 20:
+                            units = 'inch'
+                        elif g == 21:
+                            units = 'mm'
+                        elif g == 90:
+                            absolute = True
+                        elif g == 91:
+                            absolute = False
+                        elif g == 53:
+                            machine_coords = True
+
+                    if 'T' in words:
+                        selected_tool = int(words['T'])
+                    for code in m_codes:
+                        if code == 6:
+                            tool = selected_tool
+                            tool_changes.append({'line': line_count, 'tool': tool, 'diameter': comment_tool})
+                            diameter = comment_tool if comment_tool is not None else float('nan')
+                            section['tool'] = tool
+                        elif code in (3, 4):
+                            spindle = words.get('S', spindle)
+                            spindle_speeds.add(spindle)
+                        elif code == 5:
+                            spindle = 0.0
+
+                    if 'F' in words:
+                        feed = words['F']
+                        feed_rates.add(feed)
+                    if 'S' in words and not m_codes:
+                        spindle = words['S']
+                        spindle_speeds.add(spindle)
+
+                    arc_words = words if motion in (2, 3) else None
+                    if not ('X' in words or 'Y' in words or 'Z' in words):
+                        # A G2/G3 with only I/J is a full circle back to the start point
+                        if arc_words is None or not ('I' in words or 'J' in words) or machine_coords:
+                            continue
+
+                    if machine_coords:
+                        # G53 moves are in machine coordinates (safe-Z moves);
+                        # the work position on those axes is unknown until
+                        # the program moves them again
+                        z_unknown = z_unknown or 'Z' in words
+                        continue
+
+                    if absolute:
+                        nx = words.get('X', x)
+                        ny = words.get('Y', y)
+                        nz = words.get('Z', z)
+                    else:
+                        nx = x + words.get('X', 0.0)
+                        ny = y + words.get('Y', 0.0)
+                        nz = z + words.get('Z', 0.0)
+
+                if z_unknown:
+                    z = nz
+                    z_unknown = False
+
+                if motion == 0:
+                    length = math.sqrt((nx - x) ** 2 + (ny - y) ** 2 + (nz - z) ** 2)
+                    rapid_length += length
+                    rapid_moves += 1
+                    section['rapid_length'] += length
+                    section['rapid_moves'] += 1
+                    lo_x, lo_y, hi_x, hi_y = min(x, nx), min(y, ny), max(x, nx), max(y, ny)
+                    lo_z, hi_z = min(z, nz), max(z, nz)
+                    if segments is not None and (nx != x or ny != y):
+                        segments.append((x, y, nx, ny, False, diameter))
+                    boxes = (all_bounds,)
+                else:
+                    if arc_words is None or 'R' in arc_words:
+                        # Straight move (a radius-form arc is measured by its chord)
+                        length = math.sqrt((nx - x) ** 2 + (ny - y) ** 2 + (nz - z) ** 2)
+                        lo_x, lo_y, hi_x, hi_y = min(x, nx), min(y, ny), max(x, nx), max(y, ny)
+                        if segments is not None and (nx != x or ny != y):
+                            segments.append((x, y, nx, ny, True, diameter))
+                    else:
+                        cx = x + arc_words.get('I', 0.0)
+                        cy = y + arc_words.get('J', 0.0)
+                        sweep, r, (lo_x, lo_y, hi_x, hi_y) = _arc_extent(x, y, nx, ny, cx, cy, motion == 2)
+                        length = math.hypot(sweep * r, nz - z)
+                        if segments is not None:
+                            px, py = x, y
+                            for ax, ay in _arc_points(x, y, cx, cy, r, sweep, motion == 2):
+                                segments.append((px, py, ax, ay, True, diameter))
+                                px, py = ax, ay
+                    if motion != 1:
+                        arc_moves += 1
+                    lo_z, hi_z = min(z, nz), max(z, nz)
+
+                    cut_length += length
+                    cut_moves += 1
+                    section['cut_length'] += length
+                    section['cut_moves'] += 1
+                    if feed > 0:
+                        cut_time += length / feed
+                        section['cut_time'] += length / feed
+                    elif length > 0 and not warnings:
+                        warnings.append(f"Line {line_count}: cutting move with no feed rate set")
+                    boxes = (all_bounds, cut_bounds, section['bounds'])
+
+                # Unrolled min/max: this runs for every move
+                for b in boxes:
+                    if lo_x < b[0]:
+                        b[0] = lo_x
+                    if lo_y < b[1]:
+                        b[1] = lo_y
+                    if lo_z < b[2]:
+                        b[2] = lo_z
+                    if hi_x > b[3]:
+                        b[3] = hi_x
+                    if hi_y > b[4]:
+                        b[4] = hi_y
+                    if hi_z > b[5]:
+                        b[5] = hi_z
+
+                x, y, z = nx, ny, nz
+
+            trailing_newline = data[-1:] == b'\n'
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    # The empty match after a trailing newline is not a line
+    if line_count and trailing_newline:
+        line_count -= 1
+
+    sections.append(section)
+
+    if rapid_rate is None:
+        rapid_rate = DEFAULT_RAPID_RATE[units]
+    rapid_time = rapid_length / rapid_rate
+
+    toolpaths = []
+    listed_only = []
+    for s in sections:
+        if s['cut_moves'] == 0 and s['rapid_moves'] == 0:
+            if s['name'] != '(no toolpath name)':
+                listed_only.append(s['name'])
+            continue
+        toolpaths.append({
+            'name': s['name'],
+            'start_line': s['start_line'],
+            'tool': s['tool'],
+            'cut_length': s['cut_length'],
+            'rapid_length': s['rapid_length'],
+            'cut_moves': s['cut_moves'],
+            'rapid_moves': s['rapid_moves'],
+            'est_time_min': s['cut_time'] + s['rapid_length'] / rapid_rate,
+            'bounds': _bounds_dict(s['bounds']),
+        })
+
+    return {
+        'file': str(gcode_file),
+        'lines': line_count,
+        'units': units,
+        'stock': stock,
+        'bounds': _bounds_dict(all_bounds),
+        'cut_bounds': _bounds_dict(cut_bounds),
+        'cut_length': cut_length,
+        'rapid_length': rapid_length,
+        'cut_moves': cut_moves,
+        'rapid_moves': rapid_moves,
+        'arc_moves': arc_moves,
+        'est_cut_time_min': cut_time,
+        'est_rapid_time_min': rapid_time,
+        'est_total_time_min': cut_time + rapid_time,
+        'rapid_rate': rapid_rate,
+        'feed_rates': sorted(feed_rates),
+        'spindle_speeds': sorted(spindle_speeds),
+        'tool_changes': tool_changes,
+        'toolpaths': toolpaths,
+        'listed_toolpaths_without_moves': listed_only,
+        'warnings': warnings,
+    }
+
+
+def format_minutes(minutes):
+    """Format a duration in minutes as h:mm:ss"""
+    seconds = int(round(minutes * 60))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def print_report(report):
+    """Print a human-readable summary of analyze_gcode() output"""
+    u = report['units']
+    print(f"\n=== G-Code Analysis: {report['file']} ===")
+    print(f"Lines: {report['lines']}    Units: {u}")
+
+    for label, key in (('Overall bounds', 'bounds'), ('Cutting bounds', 'cut_bounds')):
+        b = report[key]
+        if b:
+            size = [b['max'][i] - b['min'][i] for i in range(3)]
+            print(f"{label}: X {b['min'][0]:.4f} .. {b['max'][0]:.4f}  "
+                  f"Y {b['min'][1]:.4f} .. {b['max'][1]:.4f}  "
+                  f"Z {b['min'][2]:.4f} .. {b['max'][2]:.4f}  "
+                  f"({size[0]:.3f} x {size[1]:.3f} x {size[2]:.3f} {u})")
+
+    print(f"Cut length: {report['cut_length']:.2f} {u} in {report['cut_moves']} moves"
+          f"{' (' + str(report['arc_moves']) + ' arcs)' if report['arc_moves'] else ''}")
+    print(f"Rapid length: {report['rapid_length']:.2f} {u} in {report['rapid_moves']} moves")
+    print(f"Estimated time: {format_minutes(report['est_total_time_min'])} "
+          f"(cutting {format_minutes(report['est_cut_time_min'])}, "
+          f"rapids {format_minutes(report['est_rapid_time_min'])} at {report['rapid_rate']:.0f} {u}/min)")
+    if report['feed_rates']:
+        print(f"Feed rates: {', '.join(f'{f:g}' for f in report['feed_rates'])} {u}/min")
+    if report['spindle_speeds']:
+        print(f"Spindle speeds: {', '.join(f'{s:g}' for s in report['spindle_speeds'])} RPM")
+
+    if report['tool_changes']:
+        print("\nTool changes:")
+        for change in report['tool_changes']:
+            dia = f"  diameter {change['diameter']:g} {u}" if change['diameter'] is not None else ''
+            print(f"  Line {change['line']}: T{change['tool']}{dia}")
+
+    if report['toolpaths']:
+        print("\nToolpaths:")
+        name_width = max(len(t['name']) for t in report['toolpaths'])
+        for t in report['toolpaths']:
+            tool = f"T{t['tool']}" if t['tool'] is not None else '-'
+            print(f"  {t['name']:<{name_width}}  {tool:>5}  "
+                  f"cut {t['cut_length']:10.2f}  rapid {t['rapid_length']:9.2f}  "
+                  f"{format_minutes(t['est_time_min'])}")
+
+    if report['listed_toolpaths_without_moves']:
+        print(f"\nListed without moves: {', '.join(report['listed_toolpaths_without_moves'])}")
+
+    for warning in report['warnings']:
+        print(f"Warning: {warning}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze G-Code files: bounds, lengths, time, tools and toolpaths')
+    parser.add_argument('input_files', nargs='+', help='G-Code files (.nc, .gcode)')
+    parser.add_argument('--json', metavar='FILE',
+                       help='Write the analysis as JSON (use - for stdout)')
+    parser.add_argument('--rapid-rate', type=float,
+                       help='Rapid rate for time estimates in units/min (default: 5000 mm or 200 inch)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='No text report')
+
+    args = parser.parse_args()
+
+    reports = []
+    for name in args.input_files:
+        input_path = Path(name)
+        if not input_path.exists():
+            print(f"Error: File not found: {input_path}")
+            sys.exit(1)
+        report = analyze_gcode(input_path, rapid_rate=args.rapid_rate)
+        reports.append(report)
+        if not args.quiet and args.json != '-':
+            print_report(report)
+
+    if args.json:
+        output = reports[0] if len(reports) == 1 else reports
+        if args.json == '-':
+            json.dump(output, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, 'w') as f:
+                json.dump(output, f, indent=2)
+            print(f"\nJSON saved to: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+G-Code Optimizer
+Post-processes existing G-Code programs (ours or Carbide Create's) to cut
+wasted time: reorders independent cutting segments to shorten rapid
+travel, merges collinear G1 moves and rewrites the program in compact
+modal form.
+
+Tool changes, spindle commands, toolpath comments and every other
+non-motion line are kept verbatim and in place; segments are only
+reordered between them.
+"""
+
+import sys
+import math
+import argparse
+from pathlib import Path
+import numpy as np
+
+from gcode_analyzer import WORD_RE, LETTERS, TOOLPATH_RE, SECTION_RE, analyze_gcode
+
+
+MOTION_WORDS = set('XYZIJKRF')
+
+
+class Segment:
+    """
+    One cutting segment: the moves from leaving the clearance height to
+    returning above the stock, plus the comments that preceded it.
+    """
+
+    def __init__(self, entry, entry_z):
+        self.entry = entry          # (x, y) where the tool goes down
+        self.entry_z = entry_z      # Z the tool is at before going down
+        self.moves = []             # (motion, x, y, z, feed, arc_words)
+        self.comments = []
+
+    @property
+    def exit(self):
+        motion, x, y, z, feed, arc = self.moves[-1]
+        return (x, y)
+
+    def bounds(self):
+        xs = [self.entry[0]] + [m[1] for m in self.moves]
+        ys = [self.entry[1]] + [m[2] for m in self.moves]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+
+class Group:
+    """Segments between two barrier lines (tool change, spindle, toolpath name ...)"""
+
+    def __init__(self):
+        self.items = []              # Segment objects, or ('up', move) travel moves
+        self.start = None            # (x, y) at the start of the group
+        self.clearance = None        # highest Z seen in travel
+
+    def segments(self):
+        return [item for item in self.items if isinstance(item, Segment)]
+
+
+def parse_program(lines, surface_z=0.0):
+    """
+    Split a program into verbatim barrier lines and groups of segments.
+
+    Args:
+        lines: Program lines
+        surface_z: Z at or below which the tool is considered in the stock
+
+    Returns:
+        List of ('line', text) and ('group', Group) items, in program order
+    """
+    program = []
+    group = None
+    segment = None
+    pending_comments = []
+
+    motion = 0
+    feed = None
+    x = y = None
+    z = None  # unknown until the program sets it (or after G53)
+
+    def flush_group():
+        nonlocal group, segment
+        if group is not None:
+            if segment is not None:
+                group.items.append(segment)
+            program.append(('group', group))
+        group = None
+        segment = None
+
+    for raw in lines:
+        text = raw.strip()
+        if not text:
+            continue
+
+        words = {}
+        g_codes = []
+        other = False
+        named = False
+        has_comment = False
+        for t in WORD_RE.finditer(text.encode('ascii', 'replace')):
+            kind = t.lastindex
+            if kind == 4:
+                letter = LETTERS[t.group(3)]
+                value = float(t.group(4))
+                if letter == 'G':
+                    g_codes.append(value)
+                    if value not in (0, 1, 2, 3):
+                        other = True
+                else:
+                    words[letter] = value
+                    if letter not in MOTION_WORDS:
+                        other = True
+            else:
+                has_comment = True
+                comment = (t.group(1) or b'').decode('ascii', 'replace').strip()
+                if kind == 1 and (TOOLPATH_RE.match(comment) or SECTION_RE.match(comment)):
+                    named = True
+
+        is_move = not other and not named and any(a in words for a in 'XYZ')
+        comment_only = has_comment and not words and not g_codes and not named
+
+        if comment_only:
+            pending_comments.append(text)
+            continue
+
+        if not is_move:
+            # Barrier: keep verbatim, in place
+            flush_group()
+            for comment in pending_comments:
+                program.append(('line', comment))
+            pending_comments = []
+            program.append(('line', text))
+
+            if 91 in g_codes:
+                raise ValueError("Incremental (G91) programs are not supported")
+            for g in g_codes:
+                if g in (0, 1, 2, 3):
+                    motion = int(g)
+            if 'F' in words:
+                feed = words['F']
+            if 53 in g_codes:
+                # Machine-coordinate move: work position unknown on these axes
+                if 'X' in words:
+                    x = None
+                if 'Y' in words:
+                    y = None
+                if 'Z' in words:
+                    z = None
+            elif any(a in words for a in 'XYZ'):
+                x = words.get('X', x)
+                y = words.get('Y', y)
+                z = words.get('Z', z)
+            continue
+
+        # Motion line
+        for g in g_codes:
+            motion = int(g)
+        if 'F' in words:
+            feed = words['F']
+        nx = words.get('X', x)
+        ny = words.get('Y', y)
+        nz = words.get('Z', z)
+        arc = None
+        if motion in (2, 3):
+            arc = {k: words[k] for k in 'IJKR' if k in words}
+
+        if group is None:
+            group = Group()
+            group.start = (x, y)
+
+        down = nz is not None and nz <= surface_z
+        if segment is None and down:
+            segment = Segment((x, y), z)
+            segment.comments = pending_comments
+            pending_comments = []
+
+        if segment is not None:
+            segment.moves.append((motion, nx, ny, nz, feed, arc))
+            if not down:
+                group.items.append(segment)
+                segment = None
+        else:
+            group.items.append(('up', (motion, nx, ny, nz, feed, arc)))
+            if nz is not None:
+                group.clearance = nz if group.clearance is None else max(group.clearance, nz)
+
+        x, y, z = nx, ny, nz
+
+    flush_group()
+    for comment in pending_comments:
+        program.append(('line', comment))
+    return program
+
+
+def _travel(start, segments):
+    """Total XY travel visiting segments in the given order"""
+    total = 0.0
+    pos = start
+    for seg in segments:
+        if pos[0] is not None and seg.entry[0] is not None:
+            total += math.hypot(seg.entry[0] - pos[0], seg.entry[1] - pos[1])
+        pos = seg.exit
+    return total
+
+
+def order_segments(start, segments, margin=0.0):
+    """
+    Reorder segments with a nearest-neighbour tour that respects overlap.
+
+    Segments whose XY bounds (grown by margin) overlap keep their original
+    relative order, so a deeper pass never runs before the shallower pass
+    over the same spot; only independent segments are moved.
+
+    Args:
+        start: (x, y) tool position before the first segment
+        segments: Segments in original order
+        margin: Extra clearance around each segment's bounds
+
+    Returns:
+        Segments in the new order
+    """
+    n = len(segments)
+    if n < 3 or any(s.entry[0] is None for s in segments):
+        return list(segments)
+
+    b = np.array([s.bounds() for s in segments])
+    lo_x, lo_y, hi_x, hi_y = b[:, 0] - margin, b[:, 1] - margin, b[:, 2] + margin, b[:, 3] + margin
+    overlap = ((lo_x[:, None] <= hi_x[None, :]) & (lo_x[None, :] <= hi_x[:, None]) &
+               (lo_y[:, None] <= hi_y[None, :]) & (lo_y[None, :] <= hi_y[:, None]))
+    # Segment j must wait for every earlier overlapping segment i
+    must_precede = np.triu(overlap, k=1)
+    waiting = must_precede.sum(axis=0)
+
+    entries = np.array([s.entry for s in segments], dtype=float)
+    exits = np.array([s.exit for s in segments], dtype=float)
+    done = np.zeros(n, dtype=bool)
+
+    order = []
+    pos = np.array(start if start[0] is not None else entries[0], dtype=float)
+    for _ in range(n):
+        ready = np.flatnonzero((waiting == 0) & ~done)
+        dist = np.hypot(entries[ready, 0] - pos[0], entries[ready, 1] - pos[1])
+        pick = ready[np.argmin(dist)]
+        order.append(pick)
+        done[pick] = True
+        waiting -= must_precede[pick]
+        pos = exits[pick]
+
+    return [segments[i] for i in order]
+
+
+def _on_segment(points, a, c, tolerance):
+    """True if all points lie within tolerance of segment a-c, in order"""
+    ax, ay, az = a
+    dx, dy, dz = c[0] - ax, c[1] - ay, c[2] - az
+    length_sq = dx * dx + dy * dy + dz * dz
+    if length_sq == 0:
+        return False
+    last_t = 0.0
+    tol_sq = tolerance * tolerance
+    for px, py, pz in points:
+        px, py, pz = px - ax, py - ay, pz - az
+        t = (px * dx + py * dy + pz * dz) / length_sq
+        if t < last_t or t > 1.0:
+            return False
+        ex, ey, ez = px - t * dx, py - t * dy, pz - t * dz
+        if ex * ex + ey * ey + ez * ez > tol_sq:
+            return False
+        last_t = t
+    return True
+
+
+def merge_collinear(moves, tolerance):
+    """
+    Merge runs of G1 moves that lie on one straight line.
+
+    A run is collapsed to its end point as long as every dropped point is
+    within tolerance of the straight move and the feed rate is unchanged.
+
+    Returns:
+        (merged moves, number of moves removed)
+    """
+    if len(moves) < 2:
+        return list(moves), 0
+
+    result = [moves[0]]
+    removed = 0
+    anchor = None   # start point of the move being extended
+    dropped = []    # points folded into the current move
+
+    for move in moves[1:]:
+        last = result[-1]
+        if (anchor is not None and move[0] == 1 and last[0] == 1 and
+                move[5] is None and last[5] is None and move[4] == last[4] and
+                None not in move[1:4]):
+            candidates = dropped + [last[1:4]]
+            if _on_segment(candidates, anchor, move[1:4], tolerance):
+                dropped = candidates
+                result[-1] = move
+                removed += 1
+                continue
+
+        anchor = last[1:4] if None not in last[1:4] else None
+        dropped = []
+        result.append(move)
+
+    return result, removed
+
+
+class ModalWriter:
+    """Writes moves in compact modal form (only words that change)"""
+
+    def __init__(self, decimals=4):
+        self.decimals = decimals
+        self.lines = []
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget modal state, e.g. after a verbatim line"""
+        self.motion = None
+        self.pos = [None, None, None]
+        self.feed = None
+
+    def fmt(self, value):
+        return f"{value:.{self.decimals}f}"
+
+    def verbatim(self, text):
+        self.lines.append(text)
+        self.invalidate()
+
+    def move(self, motion, x, y, z, feed=None, arc=None):
+        parts = []
+        if motion != self.motion:
+            parts.append(f"G{motion}")
+        axes = []
+        for i, (axis, value) in enumerate(zip('XYZ', (x, y, z))):
+            if value is None:
+                continue
+            text = self.fmt(value)
+            if text != self.pos[i] or arc is not None:
+                axes.append(f"{axis}{text}")
+                self.pos[i] = text
+        if not axes and arc is None:
+            return  # already there
+        parts += axes
+        if arc:
+            parts += [f"{k}{self.fmt(v)}" for k, v in arc.items()]
+        if motion != 0 and feed is not None and feed != self.feed:
+            parts.append(f"F{feed:g}")
+            self.feed = feed
+        self.motion = motion
+        self.lines.append(''.join(parts))
+
+
+def optimize_program(lines, reorder=True, merge=True, tolerance=None, decimals=4, surface_z=0.0):
+    """
+    Optimize a G-Code program.
+
+    Args:
+        lines: Program lines
+        reorder: Reorder independent segments to shorten travel
+        merge: Merge collinear G1 moves
+        tolerance: Collinearity tolerance (default: half the last output digit)
+        decimals: Decimal places for rewritten coordinates
+        surface_z: Z at or below which the tool is in the stock
+
+    Returns:
+        (output lines, stats dictionary)
+    """
+    if tolerance is None:
+        tolerance = 0.5 * 10 ** -decimals
+
+    program = parse_program(lines, surface_z)
+    writer = ModalWriter(decimals)
+    stats = {'segments': 0, 'groups': 0, 'travel_before': 0.0, 'travel_after': 0.0, 'merged_moves': 0}
+
+    for kind, item in program:
+        if kind == 'line':
+            writer.verbatim(item)
+            continue
+
+        group = item
+        stats['groups'] += 1
+        segments = group.segments()
+        stats['segments'] += len(segments)
+        trailing = []
+        for entry in reversed(group.items):
+            if isinstance(entry, Segment):
+                break
+            trailing.insert(0, entry[1])
+
+        if not segments:
+            for motion, x, y, z, feed, arc in trailing:
+                writer.move(motion, x, y, z, feed, arc)
+            continue
+
+        ordered = order_segments(group.start, segments) if reorder else segments
+        before = _travel(group.start, segments)
+        after = _travel(group.start, ordered)
+        if after >= before:
+            ordered, after = segments, before
+        stats['travel_before'] += before
+        stats['travel_after'] += after
+
+        clearance = group.clearance
+        if clearance is None:
+            clearance = max((s.moves[-1][3] for s in segments if s.moves[-1][3] is not None), default=None)
+
+        for seg in ordered:
+            for comment in seg.comments:
+                writer.lines.append(comment)
+            current_z = writer.pos[2]
+            if current_z is None:
+                # Height unknown (after G53) - travel first, as the original did,
+                # then come down to a known height
+                writer.move(0, seg.entry[0], seg.entry[1], None)
+                writer.move(0, None, None, clearance if clearance is not None else seg.entry_z)
+            elif clearance is not None and float(current_z) < clearance:
+                writer.move(0, None, None, clearance)
+            writer.move(0, seg.entry[0], seg.entry[1], None)
+            if seg.entry_z is not None and clearance is not None and seg.entry_z < clearance:
+                writer.move(0, None, None, seg.entry_z)
+
+            moves = seg.moves
+            if merge:
+                moves, removed = merge_collinear(moves, tolerance)
+                stats['merged_moves'] += removed
+            for motion, x, y, z, feed, arc in moves:
+                writer.move(motion, x, y, z, feed, arc)
+
+        # Leave the group where the original program did
+        if trailing:
+            current_z = writer.pos[2]
+            if clearance is not None and (current_z is None or float(current_z) < clearance):
+                writer.move(0, None, None, clearance)
+            for motion, x, y, z, feed, arc in trailing:
+                writer.move(motion, x, y, z, feed, arc)
+
+    return writer.lines, stats
+
+
+def detect_decimals(lines, limit=2000):
+    """Most decimal places used by coordinates in the first lines of a program"""
+    best = 0
+    for raw in lines[:limit]:
+        for t in WORD_RE.finditer(raw.encode('ascii', 'replace')):
+            if t.lastindex == 4 and t.group(3) in b'XYZxyz' and b'.' in t.group(4):
+                best = max(best, len(t.group(4).split(b'.')[1]))
+    return min(max(best, 3), 6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Optimize an existing G-Code program: shorter travel, fewer lines')
+    parser.add_argument('input_file', help='G-Code file (.nc, .gcode)')
+    parser.add_argument('-o', '--output', help='Output file (default: <input>_optimized.nc)')
+    parser.add_argument('--no-reorder', action='store_true', help='Keep the original segment order')
+    parser.add_argument('--no-merge', action='store_true', help='Do not merge collinear moves')
+    parser.add_argument('--tolerance', type=float,
+                       help='Collinear merge tolerance in program units (default: half the last decimal)')
+    parser.add_argument('--surface-z', type=float, default=0.0,
+                       help='Z of the stock top; moves at or below it are cutting (default: 0)')
+    parser.add_argument('--verify', action='store_true',
+                       help='Analyze both programs and compare cut length, bounds and tool changes')
+
+    args = parser.parse_args()
+
+    input_path = Path(args.input_file)
+    if not input_path.exists():
+        print(f"Error: File not found: {input_path}")
+        sys.exit(1)
+
+    output_path = Path(args.output) if args.output else input_path.with_name(f"{input_path.stem}_optimized.nc")
+
+    lines = input_path.read_text(errors='replace').splitlines()
+    decimals = detect_decimals(lines)
+
+    try:
+        output_lines, stats = optimize_program(
+            lines,
+            reorder=not args.no_reorder,
+            merge=not args.no_merge,
+            tolerance=args.tolerance,
+            decimals=decimals,
+            surface_z=args.surface_z
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    with open(output_path, 'w') as f:
+        f.write('\n'.join(output_lines) + '\n')
+
+    print("\n=== Optimization Summary ===")
+    print(f"Input: {input_path} ({len(lines)} lines)")
+    print(f"Output: {output_path} ({len(output_lines)} lines, "
+          f"{100.0 * (len(lines) - len(output_lines)) / max(len(lines), 1):.0f}% fewer)")
+    print(f"Segments: {stats['segments']} in {stats['groups']} groups")
+    saved = stats['travel_before'] - stats['travel_after']
+    print(f"Travel between segments: {stats['travel_before']:.2f} -> {stats['travel_after']:.2f} "
+          f"({saved:.2f} shorter)")
+    print(f"Collinear moves merged: {stats['merged_moves']}")
+
+    if args.verify:
+        before = analyze_gcode(input_path)
+        after = analyze_gcode(output_path)
+        print("\n=== Verification ===")
+        print(f"Cut length: {before['cut_length']:.4f} -> {after['cut_length']:.4f}")
+        print(f"Rapid length: {before['rapid_length']:.4f} -> {after['rapid_length']:.4f}")
+        print(f"Est. time: {before['est_total_time_min']:.2f} -> {after['est_total_time_min']:.2f} min")
+        same_tools = [t['tool'] for t in before['tool_changes']] == [t['tool'] for t in after['tool_changes']]
+        same_bounds = before['cut_bounds'] == after['cut_bounds'] or (
+            before['cut_bounds'] and after['cut_bounds'] and
+            np.allclose(before['cut_bounds']['min'] + before['cut_bounds']['max'],
+                        after['cut_bounds']['min'] + after['cut_bounds']['max'], atol=10 ** -decimals))
+        length_ok = abs(before['cut_length'] - after['cut_length']) <= max(1e-6, 1e-4 * before['cut_length'])
+        print(f"Tool changes identical: {'yes' if same_tools else 'NO'}")
+        print(f"Cutting bounds identical: {'yes' if same_bounds else 'NO'}")
+        print(f"Cut length preserved: {'yes' if length_ok else 'NO'}")
+        if not (same_tools and same_bounds and length_ok):
+            sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
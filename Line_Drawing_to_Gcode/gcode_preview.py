@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Toolpath Preview
+Renders G-Code programs (or the paths of any drawing the converter reads)
+to a PNG: cutting moves in blue at the width of the tool, rapids as thin
+red lines on top.
+
+All segments are packed into one NumPy array and drawn without a Python
+loop per line: points are sampled along every segment at once and set in a
+boolean mask per line width, which is then thickened with a handful of
+shifted ORs. A 100k-line program renders in a fraction of a second, so
+thumbnails for a whole library can be made in one go.
+
+Usage:
+    python gcode_preview.py program.nc
+    python gcode_preview.py *.nc --output-dir previews --size 512
+    python gcode_preview.py drawing.svg --tool-diameter 3.175
+"""
+
+import sys
+import re
+import zlib
+import struct
+import argparse
+from pathlib import Path
+import numpy as np
+
+
+BACKGROUND = (255, 255, 255)
+CUT_COLOR = (40, 90, 200)
+RAPID_COLOR = (230, 60, 60)
+
+MARGIN = 8
+
+# "; Tool diameter: 3.175 mm" in the header written by GCodeGenerator
+HEADER_TOOL_RE = re.compile(rb';\s*Tool diameter:\s*([\d.]+)')
+
+
+def write_png(image, output_file):
+    """Write an HxWx3 uint8 array as an RGB PNG (no imaging library needed)"""
+    height, width, _ = image.shape
+    raw = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 0] = 0  # filter type None for every row
+    raw[:, 1:] = image.reshape(height, -1)
+
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data +
+                struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    with open(output_file, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+def draw_segments(mask, segments):
+    """
+    Set every pixel under a batch of line segments in a boolean mask
+
+    Args:
+        mask: HxW boolean array
+        segments: Nx4 array of (x0, y0, x1, y1) in pixel coordinates
+    """
+    if len(segments) == 0:
+        return
+    p0 = segments[:, :2]
+    d = segments[:, 2:] - p0
+    # Two samples per pixel of length keeps diagonal lines unbroken
+    counts = (np.ceil(np.abs(d).max(axis=1) * 2).astype(np.int64) + 1)
+    seg_id = np.repeat(np.arange(len(segments)), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    t = (np.arange(len(seg_id)) - starts) / np.maximum(counts[seg_id] - 1, 1)
+    points = np.rint(p0[seg_id] + d[seg_id] * t[:, None]).astype(np.int64)
+
+    height, width = mask.shape
+    inside = (points[:, 0] >= 0) & (points[:, 0] < width) & (points[:, 1] >= 0) & (points[:, 1] < height)
+    mask[points[inside, 1], points[inside, 0]] = True
+
+
+def dilate(mask, radius):
+    """Thicken a mask with a disc of the given pixel radius using shifted ORs"""
+    if radius <= 0:
+        return mask
+    height, width = mask.shape
+    out = mask.copy()
+    for dy in range(-radius, radius + 1):
+        dx_max = int(np.sqrt(radius * radius - dy * dy))
+        for dx in range(-dx_max, dx_max + 1):
+            if dx == 0 and dy == 0:
+                continue
+            ys, yd = (slice(0, height - dy), slice(dy, height)) if dy >= 0 else (slice(-dy, height), slice(0, height + dy))
+            xs, xd = (slice(0, width - dx), slice(dx, width)) if dx >= 0 else (slice(-dx, width), slice(0, width + dx))
+            out[yd, xd] |= mask[ys, xs]
+    return out
+
+
+def rasterize(segments, size=1024, default_diameter=None, show_rapids=True, y_up=True):
+    """
+    Render packed toolpath segments to an RGB image
+
+    Args:
+        segments: Nx6 array of (x0, y0, x1, y1, is_cut, tool_diameter);
+                  tool_diameter may be NaN where it is unknown
+        size: Pixel size of the longer side of the drawing
+        default_diameter: Cut width where the segment's is unknown
+                          (None draws those cuts one pixel wide)
+        show_rapids: Draw rapid moves
+        y_up: Coordinates are machine style (Y up); False for image style
+
+    Returns:
+        HxWx3 uint8 array
+    """
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 6)
+    cut = segments[:, 4] > 0
+    shown = segments if show_rapids else segments[cut]
+    if len(shown) == 0:
+        return np.full((2 * MARGIN + 1, 2 * MARGIN + 1, 3), BACKGROUND, dtype=np.uint8)
+
+    # Fit the cuts (or everything, if there are none) into the image
+    fit = segments[cut] if cut.any() else shown
+    xy = fit[:, :4].reshape(-1, 2)
+    low, high = xy.min(axis=0), xy.max(axis=0)
+    diameters = np.where(np.isnan(segments[:, 5]), default_diameter or 0.0, segments[:, 5])
+    pad = float(diameters[cut].max()) / 2 if cut.any() else 0.0
+    low, high = low - pad, high + pad
+    span = float((high - low).max()) or 1.0
+    scale = (size - 1) / span
+    width = int(np.ceil((high[0] - low[0]) * scale)) + 1 + 2 * MARGIN
+    height = int(np.ceil((high[1] - low[1]) * scale)) + 1 + 2 * MARGIN
+
+    pixels = (segments[:, :4].reshape(-1, 2) - low) * scale + MARGIN
+    if y_up:
+        pixels[:, 1] = height - 1 - pixels[:, 1]
+    pixels = pixels.reshape(-1, 4)
+
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = BACKGROUND
+
+    # Cuts grouped by pixel radius, so each width is dilated once
+    radii = np.rint(diameters * scale / 2).astype(np.int64)
+    for radius in np.unique(radii[cut]):
+        mask = np.zeros((height, width), dtype=bool)
+        draw_segments(mask, pixels[cut & (radii == radius)])
+        image[dilate(mask, int(radius))] = CUT_COLOR
+
+    if show_rapids and (~cut).any():
+        mask = np.zeros((height, width), dtype=bool)
+        draw_segments(mask, pixels[~cut])
+        image[mask] = RAPID_COLOR
+
+    return image
+
+
+def gcode_segments(gcode_file):
+    """
+    Packed segments of a G-Code program
+
+    Tool widths come from Carbide Create's (TOOL/MILL,...) comments; for
+    programs from this converter the "; Tool diameter:" header is used.
+
+    Returns:
+        segments: Nx6 array (see rasterize)
+        report: The analyze_gcode() summary
+    """
+    from gcode_analyzer import analyze_gcode
+
+    rows = []
+    report = analyze_gcode(gcode_file, segments=rows)
+    segments = np.array(rows, dtype=np.float64).reshape(-1, 6)
+
+    with open(gcode_file, 'rb') as f:
+        header = HEADER_TOOL_RE.search(f.read(4096))
+    if header:
+        unknown = np.isnan(segments[:, 5])
+        segments[unknown, 5] = float(header.group(1))
+    return segments, report
+
+
+def path_segments(paths):
+    """
+    Packed segments of a list of paths: each path is cut, and rapids join
+    the end of one path to the start of the next (as the G-Code would)
+
+    Returns:
+        Nx6 array (see rasterize) with NaN tool diameters
+    """
+    pieces = []
+    previous_end = None
+    for path in paths:
+        p = np.asarray(path, dtype=np.float64)
+        if len(p) < 2:
+            continue
+        if previous_end is not None:
+            pieces.append(np.array([[*previous_end, *p[0], 0.0, np.nan]]))
+        block = np.empty((len(p) - 1, 6))
+        block[:, :2], block[:, 2:4] = p[:-1], p[1:]
+        block[:, 4], block[:, 5] = 1.0, np.nan
+        pieces.append(block)
+        previous_end = p[-1]
+    return np.vstack(pieces) if pieces else np.empty((0, 6))
+
+
+def render_paths(paths, output_file, size=1024, tool_diameter=None, show_rapids=True, y_up=True):
+    """
+    Write a PNG preview of a list of paths
+
+    Args:
+        paths: List of paths (lists of (x, y) points)
+        output_file: Output PNG path
+        size: Pixel size of the longer side of the drawing
+        tool_diameter: Cut width in path units (None for one-pixel lines)
+        show_rapids: Draw the moves between paths
+        y_up: Paths are in machine coordinates (Y up)
+    """
+    image = rasterize(path_segments(paths), size, tool_diameter, show_rapids, y_up)
+    write_png(image, output_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render G-Code or drawing toolpaths to PNG previews')
+    parser.add_argument('input_files', nargs='+',
+                       help='G-Code (.nc, .gcode, .ngc) or any drawing the converter reads (.svg, .dxf, .c2d, .npz)')
+    parser.add_argument('-o', '--output', help='Output PNG (single input only; default: <name>_preview.png)')
+    parser.add_argument('--output-dir', help='Folder for the previews (default: next to each input)')
+    parser.add_argument('--size', type=int, default=1024, help='Longer side of the drawing in pixels (default: 1024)')
+    parser.add_argument('--tool-diameter', type=float,
+                       help='Cut width where the program does not say (default: from the file, else 1 pixel)')
+    parser.add_argument('--no-rapids', action='store_true', help='Leave out rapid moves')
+
+    args = parser.parse_args()
+    if args.output and len(args.input_files) > 1:
+        print("Error: --output needs a single input file; use --output-dir for several")
+        sys.exit(1)
+    if args.output_dir:
+        Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+
+    import time
+    for name in args.input_files:
+        input_path = Path(name)
+        if not input_path.exists():
+            print(f"Error: File not found: {input_path}")
+            continue
+        if args.output:
+            output_file = Path(args.output)
+        else:
+            folder = Path(args.output_dir) if args.output_dir else input_path.parent
+            output_file = folder / f"{input_path.stem}_preview.png"
+
+        start = time.perf_counter()
+        ext = input_path.suffix.lower()
+        if ext in ('.nc', '.gcode', '.ngc', '.tap'):
+            segments, report = gcode_segments(input_path)
+            y_up = True
+            detail = f"{report['lines']} lines"
+        else:
+            from line_to_gcode_multiformat import SVGProcessor, DXFProcessor, C2DProcessor, ToolpathFile
+            loaders = {'.svg': SVGProcessor.load_and_process, '.dxf': DXFProcessor.load_and_process,
+                       '.c2d': C2DProcessor.load_and_process}
+            if ext == '.npz':
+                paths, _, _, meta = ToolpathFile.load(input_path)
+                y_up = meta['y_up']
+            elif ext in loaders:
+                paths = loaders[ext](input_path)[0]
+                y_up = False
+            else:
+                print(f"Error: Unsupported file type: {ext}")
+                continue
+            segments = path_segments(paths)
+            detail = f"{len(paths)} paths"
+        parsed = time.perf_counter()
+
+        image = rasterize(segments, args.size, args.tool_diameter, not args.no_rapids, y_up)
+        write_png(image, output_file)
+        done = time.perf_counter()
+        print(f"{output_file}: {image.shape[1]}x{image.shape[0]} from {detail} "
+              f"({len(segments)} segments, read {parsed - start:.2f}s, render {done - parsed:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
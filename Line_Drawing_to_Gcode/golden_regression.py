@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Golden-output regression check
+
+Re-converts the drawings that ship with their G-Code (heart.jpg ->
+Heart.nc, grapes2.png -> grapes2.nc, the test_*.png files, ...) with the
+parameters recorded in golden_cases.json, and compares the new G-Code
+with the shipped program geometrically rather than line by line: the cut
+moves of both are sampled densely, and the Hausdorff distance between
+them (how far the furthest point of one is from the other) and the total
+cut length must stay within each case's tolerance. Path order, point
+count and number formatting may change freely, so optimizations that
+keep the result are not flagged. A case's max_missing, when set, loosens
+only the golden-to-new direction, for a golden cut known to be dropped
+on purpose; cut_length_change is the cut length change such a case is
+expected to show, and the tolerance applies around it.
+
+Each case's conversion time (and its per-stage statistics in --json) is
+recorded too, so a speed-up can be checked not to have changed the cut.
+
+Usage:
+    python golden_regression.py
+    python golden_regression.py --cases heart grapes2 --json golden_report.json
+    python golden_regression.py --keep golden_out
+"""
+
+import sys
+import io
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+import numpy as np
+
+from gcode_analyzer import analyze_gcode
+from line_to_gcode_multiformat import build_parser, build_pipeline, Drawing, HAS_SCIPY
+
+
+CASES_FILE = Path(__file__).with_name('golden_cases.json')
+
+
+def cut_points(gcode_file, step):
+    """
+    Points every step units along the cutting moves of a G-Code program
+
+    Returns:
+        (points, cut_length, report) - Nx2 array, total cut length and the
+        analyze_gcode() summary
+    """
+    rows = []
+    report = analyze_gcode(gcode_file, segments=rows)
+    segments = np.array([row[:4] for row in rows if row[4]], dtype=np.float64).reshape(-1, 4)
+    if len(segments) == 0:
+        return np.empty((0, 2)), 0.0, report
+
+    p0, d = segments[:, :2], segments[:, 2:] - segments[:, :2]
+    lengths = np.hypot(d[:, 0], d[:, 1])
+    counts = np.ceil(lengths / step).astype(np.int64) + 1
+    seg_id = np.repeat(np.arange(len(segments)), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    t = (np.arange(len(seg_id)) - starts) / np.maximum(counts[seg_id] - 1, 1)
+    return p0[seg_id] + d[seg_id] * t[:, None], float(lengths.sum()), report
+
+
+def nearest_distances(points, targets):
+    """Distance from each point to the closest of targets"""
+    if HAS_SCIPY:
+        from scipy.spatial import cKDTree
+        return cKDTree(targets).query(points)[0]
+    distances = np.empty(len(points))
+    for start in range(0, len(points), 512):
+        chunk = points[start:start + 512]
+        d2 = ((chunk[:, None, :] - targets[None, :, :]) ** 2).sum(axis=2)
+        distances[start:start + 512] = np.sqrt(d2.min(axis=1))
+    return distances
+
+
+def convert_case(case, folder, output_dir):
+    """
+    Convert a case's input with its recorded options and parameters
+
+    The material size is applied as given, like answering the prompts,
+    so drawings are stretched to it the way the shipped programs were.
+
+    Returns:
+        (G-Code file, seconds, per-stage statistics)
+    """
+    args = build_parser().parse_args([str(folder / case['input'])] + case['options'])
+    output_base = Path(case['input']).stem
+    pipeline = build_pipeline(args, ('nc',), output_dir, output_base)
+    drawing = Drawing(args.input_files[0])
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(drawing, stop='transform')
+        params = dict(case['params'], filename=drawing.source.name)
+        drawing.params = params
+        drawing.target_size = (params['material_width'], params['material_height'])
+        drawing.units = params['units']
+        pipeline.run(drawing, start='transform')
+    seconds = time.perf_counter() - start
+    return Path(output_dir) / f"{output_base}.nc", seconds, drawing.stats
+
+
+def check_case(name, case, folder, output_dir):
+    """Convert one case and compare it with its golden program"""
+    output_file, seconds, stats = convert_case(case, folder, output_dir)
+
+    # Sample finely enough that spacing does not eat into the tolerance
+    step = case['max_hausdorff'] / 4
+    golden, golden_length, golden_report = cut_points(folder / case['golden'], step)
+    output, output_length, output_report = cut_points(output_file, step)
+
+    to_golden = float(nearest_distances(output, golden).max()) if len(output) and len(golden) else float('inf')
+    to_output = float(nearest_distances(golden, output).max()) if len(output) and len(golden) else float('inf')
+    hausdorff = max(to_golden, to_output)
+    length_change = (output_length - golden_length) / golden_length if golden_length else 0.0
+
+    failures = []
+    if to_golden > case['max_hausdorff']:
+        failures.append(f"new cut {to_golden:.4f} from the golden one > {case['max_hausdorff']}")
+    max_missing = case.get('max_missing', case['max_hausdorff'])
+    if to_output > max_missing:
+        failures.append(f"golden cut {to_output:.4f} from the new one > {max_missing}")
+    expected_change = case.get('cut_length_change', 0.0)
+    tolerance = case.get('cut_length_tolerance')
+    if tolerance is not None and abs(length_change - expected_change) > tolerance:
+        failures.append(f"cut length {length_change:+.1%} (allowed {expected_change:+.1%} +/-{tolerance:.0%})")
+
+    return {
+        'case': name,
+        'ok': not failures,
+        'failures': failures,
+        'units': golden_report['units'],
+        'hausdorff': hausdorff,
+        'output_to_golden': to_golden,
+        'golden_to_output': to_output,
+        'cut_length': output_length,
+        'golden_cut_length': golden_length,
+        'cut_length_change': length_change,
+        'lines': output_report['lines'],
+        'golden_lines': golden_report['lines'],
+        'seconds': seconds,
+        'stages': stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-convert the repo's drawings and compare with their G-Code")
+    parser.add_argument('--cases', nargs='+', help='Cases to run (default: all in golden_cases.json)')
+    parser.add_argument('--cases-file', default=str(CASES_FILE), help='Case list (default: golden_cases.json)')
+    parser.add_argument('--json', metavar='FILE', help='Write every result, with per-stage statistics, to FILE')
+    parser.add_argument('--keep', metavar='DIR', help='Keep the regenerated G-Code in DIR')
+    args = parser.parse_args()
+
+    cases_file = Path(args.cases_file)
+    with open(cases_file) as f:
+        cases = json.load(f)
+    if args.cases:
+        unknown = set(args.cases) - set(cases)
+        if unknown:
+            print(f"Error: Unknown case(s): {', '.join(sorted(unknown))} (cases: {', '.join(cases)})")
+            sys.exit(1)
+        cases = {name: cases[name] for name in args.cases}
+
+    if args.keep:
+        Path(args.keep).mkdir(parents=True, exist_ok=True)
+    print(f"{'Case':<24}{'Hausdorff':>12}{'Allowed':>10}{'Cut length':>22}{'Time':>9}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(args.keep or tmp)
+        for name, case in cases.items():
+            try:
+                result = check_case(name, case, cases_file.parent, output_dir)
+            except Exception as e:
+                result = {'case': name, 'ok': False, 'failures': [f"conversion failed: {e}"]}
+                print(f"{name:<24}FAIL  conversion failed: {e}")
+                results.append(result)
+                continue
+            results.append(result)
+            unit = 'in' if result['units'] == 'inch' else 'mm'
+            length = (f"{result['cut_length']:.1f}/{result['golden_cut_length']:.1f}{unit} "
+                      f"{result['cut_length_change']:+.0%}")
+            allowed = f"{case['max_hausdorff']:g}" + (f"/{case['max_missing']:g}" if 'max_missing' in case else '')
+            line = (f"{name:<24}{result['hausdorff']:>10.4f}{unit}{allowed:>10}"
+                    f"{length:>22}{result['seconds']:>8.2f}s")
+            if not result['ok']:
+                line += "  FAIL: " + '; '.join(result['failures'])
+            print(line)
+
+    passed = sum(r['ok'] for r in results)
+    total_time = sum(r.get('seconds', 0) for r in results)
+    print(f"\n{passed}/{len(results)} cases match their golden programs ({total_time:.2f}s converting)")
+    for name, case in cases.items():
+        if case.get('note'):
+            print(f"  {name}: {case['note']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to: {args.json}")
+    sys.exit(0 if passed == len(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
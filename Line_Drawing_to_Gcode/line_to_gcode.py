@@ -7,16 +7,13 @@ Converts line drawings (PNG, JPG, SVG) into G-Code for CNC machines
 import sys
 import os
 import argparse
+import importlib.util
 from pathlib import Path
 import numpy as np
 
-try:
-    import cv2
-    HAS_CV2 = True
-except ImportError:
-    HAS_CV2 = False
-    print("Warning: OpenCV not installed. Image file support will be limited.")
-    print("Install with: pip install opencv-python")
+# OpenCV is imported by the image code when it runs, so SVG-only use and
+# importing these helpers don't load it
+HAS_CV2 = importlib.util.find_spec('cv2') is not None
 
 try:
     from xml.etree import ElementTree as ET
@@ -137,6 +134,7 @@ class ImageProcessor:
         Perform morphological skeletonization to find centerline of thick lines.
         Uses Zhang-Suen thinning algorithm via OpenCV.
         """
+        import cv2
         # Use morphological thinning to get skeleton
         skeleton = cv2.ximgproc.thinning(binary_image, thinningType=cv2.ximgproc.THINNING_ZHANGSUEN)
         return skeleton
@@ -228,6 +226,7 @@ class ImageProcessor:
         Extract ordered paths from skeletonized image.
         Handles branches and multiple disconnected lines.
         """
+        import cv2
         # Find all skeleton pixels
         skeleton_points = np.column_stack(np.where(skeleton > 0))
         
@@ -327,6 +326,7 @@ class ImageProcessor:
         """
         if not HAS_CV2:
             raise ImportError("OpenCV required for image processing. Install: pip install opencv-python")
+        import cv2
         
         # Load image
         img = cv2.imread(str(image_path))
@@ -408,6 +408,7 @@ class ImageProcessor:
         Alternative skeletonization using morphological operations.
         Works when ximgproc is not available.
         """
+        import cv2
         # Create a copy
         skeleton = np.zeros(binary_image.shape, dtype=np.uint8)
         img = binary_image.copy()
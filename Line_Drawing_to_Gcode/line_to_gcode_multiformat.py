@@ -1,37 +1,53 @@
 #!/usr/bin/env python3
 """
 Line Drawing to G-Code Converter
-Converts line drawings (PNG, JPG, SVG) into G-Code for CNC machines
+Converts line drawings (PNG, JPG, SVG, DXF, C2D) into G-Code for CNC machines
 """
 
 import sys
 import os
+import json
+import re
+import zlib
+import time
 import argparse
+import functools
+import importlib.util
 from pathlib import Path
-import numpy as np
 
-try:
-    import cv2
-    HAS_CV2 = True
-except ImportError:
-    HAS_CV2 = False
-    print("Warning: OpenCV not installed. Image file support will be limited.")
-    print("Install with: pip install opencv-python")
+
+def lazy_import(name):
+    """
+    Import a module that is only loaded when one of its attributes is first
+    used, so runs that never touch it (--help, SVG to SVG) skip its import cost
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+np = lazy_import('numpy')
+
+# Optional backends are imported by the code that uses them: OpenCV for
+# images, SciPy for --spline, ezdxf for --dxf-backend ezdxf, fontTools for text
+HAS_CV2 = importlib.util.find_spec('cv2') is not None
+HAS_SCIPY = importlib.util.find_spec('scipy') is not None
 
 try:
     from xml.etree import ElementTree as ET
-    import re
     HAS_SVG = True
 except ImportError:
     HAS_SVG = False
 
-try:
-    import ezdxf
-    HAS_DXF = True
-except ImportError:
-    HAS_DXF = False
-    print("Warning: ezdxf not installed. DXF export will not be available.")
-    print("Install with: pip install ezdxf")
+
+# Inputs whose paths are already in mm at their real size
+MM_INPUTS = ('.svg', '.c2d', '.ttf', '.otf')
 
 
 class GCodeGenerator:
@@ -41,17 +57,33 @@ class GCodeGenerator:
         self.params = params
         self.gcode = []
         self.current_z = params['safe_height']
-        
+        self.decimals = params.get('decimals') or 4
+        self.cut_length = 0.0
+        self.cut_time = 0.0
+
+    def adaptive_feed(self):
+        """True when a min/max feed range is set for curvature-aware feeds"""
+        p = self.params
+        return (p.get('min_feed_rate') is not None and
+                p.get('max_feed_rate') is not None and
+                p['max_feed_rate'] > p['min_feed_rate'])
+
     def generate_header(self):
         """Generate G-Code header"""
         p = self.params
-        
+
         header = [
             f"; Generated by Line to G-Code Converter",
             f"; File: {p['filename']}",
             f"; Tool diameter: {p['tool_diameter']} {p['units']}",
             f"; Cut depth: {p['cut_depth']} {p['units']}",
             f"; Feed rate: {p['feed_rate']} {p['units']}/min",
+        ]
+        if self.adaptive_feed():
+            header.append(f"; Feed range: {p['min_feed_rate']}-{p['max_feed_rate']} {p['units']}/min (curvature-aware)")
+        if p.get('resolution'):
+            header.append(f"; Resolution: {p['resolution']} steps/{p['units']}")
+        header += [
             "",
             "G21" if p['units'] == 'mm' else "G20",  # Set units
             "G90",  # Absolute positioning
@@ -83,18 +115,19 @@ class GCodeGenerator:
     def move_to(self, x, y, rapid=True):
         """Generate a move command"""
         command = "G0" if rapid else "G1"
-        self.gcode.append(f"{command} X{x:.4f} Y{y:.4f}")
+        d = self.decimals
+        self.gcode.append(f"{command} X{x:.{d}f} Y{y:.{d}f}")
         
     def plunge(self):
         """Plunge to cutting depth"""
         p = self.params
-        self.gcode.append(f"G1 Z{-p['cut_depth']:.4f} F{p['plunge_rate']}")
+        self.gcode.append(f"G1 Z{-p['cut_depth']:.{self.decimals}f} F{p['plunge_rate']}")
         self.current_z = -p['cut_depth']
         
     def retract(self):
         """Retract to safe height"""
         p = self.params
-        self.gcode.append(f"G0 Z{p['safe_height']:.4f}")
+        self.gcode.append(f"G0 Z{p['safe_height']:.{self.decimals}f}")
         self.current_z = p['safe_height']
         
     def cut_path(self, points):
@@ -103,32 +136,78 @@ class GCodeGenerator:
             return
             
         p = self.params
+        d = self.decimals
         
         # Move to start point at safe height
         self.move_to(points[0][0], points[0][1], rapid=True)
         
         # Plunge
         self.plunge()
-        
+
         # Cut along path
-        for point in points[1:]:
-            self.gcode.append(f"G1 X{point[0]:.4f} Y{point[1]:.4f} F{p['feed_rate']}")
-        
+        seg_lengths = path_segment_lengths(points)
+        if self.adaptive_feed():
+            feeds = np.round(plan_feed_rates(points, p['min_feed_rate'], p['max_feed_rate'],
+                                             p.get('corner_accel') or default_corner_accel(p['units'])), 1)
+            for point, feed in zip(points[1:], feeds):
+                self.gcode.append(f"G1 X{point[0]:.{d}f} Y{point[1]:.{d}f} F{feed:.1f}")
+            self.cut_time += float(np.sum(seg_lengths / feeds))
+        else:
+            for point in points[1:]:
+                self.gcode.append(f"G1 X{point[0]:.{d}f} Y{point[1]:.{d}f} F{p['feed_rate']}")
+            self.cut_time += float(np.sum(seg_lengths)) / p['feed_rate']
+        self.cut_length += float(np.sum(seg_lengths))
+
         # Retract
         self.retract()
         self.gcode.append("")  # Blank line for readability
         
-    def generate_from_paths(self, paths):
-        """Generate G-Code from a list of paths"""
+    def cut_paths(self, paths, first_index, total):
+        """Cut a run of paths, numbering them from first_index out of total"""
+        for i, path in enumerate(paths, first_index):
+            self.gcode.append(f"; Path {i+1}/{total}")
+            self.cut_path(path)
+
+    def generate_from_paths(self, paths, workers=1):
+        """
+        Generate G-Code from a list of paths
+
+        Args:
+            paths: Ordered list of paths
+            workers: Number of processes used to format the cutting moves.
+                     The output is identical to a single process run.
+        """
         self.params['paths'] = paths
         self.generate_header()
-        
-        for i, path in enumerate(paths):
-            self.gcode.append(f"; Path {i+1}/{len(paths)}")
-            self.cut_path(path)
-        
+
+        chunks = split_path_chunks(paths, workers * 4) if workers > 1 else []
+        if len(chunks) > 1:
+            # Workers only need the machining parameters, not every path
+            params = {k: v for k, v in self.params.items() if k != 'paths'}
+            jobs = [(params, pack_paths(paths[start:end]), start, len(paths), self.current_z)
+                    for start, end in chunks]
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for text, cut_length, cut_time, current_z in pool.map(_emit_path_chunk, jobs):
+                    self.gcode.append(text)
+                    self.cut_length += cut_length
+                    self.cut_time += cut_time
+                    self.current_z = current_z
+        else:
+            self.cut_paths(paths, 0, len(paths))
+
         self.generate_footer()
-        
+
+    def feed_time_saving(self):
+        """
+        Estimate cutting time against running every cut at the base feed rate.
+
+        Returns:
+            (base_minutes, planned_minutes) for the cutting moves generated so far
+        """
+        base_time = self.cut_length / self.params['feed_rate']
+        return base_time, self.cut_time
+
     def save(self, output_file):
         """Save G-Code to file"""
         with open(output_file, 'w') as f:
@@ -136,110 +215,448 @@ class GCodeGenerator:
         print(f"G-Code saved to: {output_file}")
 
 
+def split_path_chunks(paths, num_chunks):
+    """
+    Split an ordered path list into contiguous chunks of similar point count
+
+    Args:
+        paths: Ordered list of paths
+        num_chunks: Desired number of chunks
+
+    Returns:
+        List of (start, end) index ranges covering every path in order
+    """
+    if not paths or num_chunks < 2:
+        return [(0, len(paths))] if paths else []
+
+    counts = np.cumsum([len(path) for path in paths])
+    targets = counts[-1] * np.arange(1, num_chunks) / num_chunks
+    bounds = np.unique(np.searchsorted(counts, targets, side='right'))
+    edges = [0] + [int(b) for b in bounds if 0 < b < len(paths)] + [len(paths)]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def pack_paths(paths):
+    """
+    Pack paths into one flat point array plus path start offsets
+
+    Args:
+        paths: List of paths (each path is list of (x, y) points)
+
+    Returns:
+        (points, offsets) - float64 Nx2 array and int64 array of len(paths)+1
+    """
+    offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(path) for path in paths])
+    if offsets[-1] == 0:
+        return np.zeros((0, 2)), offsets
+    points = np.concatenate([np.asarray(path, dtype=np.float64).reshape(-1, 2) for path in paths])
+    return points, offsets
+
+
+def unpack_paths(packed):
+    """Inverse of pack_paths, returning a list of paths of [x, y] points"""
+    points, offsets = packed
+    # Plain Python floats format much faster than NumPy scalars downstream
+    points = points.tolist()
+    return [points[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def _emit_path_chunk(job):
+    """Worker: format one chunk of paths, starting from the carried-in state"""
+    params, packed, first_index, total, current_z = job
+    generator = GCodeGenerator(params)
+    generator.current_z = current_z
+    generator.cut_paths(unpack_paths(packed), first_index, total)
+    return '\n'.join(generator.gcode), generator.cut_length, generator.cut_time, generator.current_z
+
+
 class SVGExporter:
     """Export paths to SVG format"""
-    
+
+    # Trailing zeros (and a bare decimal point) left by fixed-precision formatting
+    TRAILING_ZEROS_RE = re.compile(r'(\.\d*?[1-9])0+\b|\.0+\b')
+
+    @staticmethod
+    def path_data(points, precision=4, relative=False):
+        """
+        Build the d attribute for one path in a single formatting call
+
+        Args:
+            points: Nx2 array or list of (x, y) points
+            precision: Decimal places for coordinates
+            relative: Use relative moves (m/l) with trailing zeros trimmed.
+                      Deltas are taken between rounded points, so rounding
+                      error does not build up along the path.
+
+        Returns:
+            Path data string
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if relative:
+            scale = 10 ** precision
+            steps = np.rint(pts * scale).astype(np.int64)
+            steps[1:] = np.diff(steps, axis=0)
+            template = f"m %.{precision}f %.{precision}f"
+            if len(pts) > 1:
+                template += " l" + f" %.{precision}f %.{precision}f" * (len(pts) - 1)
+            data = template % tuple((steps / scale).ravel().tolist())
+            return SVGExporter.TRAILING_ZEROS_RE.sub(r'\1', data)
+
+        template = f"M %.{precision}f %.{precision}f" + f" L %.{precision}f %.{precision}f" * (len(pts) - 1)
+        return template % tuple(pts.ravel().tolist())
+
     @staticmethod
-    def export(paths, width, height, output_file, units='mm'):
+    def export(paths, width, height, output_file, units='mm', precision=4, relative=False):
         """
         Export paths to SVG file
-        
+
+        Paths are written one at a time to a buffered file, so memory use
+        stays flat no matter how many vertices the design has. A filename
+        ending in .svgz is written gzip-compressed.
+
         Args:
             paths: List of paths (each path is list of (x, y) tuples)
             width: Canvas width
             height: Canvas height
-            output_file: Output SVG filename
+            output_file: Output SVG filename (.svg or .svgz)
             units: Units for dimensions (mm or inch)
+            precision: Decimal places for coordinates
+            relative: Use relative path commands to shrink the file
         """
-        # Create SVG root element
-        svg = ET.Element('svg', {
-            'xmlns': 'http://www.w3.org/2000/svg',
-            'width': f'{width}{units}',
-            'height': f'{height}{units}',
-            'viewBox': f'0 0 {width} {height}'
-        })
-        
-        # Add comment
-        comment = ET.Comment(f' Generated by Line to G-Code Converter - {len(paths)} paths ')
-        svg.append(comment)
-        
-        # Create a group for all paths
-        group = ET.SubElement(svg, 'g', {
-            'fill': 'none',
-            'stroke': 'black',
-            'stroke-width': '0.5'
-        })
-        
-        # Add each path
-        for i, path in enumerate(paths):
-            if len(path) < 2:
-                continue
-            
-            # Build path data string
-            path_data = f"M {path[0][0]:.4f} {path[0][1]:.4f}"
-            for point in path[1:]:
-                path_data += f" L {point[0]:.4f} {point[1]:.4f}"
-            
-            # Create path element
-            ET.SubElement(group, 'path', {
-                'd': path_data,
-                'id': f'path{i+1}'
-            })
-        
-        # Write to file
-        tree = ET.ElementTree(svg)
-        ET.indent(tree, space='  ')
-        tree.write(output_file, encoding='utf-8', xml_declaration=True)
+        if str(output_file).lower().endswith('.svgz'):
+            import gzip
+            f = gzip.open(output_file, 'wt', encoding='utf-8', compresslevel=6)
+        else:
+            f = open(output_file, 'w', encoding='utf-8', buffering=1 << 20)
+
+        with f:
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}{units}" '
+                    f'height="{height}{units}" viewBox="0 0 {width} {height}">\n')
+            f.write(f'  <!-- Generated by Line to G-Code Converter - {len(paths)} paths -->\n')
+            f.write('  <g fill="none" stroke="black" stroke-width="0.5">\n')
+
+            for i, path in enumerate(paths):
+                if len(path) < 2:
+                    continue
+                d = SVGExporter.path_data(path, precision, relative)
+                f.write(f'    <path d="{d}" id="path{i+1}" />\n')
+
+            f.write('  </g>\n</svg>')
+
         print(f"SVG saved to: {output_file}")
 
 
+class DXFWriter:
+    """
+    Dependency-free streaming ASCII DXF writer for plain polylines.
+
+    Writes R2000 (LWPOLYLINE) or R12 (POLYLINE/VERTEX) files straight to
+    disk one path at a time, with a layer table built from the layer names
+    in use. Only the tables, blocks and objects a CAD program needs to open
+    the drawing are written; everything else is left at its defaults.
+    """
+
+    VERSIONS = {'R12': 'AC1009', 'R2000': 'AC1015'}
+    INSUNITS = {'mm': 4, 'inch': 1}
+
+    @staticmethod
+    def tags(*pairs):
+        """Format (group code, value) pairs as DXF text"""
+        return ''.join(f"{code:>3}\n{value}\n" for code, value in pairs)
+
+    @staticmethod
+    def write(paths, output_file, units='mm', version='R2000', layers=None, precision=6):
+        """
+        Write paths to a DXF file
+
+        Args:
+            paths: List of paths (each path is list of (x, y) tuples)
+            output_file: Output DXF filename
+            units: Units for dimensions (mm, inch or px)
+            version: 'R2000' (LWPOLYLINE) or 'R12' (POLYLINE)
+            layers: Layer name for each path, or None to put everything on PATHS
+            precision: Decimal places for coordinates
+
+        Returns:
+            Number of polylines written
+        """
+        if version not in DXFWriter.VERSIONS:
+            raise ValueError(f"Unsupported DXF version: {version} (use R12 or R2000)")
+        if layers is None:
+            layers = ['PATHS'] * len(paths)
+        layer_names = list(dict.fromkeys(name for name, path in zip(layers, paths) if len(path) >= 2))
+
+        if version == 'R12':
+            head, tail, writer = DXFWriter._r12_sections(units, layer_names, precision)
+        else:
+            count = sum(1 for path in paths if len(path) >= 2)
+            head, tail, writer = DXFWriter._r2000_sections(units, layer_names, count, precision)
+
+        written = 0
+        with open(output_file, 'w', encoding='ascii', errors='replace', newline='\n',
+                  buffering=1 << 20) as f:
+            f.write(head)
+            for path, layer in zip(paths, layers):
+                if len(path) < 2:
+                    continue
+                f.write(writer(path, layer, written))
+                written += 1
+            f.write(tail)
+        return written
+
+    @staticmethod
+    def _points_template(count, precision, prefix=''):
+        """Bulk %-format template for count (x, y) vertices"""
+        return (prefix + f" 10\n%.{precision}f\n 20\n%.{precision}f\n") * count
+
+    @staticmethod
+    def _r12_sections(units, layer_names, precision):
+        """Header/footer text and polyline formatter for DXF R12"""
+        t = DXFWriter.tags
+        head = t((0, 'SECTION'), (2, 'HEADER'), (9, '$ACADVER'), (1, 'AC1009'),
+                 (9, '$INSUNITS'), (70, DXFWriter.INSUNITS.get(units, 0)), (0, 'ENDSEC'))
+        head += t((0, 'SECTION'), (2, 'TABLES'),
+                  (0, 'TABLE'), (2, 'LTYPE'), (70, 1),
+                  (0, 'LTYPE'), (2, 'CONTINUOUS'), (70, 0), (3, 'Solid line'), (72, 65), (73, 0), (40, 0.0),
+                  (0, 'ENDTAB'),
+                  (0, 'TABLE'), (2, 'LAYER'), (70, len(layer_names) + 1))
+        for name in ['0'] + layer_names:
+            head += t((0, 'LAYER'), (2, name), (70, 0), (62, 7), (6, 'CONTINUOUS'))
+        head += t((0, 'ENDTAB'), (0, 'ENDSEC'), (0, 'SECTION'), (2, 'ENTITIES'))
+        tail = t((0, 'ENDSEC'), (0, 'EOF'))
+
+        def polyline(path, layer, index):
+            pts = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+            vertices = DXFWriter._points_template(len(pts), precision, f"  0\nVERTEX\n  8\n{layer}\n")
+            return (t((0, 'POLYLINE'), (8, layer), (66, 1), (10, 0.0), (20, 0.0), (30, 0.0), (70, 0)) +
+                    vertices % tuple(pts.ravel().tolist()) +
+                    t((0, 'SEQEND'), (8, layer)))
+
+        return head, tail, polyline
+
+    @staticmethod
+    def _r2000_sections(units, layer_names, entity_count, precision):
+        """Header/footer text and polyline formatter for DXF R2000"""
+        t = DXFWriter.tags
+        next_handle = [0x10]
+
+        def handle():
+            value = next_handle[0]
+            next_handle[0] += 1
+            return f"{value:X}"
+
+        def table(name, records, extra=()):
+            table_handle = handle()
+            text = t((0, 'TABLE'), (2, name), (5, table_handle), (330, 0),
+                     (100, 'AcDbSymbolTable'), (70, len(records)), *extra)
+            for subclass, fields in records:
+                code = 105 if name == 'DIMSTYLE' else 5
+                text += t((0, name), (code, handle()), (330, table_handle),
+                          (100, 'AcDbSymbolTableRecord'), (100, subclass), *fields)
+            return text + t((0, 'ENDTAB'))
+
+        tables = t((0, 'SECTION'), (2, 'TABLES'))
+        tables += table('VPORT', [])
+        tables += table('LTYPE', [
+            ('AcDbLinetypeTableRecord', [(2, name), (70, 0), (3, desc), (72, 65), (73, 0), (40, 0.0)])
+            for name, desc in (('ByBlock', ''), ('ByLayer', ''), ('Continuous', 'Solid line'))])
+        tables += table('LAYER', [
+            ('AcDbLayerTableRecord', [(2, name), (70, 0), (62, 7), (6, 'Continuous')])
+            for name in ['0'] + layer_names])
+        tables += table('STYLE', [
+            ('AcDbTextStyleTableRecord',
+             [(2, 'Standard'), (70, 0), (40, 0.0), (41, 1.0), (50, 0.0), (71, 0), (42, 2.5), (3, 'txt'), (4, '')])])
+        tables += table('VIEW', [])
+        tables += table('UCS', [])
+        tables += table('APPID', [('AcDbRegAppTableRecord', [(2, 'ACAD'), (70, 0)])])
+        tables += table('DIMSTYLE', [('AcDbDimStyleTableRecord', [(2, 'Standard'), (70, 0)])],
+                        extra=[(100, 'AcDbDimStyleTable'), (71, 0)])
+
+        block_table = handle()
+        model_record, paper_record = handle(), handle()
+        tables += t((0, 'TABLE'), (2, 'BLOCK_RECORD'), (5, block_table), (330, 0),
+                    (100, 'AcDbSymbolTable'), (70, 2))
+        for record, name in ((model_record, '*Model_Space'), (paper_record, '*Paper_Space')):
+            tables += t((0, 'BLOCK_RECORD'), (5, record), (330, block_table),
+                        (100, 'AcDbSymbolTableRecord'), (100, 'AcDbBlockTableRecord'), (2, name))
+        tables += t((0, 'ENDTAB'), (0, 'ENDSEC'))
+
+        blocks = t((0, 'SECTION'), (2, 'BLOCKS'))
+        for record, name, paper in ((model_record, '*Model_Space', False), (paper_record, '*Paper_Space', True)):
+            blocks += t((0, 'BLOCK'), (5, handle()), (330, record), (100, 'AcDbEntity'),
+                        *([(67, 1)] if paper else []), (8, '0'), (100, 'AcDbBlockBegin'), (2, name), (70, 0),
+                        (10, 0.0), (20, 0.0), (30, 0.0), (3, name), (1, ''))
+            blocks += t((0, 'ENDBLK'), (5, handle()), (330, record), (100, 'AcDbEntity'),
+                        *([(67, 1)] if paper else []), (8, '0'), (100, 'AcDbBlockEnd'))
+        blocks += t((0, 'ENDSEC'), (0, 'SECTION'), (2, 'ENTITIES'))
+
+        # Entities take a contiguous block of handles, objects come after
+        first_entity = next_handle[0]
+        next_handle[0] += entity_count
+        root, groups = handle(), handle()
+        tail = t((0, 'ENDSEC'), (0, 'SECTION'), (2, 'OBJECTS'),
+                 (0, 'DICTIONARY'), (5, root), (330, 0), (100, 'AcDbDictionary'), (281, 1),
+                 (3, 'ACAD_GROUP'), (350, groups),
+                 (0, 'DICTIONARY'), (5, groups), (330, root), (100, 'AcDbDictionary'), (281, 1),
+                 (0, 'ENDSEC'), (0, 'EOF'))
+
+        head = t((0, 'SECTION'), (2, 'HEADER'),
+                 (9, '$ACADVER'), (1, 'AC1015'),
+                 (9, '$HANDSEED'), (5, f"{next_handle[0]:X}"),
+                 (9, '$INSUNITS'), (70, DXFWriter.INSUNITS.get(units, 0)),
+                 (9, '$MEASUREMENT'), (70, 0 if units == 'inch' else 1),
+                 (0, 'ENDSEC'),
+                 (0, 'SECTION'), (2, 'CLASSES'), (0, 'ENDSEC'))
+        head += tables + blocks
+
+        def lwpolyline(path, layer, index):
+            pts = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+            return (t((0, 'LWPOLYLINE'), (5, f"{first_entity + index:X}"), (330, model_record),
+                      (100, 'AcDbEntity'), (8, layer), (100, 'AcDbPolyline'), (90, len(pts)), (70, 0)) +
+                    DXFWriter._points_template(len(pts), precision) % tuple(pts.ravel().tolist()))
+
+        return head, tail, lwpolyline
+
+
 class DXFExporter:
     """Export paths to DXF format"""
-    
+
     @staticmethod
-    def export(paths, output_file, units='mm'):
+    def export(paths, output_file, units='mm', backend='builtin', version='R2000', layers=None):
         """
         Export paths to DXF file
-        
+
         Args:
             paths: List of paths (each path is list of (x, y) tuples)
             output_file: Output DXF filename
             units: Units for dimensions (mm or inch)
+            backend: 'builtin' streaming writer or 'ezdxf'
+            version: DXF version for the built-in writer (R12 or R2000)
+            layers: Layer name for each path (default: all on PATHS)
         """
-        if not HAS_DXF:
-            print("Error: ezdxf not installed. Cannot export DXF.")
-            print("Install with: pip install ezdxf")
+        if backend == 'ezdxf':
+            return DXFExporter.export_ezdxf(paths, output_file, units, layers)
+
+        DXFWriter.write(paths, output_file, units, version, layers)
+        print(f"DXF saved to: {output_file}")
+        return True
+
+    @staticmethod
+    def export_ezdxf(paths, output_file, units='mm', layers=None):
+        """Export paths to DXF file with ezdxf (R2010 document)"""
+        try:
+            import ezdxf
+        except ImportError:
+            print("Error: ezdxf not installed. Cannot export DXF with the ezdxf backend.")
+            print("Install with: pip install ezdxf (or use --dxf-backend builtin)")
             return False
-        
+
         # Create new DXF document
         doc = ezdxf.new('R2010')
-        
+
         # Set units
         if units == 'mm':
             doc.units = ezdxf.units.MM
         else:
             doc.units = ezdxf.units.IN
-        
+
         # Get modelspace
         msp = doc.modelspace()
-        
+        if layers is None:
+            layers = ['PATHS'] * len(paths)
+
         # Add each path as a polyline
-        for i, path in enumerate(paths):
+        for path, layer in zip(paths, layers):
             if len(path) < 2:
                 continue
-            
+
             # Create polyline
-            polyline = msp.add_lwpolyline(
+            msp.add_lwpolyline(
                 points=path,
-                dxfattribs={'layer': 'PATHS'}
+                dxfattribs={'layer': layer}
             )
-        
+
         # Save DXF file
         doc.saveas(output_file)
         print(f"DXF saved to: {output_file}")
         return True
 
 
+class ToolpathFile:
+    """
+    Save and load final scaled paths as a compact binary toolpath (.npz).
+
+    All points are stored in one float64 array with an offsets array marking
+    where each path starts, plus a small JSON metadata record (dimensions,
+    units, machining parameters, whether the paths are already scaled to
+    machine coordinates with Y up), so G-Code, SVG or DXF can be
+    regenerated without re-running the image pipeline.
+    """
+
+    VERSION = 1
+
+    @staticmethod
+    def save(output_file, paths, width, height, units, params=None, source=None, y_up=False):
+        """
+        Save paths to a toolpath file
+
+        Args:
+            output_file: Output .npz filename
+            paths: List of paths (each path is list of (x, y) tuples)
+            width: Design width
+            height: Design height
+            units: Units of the coordinates (mm, inch or px)
+            params: Machining parameters used for G-Code (optional)
+            source: Name of the original input file (optional)
+            y_up: True if the paths were scaled to machine coordinates (Y up)
+        """
+        points, offsets = pack_paths(paths)
+
+        meta = {
+            'version': ToolpathFile.VERSION,
+            'width': float(width),
+            'height': float(height),
+            'units': units,
+            'source': source,
+            'y_up': bool(y_up),
+            'params': {k: v for k, v in params.items() if k != 'paths'} if params else None,
+        }
+
+        with open(output_file, 'wb') as f:
+            np.savez_compressed(
+                f,
+                points=points,
+                offsets=offsets,
+                meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+            )
+        print(f"Toolpath saved to: {output_file}")
+
+    @staticmethod
+    def load(toolpath_file):
+        """
+        Load paths from a toolpath file
+
+        Returns:
+            paths: List of paths (each path is list of [x, y] points)
+            width: Design width
+            height: Design height
+            meta: Metadata dictionary (units, params, source, y_up)
+        """
+        with np.load(toolpath_file, allow_pickle=False) as data:
+            points = data['points']
+            offsets = data['offsets']
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+
+        if meta.get('version', 1) > ToolpathFile.VERSION:
+            raise ValueError(f"Toolpath file version {meta['version']} is newer than this converter supports")
+        # Older files did not record it; only unscaled image paths stay in pixels
+        meta.setdefault('y_up', meta['units'] != 'px')
+
+        return unpack_paths((points, offsets)), meta['width'], meta['height'], meta
+
+
 class ImageProcessor:
     """Process raster images to extract paths"""
     
@@ -249,6 +666,7 @@ class ImageProcessor:
         Perform morphological skeletonization to find centerline of thick lines.
         Uses Zhang-Suen thinning algorithm via OpenCV.
         """
+        import cv2
         # Use morphological thinning to get skeleton
         skeleton = cv2.ximgproc.thinning(binary_image, thinningType=cv2.ximgproc.THINNING_ZHANGSUEN)
         return skeleton
@@ -340,6 +758,7 @@ class ImageProcessor:
         Extract ordered paths from skeletonized image.
         Handles branches and multiple disconnected lines.
         """
+        import cv2
         # Find all skeleton pixels
         skeleton_points = np.column_stack(np.where(skeleton > 0))
         
@@ -419,64 +838,76 @@ class ImageProcessor:
         return path
     
     @staticmethod
-    def load_and_process(image_path, threshold=127, simplify_epsilon=1.0, 
-                        use_skeleton=False, smooth_level=5, use_spline=False):
+    def read_image(image_path):
+        """Load an image file as an 8-bit grayscale array"""
+        if not HAS_CV2:
+            raise ImportError("OpenCV required for image processing. Install: pip install opencv-python")
+        import cv2
+        
+        with profile_span('decode'):
+            img = cv2.imread(str(image_path))
+            if img is None:
+                raise ValueError(f"Could not load image: {image_path}")
+            return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    
+    @staticmethod
+    def binarize(gray, threshold=127):
+        """Threshold a grayscale image so the dark lines become 255 on 0"""
+        import cv2
+        with profile_span('threshold'):
+            _, binary = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
+        return binary
+    
+    @staticmethod
+    def extract_paths(binary, simplify_epsilon=1.0, use_skeleton=False, smooth_level=5, use_spline=False):
         """
-        Load image and extract contours or skeleton paths.
+        Extract contour or skeleton paths from a binary image.
         
         Args:
-            image_path: Path to image file
-            threshold: Threshold for binarization (0-255)
+            binary: Binary image from binarize()
             simplify_epsilon: Epsilon for contour simplification
             use_skeleton: If True, use skeletonization for thick/variable width lines
             smooth_level: Smoothing factor (higher = smoother)
             use_spline: If True, use spline fitting for very smooth curves
         
         Returns:
-            paths: List of paths (each path is list of (x, y) tuples)
-            width: Image width
-            height: Image height
+            List of paths (each path is list of (x, y) tuples)
         """
-        if not HAS_CV2:
-            raise ImportError("OpenCV required for image processing. Install: pip install opencv-python")
-        
-        # Load image
-        img = cv2.imread(str(image_path))
-        if img is None:
-            raise ValueError(f"Could not load image: {image_path}")
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Threshold to binary
-        _, binary = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
-        
+        import cv2
         paths = []
         
         if use_skeleton:
             # Use skeletonization for thick/variable width lines
             print("Skeletonizing image to find centerlines...")
             
-            try:
-                skeleton = ImageProcessor.skeletonize(binary)
-            except AttributeError:
-                # If ximgproc not available, use alternative method
-                print("Note: Using alternative skeletonization method")
-                skeleton = ImageProcessor.skeletonize_alternative(binary)
+            with profile_span('skeleton'):
+                try:
+                    skeleton = ImageProcessor.skeletonize(binary)
+                except AttributeError:
+                    # If ximgproc not available, use alternative method
+                    print("Note: Using alternative skeletonization method")
+                    skeleton = ImageProcessor.skeletonize_alternative(binary)
             
             # Extract ordered paths from skeleton
-            skeleton_paths = ImageProcessor.order_skeleton_points(skeleton)
+            with profile_span('trace') as span:
+                skeleton_paths = ImageProcessor.order_skeleton_points(skeleton)
+                span.paths(paths_out=skeleton_paths)
             
             # Smooth each path
-            for path in skeleton_paths:
-                if len(path) >= 2:
-                    if use_spline and len(path) >= 4:
-                        # Use spline fitting for smoother curves
-                        smoothed = ImageProcessor.fit_spline_path(path, smoothness=0.5)
-                    else:
-                        # Use moving average smoothing
-                        smoothed = ImageProcessor.smooth_path(path, smooth_level)
-                    
+            with profile_span('smooth') as span:
+                smoothed_paths = []
+                for path in skeleton_paths:
+                    if len(path) >= 2:
+                        if use_spline and len(path) >= 4:
+                            # Use spline fitting for smoother curves
+                            smoothed_paths.append(ImageProcessor.fit_spline_path(path, smoothness=0.5))
+                        else:
+                            # Use moving average smoothing
+                            smoothed_paths.append(ImageProcessor.smooth_path(path, smooth_level))
+                span.paths(skeleton_paths, smoothed_paths)
+            
+            with profile_span('simplify') as span:
+                for smoothed in smoothed_paths:
                     # Simplify to reduce point count
                     if simplify_epsilon > 0:
                         # Convert to numpy array for simplification
@@ -487,27 +918,57 @@ class ImageProcessor:
                     
                     if len(smoothed) >= 2:
                         paths.append(smoothed)
+                span.paths(smoothed_paths, paths)
         
         else:
             # Use contour detection for clean line drawings
             # Use RETR_EXTERNAL to get only outermost contours (avoids double lines)
-            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            with profile_span('trace') as span:
+                contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                span.paths(paths_out=contours)
             
             # Convert contours to paths and simplify
-            for contour in contours:
-                # Filter out very small contours (noise)
-                if len(contour) < 3:
-                    continue
-                
-                # Simplify contour
-                epsilon = simplify_epsilon
-                simplified = cv2.approxPolyDP(contour, epsilon, False)
-                
-                # Convert to list of points
-                path = [(float(point[0][0]), float(point[0][1])) for point in simplified]
-                
-                if len(path) >= 2:  # Only keep paths with at least 2 points
-                    paths.append(path)
+            with profile_span('simplify') as span:
+                for contour in contours:
+                    # Filter out very small contours (noise)
+                    if len(contour) < 3:
+                        continue
+                    
+                    # Simplify contour
+                    epsilon = simplify_epsilon
+                    simplified = cv2.approxPolyDP(contour, epsilon, False)
+                    
+                    # Convert to list of points
+                    path = [(float(point[0][0]), float(point[0][1])) for point in simplified]
+                    
+                    if len(path) >= 2:  # Only keep paths with at least 2 points
+                        paths.append(path)
+                span.paths(contours, paths)
+        
+        return paths
+    
+    @staticmethod
+    def load_and_process(image_path, threshold=127, simplify_epsilon=1.0, 
+                        use_skeleton=False, smooth_level=5, use_spline=False):
+        """
+        Load image and extract contours or skeleton paths.
+        
+        Args:
+            image_path: Path to image file
+            threshold: Threshold for binarization (0-255)
+            simplify_epsilon: Epsilon for contour simplification
+            use_skeleton: If True, use skeletonization for thick/variable width lines
+            smooth_level: Smoothing factor (higher = smoother)
+            use_spline: If True, use spline fitting for very smooth curves
+        
+        Returns:
+            paths: List of paths (each path is list of (x, y) tuples)
+            width: Image width
+            height: Image height
+        """
+        gray = ImageProcessor.read_image(image_path)
+        binary = ImageProcessor.binarize(gray, threshold)
+        paths = ImageProcessor.extract_paths(binary, simplify_epsilon, use_skeleton, smooth_level, use_spline)
         
         # Get image dimensions for scaling
         height, width = gray.shape
@@ -520,6 +981,7 @@ class ImageProcessor:
         Alternative skeletonization using morphological operations.
         Works when ximgproc is not available.
         """
+        import cv2
         # Create a copy
         skeleton = np.zeros(binary_image.shape, dtype=np.uint8)
         img = binary_image.copy()
@@ -548,224 +1010,2196 @@ class ImageProcessor:
 
 class SVGProcessor:
     """Process SVG files to extract paths"""
-    
-    @staticmethod
-    def parse_path_data(path_string):
-        """Parse SVG path data into points"""
-        points = []
-        
-        # Simple parser for basic SVG commands (M, L, H, V, Z)
-        commands = re.findall(r'[MLHVZmlhvz][^MLHVZmlhvz]*', path_string)
-        
-        current_pos = [0.0, 0.0]
-        
-        for cmd in commands:
-            cmd_type = cmd[0]
-            coords = re.findall(r'-?\d+\.?\d*', cmd[1:])
-            coords = [float(c) for c in coords]
-            
-            if cmd_type in ['M', 'm']:  # Move to
-                if cmd_type == 'M':  # Absolute
-                    current_pos = [coords[0], coords[1]]
-                else:  # Relative
-                    current_pos[0] += coords[0]
-                    current_pos[1] += coords[1]
-                points.append(tuple(current_pos))
-                
-            elif cmd_type in ['L', 'l']:  # Line to
-                for i in range(0, len(coords), 2):
-                    if cmd_type == 'L':  # Absolute
-                        current_pos = [coords[i], coords[i+1]]
-                    else:  # Relative
-                        current_pos[0] += coords[i]
-                        current_pos[1] += coords[i+1]
-                    points.append(tuple(current_pos))
-            
-            elif cmd_type in ['H', 'h']:  # Horizontal line
-                for coord in coords:
-                    if cmd_type == 'H':
-                        current_pos[0] = coord
-                    else:
-                        current_pos[0] += coord
-                    points.append(tuple(current_pos))
-            
-            elif cmd_type in ['V', 'v']:  # Vertical line
-                for coord in coords:
-                    if cmd_type == 'V':
-                        current_pos[1] = coord
-                    else:
-                        current_pos[1] += coord
-                    points.append(tuple(current_pos))
-            
-            elif cmd_type in ['Z', 'z']:  # Close path
-                if points:
-                    points.append(points[0])
-        
-        return points
-    
+
+    # One token per command letter or number (exponents, ".5", "1.5.5" -> 1.5 .5, "10-5" -> 10 -5)
+    PATH_TOKEN_RE = re.compile(r'[MmZzLlHhVvCcSsQqTtAa]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+    # Number of arguments taken by each path command
+    PATH_ARGS = {'M': 2, 'L': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'A': 7}
+
     @staticmethod
-    def load_and_process(svg_path):
-        """Load SVG and extract paths"""
-        tree = ET.parse(svg_path)
-        root = tree.getroot()
-        
-        # Handle namespace
-        ns = {'svg': 'http://www.w3.org/2000/svg'}
-        
-        paths = []
-        
-        # Find all path elements
-        for path_elem in root.findall('.//svg:path', ns) + root.findall('.//path'):
-            d = path_elem.get('d')
-            if d:
-                points = SVGProcessor.parse_path_data(d)
-                if len(points) >= 2:
-                    paths.append(points)
-        
-        # Get SVG dimensions
-        width = float(root.get('width', 100))
-        height = float(root.get('height', 100))
-        
+    def flatten_cubics(curves, tolerance):
+        """
+        Flatten cubic Beziers in one vectorized batch.
+
+        Each curve gets its own segment count from the bound on its second
+        derivative, so the chord error stays under tolerance without
+        over-sampling gentle curves.
+
+        Args:
+            curves: Nx4x2 array of control points
+            tolerance: Maximum chord deviation
+
+        Returns:
+            List of arrays of points along each curve, excluding its start point
+        """
+        if len(curves) == 0:
+            return []
+        p0, p1, p2, p3 = curves[:, 0], curves[:, 1], curves[:, 2], curves[:, 3]
+        dd = np.maximum(np.hypot(*(p0 - 2 * p1 + p2).T), np.hypot(*(p1 - 2 * p2 + p3).T))
+        counts = np.clip(np.ceil(np.sqrt(0.75 * dd / tolerance)), 1, 1000).astype(np.int64)
+
+        curve_id = np.repeat(np.arange(len(curves)), counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        t = (np.arange(len(curve_id)) - starts[curve_id] + 1) / counts[curve_id]
+        mt = 1 - t
+        points = ((mt ** 3)[:, None] * p0[curve_id] + (3 * mt * mt * t)[:, None] * p1[curve_id] +
+                  (3 * mt * t * t)[:, None] * p2[curve_id] + (t ** 3)[:, None] * p3[curve_id])
+        return np.split(points, np.cumsum(counts)[:-1])
+
+    @staticmethod
+    def flatten_arcs(arcs, tolerance):
+        """
+        Flatten elliptical arcs (centre parameterization) in one vectorized batch.
+
+        Args:
+            arcs: Nx7 array of (cx, cy, rx, ry, phi, theta1, dtheta)
+            tolerance: Maximum chord deviation
+
+        Returns:
+            List of arrays of points along each arc, excluding its start point
+        """
+        if len(arcs) == 0:
+            return []
+        cx, cy, rx, ry, phi, theta1, dtheta = arcs.T
+        r = np.maximum(rx, ry)
+        step = 2 * np.arccos(np.clip(1 - tolerance / r, -1, 1))
+        counts = np.clip(np.ceil(np.abs(dtheta) / step), 1, 1000).astype(np.int64)
+
+        arc_id = np.repeat(np.arange(len(arcs)), counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        theta = theta1[arc_id] + dtheta[arc_id] * (np.arange(len(arc_id)) - starts[arc_id] + 1) / counts[arc_id]
+        cos_phi, sin_phi = np.cos(phi[arc_id]), np.sin(phi[arc_id])
+        x = rx[arc_id] * np.cos(theta)
+        y = ry[arc_id] * np.sin(theta)
+        points = np.column_stack((cx[arc_id] + cos_phi * x - sin_phi * y,
+                                  cy[arc_id] + sin_phi * x + cos_phi * y))
+        return np.split(points, np.cumsum(counts)[:-1])
+
+    @staticmethod
+    def arc_center(x1, y1, rx, ry, phi_deg, large_arc, sweep, x2, y2):
+        """
+        Convert an SVG endpoint arc to centre parameterization (SVG spec F.6.5)
+
+        Returns:
+            (cx, cy, rx, ry, phi, theta1, dtheta), or None when the arc is a straight line
+        """
+        rx, ry = abs(rx), abs(ry)
+        if rx == 0 or ry == 0:
+            return None
+        phi = np.radians(phi_deg % 360)
+        cos_phi, sin_phi = np.cos(phi), np.sin(phi)
+        dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+        x1p = cos_phi * dx + sin_phi * dy
+        y1p = -sin_phi * dx + cos_phi * dy
+
+        # Scale radii up if they cannot span the endpoints
+        scale = (x1p / rx) ** 2 + (y1p / ry) ** 2
+        if scale > 1:
+            rx, ry = rx * np.sqrt(scale), ry * np.sqrt(scale)
+
+        num = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+        den = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+        coef = np.sqrt(max(0.0, num / den)) if den else 0.0
+        if large_arc == sweep:
+            coef = -coef
+        cxp, cyp = coef * rx * y1p / ry, -coef * ry * x1p / rx
+        cx = cos_phi * cxp - sin_phi * cyp + (x1 + x2) / 2
+        cy = sin_phi * cxp + cos_phi * cyp + (y1 + y2) / 2
+
+        theta1 = np.arctan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+        theta2 = np.arctan2((-y1p - cyp) / ry, (-x1p - cxp) / rx)
+        dtheta = (theta2 - theta1) % (2 * np.pi)
+        if not sweep and dtheta > 0:
+            dtheta -= 2 * np.pi
+        return cx, cy, rx, ry, phi, theta1, dtheta
+
+    @staticmethod
+    def parse_path_data(path_string, tolerance=0.1):
+        """
+        Parse SVG path data into subpaths of points
+
+        Supports the complete path grammar (M, L, H, V, C, S, Q, T, A, Z in
+        absolute and relative forms, with implicit repeated commands).
+        Curves are flattened so no point is further than tolerance from
+        the true curve.
+
+        Args:
+            path_string: Contents of a path's d attribute
+            tolerance: Maximum chord deviation, in SVG user units
+
+        Returns:
+            List of subpaths (each a list of (x, y) tuples)
+        """
+        tokens = SVGProcessor.PATH_TOKEN_RE.findall(path_string)
+        subpaths = []      # each item: ('p', (x, y)) or ('c', index) or ('a', index)
+        cubics, arcs = [], []
+        current = None
+        x = y = start_x = start_y = 0.0
+        cmd = None
+        prev_cubic = prev_quad = None  # reflected control points for S and T
+
+        i, n = 0, len(tokens)
+        while i < n:
+            token = tokens[i]
+            if token.isalpha():
+                cmd = token
+                i += 1
+                if cmd in 'Zz':
+                    if current is not None:
+                        current.append(('p', (start_x, start_y)))
+                    x, y = start_x, start_y
+                    current = None
+                    prev_cubic = prev_quad = None
+                continue
+            if cmd is None or cmd in 'Zz':
+                break  # numbers without a command: malformed, keep what we have
+
+            kind = cmd.upper()
+            relative = cmd.islower()
+            count = SVGProcessor.PATH_ARGS[kind]
+            args = []
+            while len(args) < count and i < n:
+                token = tokens[i]
+                if token.isalpha():
+                    break
+                if kind == 'A' and len(args) in (3, 4):
+                    # Arc flags are single digits and may run into the next number
+                    if token[0] not in '01':
+                        break
+                    args.append(float(token[0]))
+                    if len(token) > 1:
+                        tokens[i] = token[1:]
+                    else:
+                        i += 1
+                    continue
+                args.append(float(token))
+                i += 1
+            if len(args) < count:
+                break
+
+            ox, oy = (x, y) if relative else (0.0, 0.0)
+            if kind == 'M':
+                x, y = args[0] + ox, args[1] + oy
+                start_x, start_y = x, y
+                current = [('p', (x, y))]
+                subpaths.append(current)
+                cmd = 'l' if relative else 'L'  # extra pairs are implicit line-tos
+                prev_cubic = prev_quad = None
+                continue
+
+            if current is None:
+                # Drawing after Z (or without M) starts a new subpath at the current point
+                current = [('p', (x, y))]
+                subpaths.append(current)
+
+            if kind == 'L':
+                x, y = args[0] + ox, args[1] + oy
+                current.append(('p', (x, y)))
+            elif kind == 'H':
+                x = args[0] + ox
+                current.append(('p', (x, y)))
+            elif kind == 'V':
+                y = args[0] + oy
+                current.append(('p', (x, y)))
+            elif kind in 'CS':
+                if kind == 'C':
+                    c1 = (args[0] + ox, args[1] + oy)
+                    rest = args[2:]
+                else:
+                    c1 = (2 * x - prev_cubic[0], 2 * y - prev_cubic[1]) if prev_cubic else (x, y)
+                    rest = args
+                c2 = (rest[0] + ox, rest[1] + oy)
+                end = (rest[2] + ox, rest[3] + oy)
+                cubics.append(((x, y), c1, c2, end))
+                current.append(('c', len(cubics) - 1))
+                x, y = end
+                prev_cubic, prev_quad = c2, None
+                continue
+            elif kind in 'QT':
+                if kind == 'Q':
+                    q = (args[0] + ox, args[1] + oy)
+                    end = (args[2] + ox, args[3] + oy)
+                else:
+                    q = (2 * x - prev_quad[0], 2 * y - prev_quad[1]) if prev_quad else (x, y)
+                    end = (args[0] + ox, args[1] + oy)
+                # A quadratic is an exact cubic with these control points
+                c1 = (x + 2 / 3 * (q[0] - x), y + 2 / 3 * (q[1] - y))
+                c2 = (end[0] + 2 / 3 * (q[0] - end[0]), end[1] + 2 / 3 * (q[1] - end[1]))
+                cubics.append(((x, y), c1, c2, end))
+                current.append(('c', len(cubics) - 1))
+                x, y = end
+                prev_cubic, prev_quad = None, q
+                continue
+            elif kind == 'A':
+                end_x, end_y = args[5] + ox, args[6] + oy
+                if (end_x, end_y) != (x, y):
+                    arc = SVGProcessor.arc_center(x, y, args[0], args[1], args[2],
+                                                  bool(args[3]), bool(args[4]), end_x, end_y)
+                    if arc is None:
+                        current.append(('p', (end_x, end_y)))
+                    else:
+                        arcs.append(arc)
+                        current.append(('a', len(arcs) - 1))
+                x, y = end_x, end_y
+            prev_cubic = prev_quad = None
+
+        cubic_points = SVGProcessor.flatten_cubics(np.array(cubics, dtype=np.float64).reshape(-1, 4, 2), tolerance)
+        arc_points = SVGProcessor.flatten_arcs(np.array(arcs, dtype=np.float64).reshape(-1, 7), tolerance)
+
+        result = []
+        for items in subpaths:
+            points = []
+            for kind, value in items:
+                if kind == 'p':
+                    points.append(value)
+                else:
+                    points.extend(map(tuple, (cubic_points if kind == 'c' else arc_points)[value].tolist()))
+            result.append(points)
+        return result
+    
+    # Physical size of each SVG/CSS length unit in mm (px is 1/96 inch)
+    UNIT_MM = {'': 25.4 / 96, 'px': 25.4 / 96, 'pt': 25.4 / 72, 'pc': 25.4 / 6,
+               'mm': 1.0, 'cm': 10.0, 'q': 0.25, 'in': 25.4}
+
+    LENGTH_RE = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([a-zA-Z%]*)')
+    TRANSFORM_RE = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+
+    # Elements whose children are never drawn directly
+    NON_RENDERED = {'defs', 'clipPath', 'mask', 'symbol', 'marker', 'pattern', 'style', 'script',
+                    'title', 'desc', 'metadata', 'linearGradient', 'radialGradient', 'filter'}
+
+    @staticmethod
+    def parse_length(value):
+        """
+        Parse an SVG length such as '100mm' or '800px'
+
+        Returns:
+            (number, unit) with unit lower-cased, or None if not a length
+        """
+        match = SVGProcessor.LENGTH_RE.match(value or '')
+        if not match:
+            return None
+        return float(match.group(1)), match.group(2).lower()
+
+    @staticmethod
+    def parse_transform(value):
+        """Parse a transform attribute into a 3x3 matrix"""
+        matrix = np.eye(3)
+        for name, args in SVGProcessor.TRANSFORM_RE.findall(value or ''):
+            v = [float(a) for a in SVGProcessor.PATH_TOKEN_RE.findall(args)]
+            m = np.eye(3)
+            if name == 'matrix' and len(v) == 6:
+                m[:2] = [[v[0], v[2], v[4]], [v[1], v[3], v[5]]]
+            elif name == 'translate' and v:
+                m[0, 2], m[1, 2] = v[0], v[1] if len(v) > 1 else 0.0
+            elif name == 'scale' and v:
+                m[0, 0], m[1, 1] = v[0], v[1] if len(v) > 1 else v[0]
+            elif name == 'rotate' and v:
+                a = np.radians(v[0])
+                m[:2, :2] = [[np.cos(a), -np.sin(a)], [np.sin(a), np.cos(a)]]
+                if len(v) == 3:
+                    # rotate(a, cx, cy) = translate(cx, cy) rotate(a) translate(-cx, -cy)
+                    m[:2, 2] = [v[1], v[2]] - m[:2, :2] @ [v[1], v[2]]
+            elif name == 'skewX' and v:
+                m[0, 1] = np.tan(np.radians(v[0]))
+            elif name == 'skewY' and v:
+                m[1, 0] = np.tan(np.radians(v[0]))
+            matrix = matrix @ m
+        return matrix
+
+    @staticmethod
+    def shape_path_data(tag, elem):
+        """
+        Express a basic shape as path data
+
+        Returns:
+            Path data string, or None for anything that is not a drawable shape
+        """
+        def num(name, default=0.0):
+            length = SVGProcessor.parse_length(elem.get(name))
+            return length[0] if length else default
+
+        if tag == 'path':
+            return elem.get('d')
+        if tag == 'line':
+            return f"M{num('x1')},{num('y1')} L{num('x2')},{num('y2')}"
+        if tag in ('polyline', 'polygon'):
+            values = SVGProcessor.PATH_TOKEN_RE.findall(elem.get('points', ''))
+            if len(values) < 4:
+                return None
+            return 'M' + ' '.join(values[:len(values) // 2 * 2]) + (' Z' if tag == 'polygon' else '')
+        if tag in ('circle', 'ellipse'):
+            cx, cy = num('cx'), num('cy')
+            rx = num('r') if tag == 'circle' else num('rx')
+            ry = num('r') if tag == 'circle' else num('ry')
+            if rx <= 0 or ry <= 0:
+                return None
+            return (f"M{cx + rx},{cy} A{rx},{ry} 0 1 1 {cx - rx},{cy} "
+                    f"A{rx},{ry} 0 1 1 {cx + rx},{cy} Z")
+        if tag == 'rect':
+            x, y, w, h = num('x'), num('y'), num('width'), num('height')
+            if w <= 0 or h <= 0:
+                return None
+            rx, ry = num('rx', None), num('ry', None)
+            rx = ry if rx is None else rx
+            ry = rx if ry is None else ry
+            rx, ry = min(rx or 0.0, w / 2), min(ry or 0.0, h / 2)
+            if rx <= 0 or ry <= 0:
+                return f"M{x},{y} H{x + w} V{y + h} H{x} Z"
+            return (f"M{x + rx},{y} H{x + w - rx} A{rx},{ry} 0 0 1 {x + w},{y + ry} "
+                    f"V{y + h - ry} A{rx},{ry} 0 0 1 {x + w - rx},{y + h} "
+                    f"H{x + rx} A{rx},{ry} 0 0 1 {x},{y + h - ry} "
+                    f"V{y + ry} A{rx},{ry} 0 0 1 {x + rx},{y} Z")
+        return None
+
+    @staticmethod
+    def viewport_matrix(root):
+        """
+        Work out the document size in mm and the matrix from user units to mm
+
+        Uses width/height (with physical units) and the viewBox, honouring the
+        default preserveAspectRatio (uniform scale, centred).
+
+        Returns:
+            (matrix, width_mm, height_mm) - width/height are None if unknown
+        """
+        view_box = [float(v) for v in SVGProcessor.PATH_TOKEN_RE.findall(root.get('viewBox', ''))]
+        view_box = view_box if len(view_box) == 4 and view_box[2] > 0 and view_box[3] > 0 else None
+
+        def size(name, fallback):
+            length = SVGProcessor.parse_length(root.get(name))
+            if length is None or length[1] == '%' or length[1] not in SVGProcessor.UNIT_MM:
+                return None if fallback is None else fallback * SVGProcessor.UNIT_MM['px']
+            return length[0] * SVGProcessor.UNIT_MM[length[1]]
+
+        width = size('width', view_box[2] if view_box else None)
+        height = size('height', view_box[3] if view_box else None)
+
+        matrix = np.eye(3)
+        if view_box:
+            vx, vy, vw, vh = view_box
+            width = width or (height * vw / vh if height else vw * SVGProcessor.UNIT_MM['px'])
+            height = height or width * vh / vw
+            scale = min(width / vw, height / vh)
+            matrix[0, 0] = matrix[1, 1] = scale
+            matrix[0, 2] = (width - vw * scale) / 2 - vx * scale
+            matrix[1, 2] = (height - vh * scale) / 2 - vy * scale
+        else:
+            matrix[0, 0] = matrix[1, 1] = SVGProcessor.UNIT_MM['px']
+        return matrix, width, height
+
+    @staticmethod
+    def stream(svg_path, tolerance=None):
+        """
+        Open an SVG for streaming path extraction
+
+        The file is read incrementally with iterparse. Each path or basic
+        shape (rect, circle, ellipse, line, polyline, polygon) is flattened
+        as soon as its closing tag is read, mapped through its composed
+        transform in one NumPy operation, and then dropped from the tree,
+        so memory stays bounded however large the file is. Coordinates come
+        out in mm at the document's physical size (viewBox and width/height
+        units applied).
+
+        Args:
+            svg_path: Path to the SVG file
+            tolerance: Curve flattening tolerance in mm (default: 0.01)
+
+        Returns:
+            width: Document width in mm (None if the file gives no size)
+            height: Document height in mm (None if the file gives no size)
+            paths: Iterator yielding paths in mm, y-down like the SVG itself
+        """
+        paths = SVGProcessor._iter_paths(svg_path, 0.01 if tolerance is None else tolerance)
+        width, height = next(paths)
+        return width, height, paths
+
+    @staticmethod
+    def _iter_paths(svg_path, tolerance):
+        """Generator behind stream(): yields (width, height) first, then paths"""
+        # Stack of (element, matrix, skipped) for the elements currently open
+        stack = []
+        for event, elem in ET.iterparse(svg_path, events=('start', 'end')):
+            if event == 'start':
+                if not stack:
+                    matrix, width, height = SVGProcessor.viewport_matrix(elem)
+                    yield width, height
+                    stack.append((elem, matrix, False))
+                    continue
+                parent, parent_matrix, skipped = stack[-1]
+                tag = elem.tag.rsplit('}', 1)[-1]
+                skipped = skipped or tag in SVGProcessor.NON_RENDERED or elem.get('display') == 'none'
+                matrix = parent_matrix if skipped else parent_matrix @ SVGProcessor.parse_transform(elem.get('transform'))
+                stack.append((elem, matrix, skipped))
+                continue
+
+            elem, matrix, skipped = stack.pop()
+            d = None if skipped else SVGProcessor.shape_path_data(elem.tag.rsplit('}', 1)[-1], elem)
+            if stack:
+                # Everything before this element has been handled already
+                del stack[-1][0][:]
+            if d is None:
+                continue
+
+            # Flatten in user units, with the tolerance scaled back from mm
+            scale = np.sqrt(abs(np.linalg.det(matrix[:2, :2]))) or 1.0
+            subpaths = [sp for sp in SVGProcessor.parse_path_data(d, tolerance / scale) if len(sp) >= 2]
+            if not subpaths:
+                continue
+            points = np.concatenate([np.asarray(sp, dtype=np.float64) for sp in subpaths])
+            points = points @ matrix[:2, :2].T + matrix[:2, 2]
+            for part in np.split(points, np.cumsum([len(sp) for sp in subpaths])[:-1]):
+                yield part.tolist()
+
+    @staticmethod
+    def load_and_process(svg_path, tolerance=None):
+        """
+        Load SVG and extract paths
+
+        Args:
+            svg_path: Path to the SVG file
+            tolerance: Curve flattening tolerance in mm (default: 0.01)
+
+        Returns:
+            paths: List of paths in mm, y-down like the SVG itself
+            width: Document width in mm
+            height: Document height in mm
+        """
+        width, height, path_iter = SVGProcessor.stream(svg_path, tolerance)
+        paths = list(path_iter)
+
+        if width is None or height is None:
+            # No size information at all - use the drawing's extents
+            all_points = np.concatenate([np.asarray(p) for p in paths]) if paths else np.zeros((1, 2))
+            width, height = np.max(all_points, axis=0).tolist()
+
         return paths, width, height
 
 
-def remove_duplicate_paths(paths, distance_threshold=5.0):
+class DXFProcessor:
+    """
+    Read DXF files into paths with a single streaming pass over the group codes.
+
+    Only the ENTITIES section is read, one entity at a time, so multi-megabyte
+    drawings never build an object model. Curves are flattened adaptively so
+    no point strays more than the chord tolerance from the true curve.
+    """
+
+    SUPPORTED = ('LINE', 'LWPOLYLINE', 'POLYLINE', 'ARC', 'CIRCLE', 'ELLIPSE', 'SPLINE')
+
+    # Default chord tolerance by $INSUNITS (1 = inch, 4 = mm), 0.001 when unitless
+    DEFAULT_TOLERANCE = {1: 0.0005, 4: 0.01}
+
+    @staticmethod
+    def iter_tags(f):
+        """Yield (group code, value) pairs from an ASCII DXF file object"""
+        readline = f.readline
+        while True:
+            code = readline()
+            value = readline()
+            if not value:
+                return
+            try:
+                code = int(code)
+            except ValueError:
+                return  # truncated or damaged file - keep what was read so far
+            yield code, value.strip()
+
+    @staticmethod
+    def iter_entities(f):
+        """
+        Yield (entity type, tags) for every entity in the ENTITIES section.
+
+        POLYLINE vertices are gathered into their POLYLINE as
+        ('VERTEX', tags) entries in its tag list.
+        """
+        tags_iter = DXFProcessor.iter_tags(f)
+        for code, value in tags_iter:
+            if code == 2 and value == 'ENTITIES':
+                break
+        else:
+            return
+
+        entity, tags = None, []
+        polyline = None
+        for code, value in tags_iter:
+            if code != 0:
+                tags.append((code, value))
+                continue
+
+            # A new entity starts - finish the previous one
+            if entity == 'VERTEX' and polyline is not None:
+                polyline[1].append(('VERTEX', tags))
+            elif entity == 'POLYLINE':
+                polyline = (entity, tags)
+            elif entity == 'SEQEND' and polyline is not None:
+                yield polyline
+                polyline = None
+            elif entity is not None:
+                yield entity, tags
+
+            if value in ('ENDSEC', 'EOF'):
+                return
+            entity, tags = value, []
+
+    @staticmethod
+    def arc_points(cx, cy, r, start, sweep, tolerance):
+        """Points along a circular arc, with segment count set by the chord tolerance"""
+        if r <= tolerance:
+            n = 1
+        else:
+            step = 2 * np.arccos(max(-1.0, 1 - tolerance / r))
+            n = max(1, int(np.ceil(abs(sweep) / step)))
+        t = start + sweep * np.linspace(0, 1, n + 1)
+        return np.column_stack((cx + r * np.cos(t), cy + r * np.sin(t)))
+
+    @staticmethod
+    def bulge_points(vertices, bulges, closed, tolerance):
+        """Flatten a polyline with bulges (arc segments) into points"""
+        if closed and len(vertices) > 1:
+            vertices = np.vstack((vertices, vertices[:1]))
+        if not np.any(bulges[:len(vertices) - 1]):
+            return vertices
+
+        points = [vertices[:1]]
+        for (p1, p2), b in zip(zip(vertices[:-1], vertices[1:]), bulges):
+            chord = np.hypot(*(p2 - p1))
+            if b == 0 or chord == 0:
+                points.append(p2[None])
+                continue
+            sweep = 4 * np.arctan(b)
+            # Centre sits on the chord's perpendicular bisector, left of it for b > 0
+            normal = np.array([-(p2 - p1)[1], (p2 - p1)[0]]) / chord
+            centre = (p1 + p2) / 2 + normal * chord * (1 - b * b) / (4 * b)
+            r = chord * (1 + b * b) / (4 * abs(b))
+            start = np.arctan2(p1[1] - centre[1], p1[0] - centre[0])
+            points.append(DXFProcessor.arc_points(centre[0], centre[1], r, start, sweep, tolerance)[1:])
+        return np.vstack(points)
+
+    @staticmethod
+    def refine(evaluate, params, tolerance, max_depth=12):
+        """
+        Adaptively sample a parametric curve.
+
+        Every interval whose midpoint lies further than tolerance from its
+        chord is split, with all midpoints of a round evaluated at once.
+
+        Args:
+            evaluate: Function mapping an array of parameters to Nx2 points
+            params: Initial sorted parameter values
+            tolerance: Maximum chord deviation
+            max_depth: Maximum number of refinement rounds
+
+        Returns:
+            Nx2 array of points
+        """
+        params = np.asarray(params, dtype=np.float64)
+        points = evaluate(params)
+        for _ in range(max_depth):
+            mids = (params[:-1] + params[1:]) / 2
+            mid_points = evaluate(mids)
+            chord = points[1:] - points[:-1]
+            chord_len = np.hypot(chord[:, 0], chord[:, 1])
+            offset = mid_points - points[:-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                deviation = np.where(chord_len > 0,
+                                     np.abs(chord[:, 0] * offset[:, 1] - chord[:, 1] * offset[:, 0]) / chord_len,
+                                     np.hypot(offset[:, 0], offset[:, 1]))
+            split = deviation > tolerance
+            if not np.any(split):
+                break
+            order = np.argsort(np.concatenate((params, mids[split])), kind='stable')
+            params = np.concatenate((params, mids[split]))[order]
+            points = np.concatenate((points, mid_points[split]))[order]
+        return points
+
+    @staticmethod
+    def bspline(control, knots, degree, weights=None):
+        """
+        Return a vectorized evaluator for a (rational) B-spline
+
+        Args:
+            control: Nx2 control points
+            knots: Knot vector (len N + degree + 1)
+            degree: Spline degree
+            weights: Optional control point weights
+
+        Returns:
+            Function mapping an array of parameters to Nx2 points
+        """
+        w = np.ones(len(control)) if weights is None else weights
+        homogeneous = np.column_stack((control * w[:, None], w))
+        knots = np.asarray(knots, dtype=np.float64)
+        lo, hi = degree, len(control)
+
+        def evaluate(u):
+            u = np.clip(u, knots[lo], knots[hi])
+            # Knot span for each parameter (de Boor's algorithm, all at once)
+            k = np.clip(np.searchsorted(knots, u, side='right') - 1, lo, hi - 1)
+            d = np.stack([homogeneous[k - degree + j] for j in range(degree + 1)], axis=1)
+            for r in range(1, degree + 1):
+                for j in range(degree, r - 1, -1):
+                    left = knots[k + j - degree]
+                    right = knots[k + 1 + j - r]
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        alpha = np.where(right > left, (u - left) / (right - left), 0.0)
+                    d[:, j] = (1 - alpha)[:, None] * d[:, j - 1] + alpha[:, None] * d[:, j]
+            result = d[:, degree]
+            return result[:, :2] / result[:, 2:3]
+
+        return evaluate
+
+    @staticmethod
+    def entity_points(entity, tags, tolerance):
+        """
+        Convert one entity to a list of point arrays (most entities give one)
+
+        Returns:
+            List of Nx2 arrays, or None if the entity type is not supported
+        """
+        values = {}
+        for code, value in tags:
+            if code != 'VERTEX' and code not in values:
+                values[code] = value
+
+        def num(code, default=0.0):
+            return float(values.get(code, default))
+
+        if entity == 'LINE':
+            return [np.array([[num(10), num(20)], [num(11), num(21)]])]
+
+        if entity in ('ARC', 'CIRCLE'):
+            if entity == 'CIRCLE':
+                start, sweep = 0.0, 2 * np.pi
+            else:
+                start = np.radians(num(50))
+                sweep = (np.radians(num(51)) - start) % (2 * np.pi) or 2 * np.pi
+            return [DXFProcessor.arc_points(num(10), num(20), num(40), start, sweep, tolerance)]
+
+        if entity == 'ELLIPSE':
+            cx, cy = num(10), num(20)
+            mx, my = num(11), num(21)
+            ratio = num(40, 1.0)
+            start, end = num(41), num(42, 2 * np.pi)
+            if end <= start:
+                end += 2 * np.pi
+
+            def evaluate(t):
+                cos_t, sin_t = np.cos(t), np.sin(t)
+                return np.column_stack((cx + mx * cos_t - ratio * my * sin_t,
+                                        cy + my * cos_t + ratio * mx * sin_t))
+
+            return [DXFProcessor.refine(evaluate, np.linspace(start, end, 9), tolerance)]
+
+        if entity == 'LWPOLYLINE':
+            vertices, bulges = [], []
+            for code, value in tags:
+                if code == 10:
+                    vertices.append([float(value), 0.0])
+                    bulges.append(0.0)
+                elif code == 20 and vertices:
+                    vertices[-1][1] = float(value)
+                elif code == 42 and bulges:
+                    bulges[-1] = float(value)
+            closed = int(values.get(70, 0)) & 1
+            return [DXFProcessor.bulge_points(np.array(vertices).reshape(-1, 2), np.array(bulges),
+                                              closed, tolerance)]
+
+        if entity == 'POLYLINE':
+            flags = int(values.get(70, 0))
+            if flags & (16 | 64):
+                return []  # polygon and polyface meshes are surfaces, not outlines
+            vertices, bulges = [], []
+            for code, vertex in tags:
+                if code != 'VERTEX':
+                    continue
+                v = dict(vertex)
+                if int(v.get(70, 0)) & 16:
+                    continue  # spline frame control point
+                vertices.append([float(v.get(10, 0)), float(v.get(20, 0))])
+                bulges.append(float(v.get(42, 0)))
+            return [DXFProcessor.bulge_points(np.array(vertices).reshape(-1, 2), np.array(bulges),
+                                              flags & 1, tolerance)]
+
+        if entity == 'SPLINE':
+            degree = int(values.get(71, 3))
+            closed = int(values.get(70, 0)) & 1
+            knots, weights, control, fit = [], [], [], []
+            for code, value in tags:
+                if code == 40:
+                    knots.append(float(value))
+                elif code == 41:
+                    weights.append(float(value))
+                elif code == 10:
+                    control.append([float(value), 0.0])
+                elif code == 20 and control:
+                    control[-1][1] = float(value)
+                elif code == 11:
+                    fit.append([float(value), 0.0])
+                elif code == 21 and fit:
+                    fit[-1][1] = float(value)
+
+            control = np.array(control).reshape(-1, 2)
+            if len(control) <= degree or len(knots) != len(control) + degree + 1:
+                # No usable control net - follow the fit points instead
+                fit = np.array(fit).reshape(-1, 2)
+                if closed and len(fit) > 1:
+                    fit = np.vstack((fit, fit[:1]))
+                return [fit]
+
+            w = np.array(weights) if len(weights) == len(control) else None
+            evaluate = DXFProcessor.bspline(control, knots, degree, w)
+            spans = np.unique(knots[degree:len(control) + 1])
+            params = np.unique(np.concatenate([np.linspace(a, b, 3) for a, b in zip(spans[:-1], spans[1:])]))
+            return [DXFProcessor.refine(evaluate, params, tolerance)]
+
+        return None
+
+    @staticmethod
+    def join_paths(paths, tolerance):
+        """
+        Chain paths whose endpoints meet (within tolerance) into longer paths.
+
+        Endpoints are matched through a hash grid, so this stays fast for the
+        thousands of LINE/ARC pieces that CAD exports are often made of.
+        """
+        def key(point):
+            return (round(point[0] / tolerance), round(point[1] / tolerance))
+
+        ends = {}
+        for i, path in enumerate(paths):
+            for end in (0, -1):
+                ends.setdefault(key(path[end]), []).append(i)
+
+        used = [False] * len(paths)
+        joined = []
+        for i in range(len(paths)):
+            if used[i]:
+                continue
+            used[i] = True
+            chain = list(map(tuple, paths[i]))
+            # Grow the chain from its end, then turn it round and grow the other end
+            for _ in range(2):
+                while key(chain[0]) != key(chain[-1]) or len(chain) <= 2:
+                    tip = key(chain[-1])
+                    nxt = next((j for j in ends.get(tip, []) if not used[j]), None)
+                    if nxt is None:
+                        break
+                    used[nxt] = True
+                    piece = list(map(tuple, paths[nxt]))
+                    if key(piece[0]) != tip:
+                        piece.reverse()
+                    chain.extend(piece[1:])
+                chain.reverse()
+            joined.append(chain)
+        return joined
+
+    @staticmethod
+    def read_entities(dxf_path, tolerance=None):
+        """
+        Flatten every supported entity of a DXF file
+
+        Args:
+            dxf_path: Path to the DXF file
+            tolerance: Chord tolerance for curves in drawing units
+                       (default: 0.01 for mm drawings, 0.0005 for inch)
+
+        Returns:
+            pieces: List of Nx2 arrays in drawing coordinates (y-up)
+            units: $INSUNITS code of the drawing (0 when unitless)
+            skipped: Dictionary of unsupported entity names and their counts
+        """
+        units = 0
+        with open(dxf_path, 'r', encoding='utf-8', errors='replace') as f:
+            # $INSUNITS sits in the HEADER, before any entity
+            for code, value in DXFProcessor.iter_tags(f):
+                if code == 9 and value == '$INSUNITS':
+                    units = int(next(DXFProcessor.iter_tags(f))[1])
+                    break
+                if code == 2 and value == 'ENTITIES':
+                    break
+            f.seek(0)
+            if tolerance is None:
+                tolerance = DXFProcessor.DEFAULT_TOLERANCE.get(units, 0.001)
+
+            pieces = []
+            skipped = {}
+            for entity, tags in DXFProcessor.iter_entities(f):
+                points = DXFProcessor.entity_points(entity, tags, tolerance)
+                if points is None:
+                    skipped[entity] = skipped.get(entity, 0) + 1
+                    continue
+                pieces.extend(p for p in points if len(p) >= 2)
+
+        return pieces, units, skipped
+
+    @staticmethod
+    def load_and_process(dxf_path, tolerance=None):
+        """
+        Load a DXF file and extract paths
+
+        Args:
+            dxf_path: Path to the DXF file
+            tolerance: Chord tolerance for curves in drawing units
+                       (default: 0.01 for mm drawings, 0.0005 for inch)
+
+        Returns:
+            paths: List of paths in a y-down frame starting at (0, 0),
+                   the same convention as image and SVG input
+            width: Drawing width (extents)
+            height: Drawing height (extents)
+        """
+        pieces, units, skipped = DXFProcessor.read_entities(dxf_path, tolerance)
+        if tolerance is None:
+            tolerance = DXFProcessor.DEFAULT_TOLERANCE.get(units, 0.001)
+
+        if skipped:
+            print("Skipped unsupported DXF entities: " +
+                  ", ".join(f"{name} x{count}" for name, count in sorted(skipped.items())))
+        if not pieces:
+            return [], 0, 0
+
+        all_points = np.vstack(pieces)
+        min_x, min_y = all_points.min(axis=0)
+        max_x, max_y = all_points.max(axis=0)
+        width = max_x - min_x or max_y - min_y or 1.0
+        height = max_y - min_y or width
+
+        # DXF is y-up; flip into the y-down frame the rest of the pipeline expects
+        paths = [np.column_stack((p[:, 0] - min_x, max_y - p[:, 1])).tolist() for p in pieces]
+        paths = DXFProcessor.join_paths(paths, tolerance)
+
+        return paths, float(width), float(height)
+
+
+class C2DProcessor:
+    """
+    Read the vector geometry of Carbide Create (.c2d) projects.
+
+    Current projects are SQLite databases: every drawing element is a
+    zlib-compressed JSON record in the items table and the stock settings
+    are key/value rows in params. Older projects are a single JSON document
+    holding the same element records. Projects are opened read-only.
+    """
+
+    # Stock settings, as named in the params table (upper-case in old projects)
+    STOCK_KEYS = ('width', 'height', 'thickness', 'material', 'machine', 'retract')
+
+    @staticmethod
+    def read_project(c2d_path):
+        """
+        Read the drawing elements, stock settings and tools of a project
+
+        Returns:
+            elements: List of element records (dicts)
+            stock: Dictionary of the STOCK_KEYS settings that are present
+            tools: List of the distinct tools used by the project's toolpaths,
+                   as dicts with number, name and diameter (mm)
+        """
+        with open(c2d_path, 'rb') as f:
+            header = f.read(16)
+
+        if header.startswith(b'SQLite format 3'):
+            uri = Path(c2d_path).resolve().as_uri() + '?mode=ro'
+            import sqlite3
+            conn = sqlite3.connect(uri, uri=True)
+            try:
+                params = dict(conn.execute("SELECT key, value FROM params"))
+                elements = []
+                toolpaths = []
+                for item_type, size, data in conn.execute(
+                        "SELECT type, sz, data FROM items WHERE type IN ('element', 'toolpath') ORDER BY id"):
+                    # sqlar convention: blobs smaller than their original size are compressed
+                    data = bytes(data)
+                    record = json.loads(zlib.decompress(data) if len(data) < size else data)
+                    (elements if item_type == 'element' else toolpaths).append(record)
+            finally:
+                conn.close()
+        else:
+            # Old projects: a JSON document, followed by a binary model section
+            with open(c2d_path, 'rb') as f:
+                text = f.read().decode('utf-8', errors='replace')
+            project, _ = json.JSONDecoder().raw_decode(text.lstrip())
+            params = {k.lower(): v for k, v in project.get('DOCUMENT_VALUES', {}).items()}
+            elements = [elem for key, records in project.items()
+                        if key.endswith('_OBJECTS') and not key.startswith('TOOLPATH')
+                        for elem in records]
+            toolpaths = [toolpath for group in project.get('TOOLPATH_GROUP_OBJECTS', [])
+                         for toolpath in group.get('TOOLPATH_OBJECTS', [])]
+
+        stock = {}
+        for key in C2DProcessor.STOCK_KEYS:
+            if key in params:
+                try:
+                    stock[key] = float(params[key])
+                except (TypeError, ValueError):
+                    stock[key] = params[key]
+
+        tools = []
+        for toolpath in toolpaths:
+            tool = toolpath.get('tool') or {}
+            entry = {'number': tool.get('number'), 'name': tool.get('name') or tool.get('model') or '',
+                     'diameter': tool.get('diameter')}
+            if tool and entry not in tools:
+                tools.append(entry)
+        return elements, stock, tools
+
+    @staticmethod
+    def element_paths(elem, tolerance):
+        """
+        Flatten one element into point arrays in project coordinates (mm, y-up)
+
+        Paths, circles and rectangles share one record layout: points with a
+        point_type each (0 start, 1 line, 3 cubic through cp1/cp2, 4 close),
+        relative to the element's position. Text records carry their glyph
+        outlines already flattened, plus a Qt-style 3x3 transform.
+
+        Returns:
+            List of Nx2 arrays, or None if the element has no geometry
+        """
+        if elem.get('geometryType') == 'text':
+            outlines = [np.asarray(o, dtype=np.float64) for o in elem.get('rendered') or [] if len(o) >= 2]
+            if not outlines:
+                return None
+            m = np.asarray(elem.get('transform') or np.eye(3).ravel(), dtype=np.float64).reshape(3, 3)
+            return [o @ m[:2, :2] + m[2, :2] for o in outlines]
+
+        point_types = elem.get('point_type') or []
+        if len(point_types) < 2:
+            return None
+        offset = np.asarray(elem.get('position') or (0, 0), dtype=np.float64)
+        points = np.asarray(elem['points'], dtype=np.float64) + offset
+
+        closed = point_types[-1] == 4
+        count = len(point_types) - 1 if closed else len(point_types)
+        cubic = [i for i in range(1, count) if point_types[i] == 3]
+        flattened = {}
+        if cubic:
+            cp1 = np.asarray(elem['cp1'], dtype=np.float64)[cubic] + offset
+            cp2 = np.asarray(elem['cp2'], dtype=np.float64)[cubic] + offset
+            curves = np.stack((points[[i - 1 for i in cubic]], cp1, cp2, points[cubic]), axis=1)
+            flattened = dict(zip(cubic, SVGProcessor.flatten_cubics(curves, tolerance)))
+
+        pieces = [points[:1]]
+        for i in range(1, count):
+            pieces.append(flattened[i] if i in flattened else points[i:i + 1])
+        if closed and not np.allclose(pieces[-1][-1], points[0]):
+            pieces.append(points[:1])
+        return [np.vstack(pieces)]
+
+    @staticmethod
+    def load_and_process(c2d_path, tolerance=None):
+        """
+        Load a Carbide Create project and extract its vector geometry
+
+        Elements on hidden layers are left out. Coordinates are in mm on the
+        project's stock, flipped into the y-down frame of the pipeline.
+
+        Args:
+            c2d_path: Path to the .c2d file
+            tolerance: Curve flattening tolerance in mm (default: 0.01)
+
+        Returns:
+            paths: List of paths in mm
+            width: Stock width in mm (drawing extents if not set)
+            height: Stock height in mm (drawing extents if not set)
+        """
+        if tolerance is None:
+            tolerance = 0.01
+        elements, stock, _ = C2DProcessor.read_project(c2d_path)
+
+        pieces = []
+        for elem in elements:
+            if not elem.get('layer', {}).get('visible', True):
+                continue
+            points = C2DProcessor.element_paths(elem, tolerance)
+            if points:
+                pieces.extend(points)
+        if not pieces:
+            return [], 0, 0
+
+        width, height = stock.get('width'), stock.get('height')
+        if not width or not height:
+            width, height = np.vstack(pieces).max(axis=0).tolist()
+
+        paths = [np.column_stack((p[:, 0], height - p[:, 1])).tolist() for p in pieces]
+        return paths, float(width), float(height)
+
+
+class TextProcessor:
+    """
+    Lay out text in a TrueType/OpenType font and flatten the glyph outlines.
+
+    Outlines come from fontTools (composites decomposed, quadratic and cubic
+    curves flattened like SVG paths) and kerning from the font's GPOS 'kern'
+    feature or legacy kern table. Each glyph is flattened once per font,
+    size and tolerance and kept in an LRU cache, so repeated letters only
+    cost an offset.
+    """
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def load_font(font_path):
+        """
+        Open a font file
+
+        Returns:
+            (glyph set, cmap, units per em, kerning function)
+        """
+        try:
+            from fontTools.ttLib import TTFont
+        except ImportError:
+            raise ImportError("Text input requires fontTools. Install with: pip install fonttools")
+        font = TTFont(font_path)
+        return font.getGlyphSet(), font.getBestCmap() or {}, font['head'].unitsPerEm, TextProcessor.kerning(font)
+
+    @staticmethod
+    def kerning(font):
+        """
+        Build a kerning function for a font
+
+        Returns:
+            kern(left_glyph, right_glyph) -> adjustment in font units
+        """
+        lookups = []
+        if 'GPOS' in font and font['GPOS'].table.FeatureList:
+            gpos = font['GPOS'].table
+            indices = sorted({i for record in gpos.FeatureList.FeatureRecord if record.FeatureTag == 'kern'
+                              for i in record.Feature.LookupListIndex})
+            for index in indices:
+                lookup = gpos.LookupList.Lookup[index]
+                subtables = lookup.SubTable
+                if lookup.LookupType == 9:
+                    subtables = [sub.ExtSubTable for sub in subtables if sub.ExtensionLookupType == 2]
+                elif lookup.LookupType != 2:
+                    continue
+                lookups.append([TextProcessor._pair_subtable(sub) for sub in subtables])
+        elif 'kern' in font:
+            pairs = {}
+            for table in font['kern'].kernTables:
+                pairs.update(getattr(table, 'kernTable', {}))
+            lookups.append([pairs.get])
+
+        memo = {}
+
+        def kern(left, right):
+            key = (left, right)
+            if key not in memo:
+                total = 0
+                for subtables in lookups:
+                    # Within a lookup the first subtable that covers the pair applies
+                    for pair_value in subtables:
+                        value = pair_value(key)
+                        if value is not None:
+                            total += value
+                            break
+                memo[key] = total
+            return memo[key]
+
+        return kern
+
+    @staticmethod
+    def _pair_subtable(sub):
+        """Lookup function for one GPOS PairPos subtable: (left, right) -> XAdvance or None"""
+        def x_advance(value):
+            return getattr(value, 'XAdvance', 0) or 0 if value is not None else 0
+
+        if sub.Format == 1:
+            pairs = {}
+            for first, pair_set in zip(sub.Coverage.glyphs, sub.PairSet):
+                for record in pair_set.PairValueRecord:
+                    pairs.setdefault((first, record.SecondGlyph), x_advance(record.Value1))
+            return pairs.get
+
+        covered = set(sub.Coverage.glyphs)
+        class1 = sub.ClassDef1.classDefs if sub.ClassDef1 else {}
+        class2 = sub.ClassDef2.classDefs if sub.ClassDef2 else {}
+
+        def pair_value(pair):
+            if pair[0] not in covered:
+                return None
+            record = sub.Class1Record[class1.get(pair[0], 0)].Class2Record[class2.get(pair[1], 0)]
+            return x_advance(record.Value1)
+
+        return pair_value
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def glyph_outline(font_path, glyph_name, size, tolerance):
+        """
+        Flattened outline of one glyph, relative to its origin
+
+        Args:
+            font_path: Font file
+            glyph_name: Glyph to draw
+            size: Font size (em height) in output units
+            tolerance: Curve flattening tolerance in output units
+
+        Returns:
+            Tuple of Nx2 arrays, y-up
+        """
+        from fontTools.pens.svgPathPen import SVGPathPen
+
+        glyph_set, _, units_per_em, _ = TextProcessor.load_font(font_path)
+        scale = size / units_per_em
+        pen = SVGPathPen(glyph_set)
+        glyph_set[glyph_name].draw(pen)
+        subpaths = SVGProcessor.parse_path_data(pen.getCommands(), tolerance / scale)
+        outlines = []
+        for sp in subpaths:
+            if len(sp) >= 2:
+                points = np.asarray(sp, dtype=np.float64) * scale
+                points.flags.writeable = False
+                outlines.append(points)
+        return tuple(outlines)
+
+    @staticmethod
+    def layout(text, font_path, size, tolerance=0.01, letter_spacing=0.0, line_spacing=1.2, align='left'):
+        """
+        Lay out text and return its flattened outlines
+
+        Args:
+            text: Text to lay out; newlines start new lines
+            font_path: TTF/OTF font file
+            size: Font size (em height) in output units
+            tolerance: Curve flattening tolerance in output units
+            letter_spacing: Extra space added after every character
+            line_spacing: Distance between baselines as a multiple of size
+            align: 'left', 'center' or 'right'
+
+        Returns:
+            List of Nx2 arrays, y-up with the first baseline at y = 0
+        """
+        glyph_set, cmap, units_per_em, kern = TextProcessor.load_font(str(font_path))
+        scale = size / units_per_em
+        missing = set()
+
+        lines = []
+        for line in text.split('\n'):
+            names = []
+            for char in line:
+                name = cmap.get(ord(char))
+                if name is None:
+                    missing.add(char)
+                    name = '.notdef' if '.notdef' in glyph_set else None
+                if name is not None:
+                    names.append(name)
+
+            placed = []
+            x = 0.0
+            for i, name in enumerate(names):
+                placed.append((name, x))
+                x += glyph_set[name].width * scale + letter_spacing
+                if i + 1 < len(names):
+                    x += kern(name, names[i + 1]) * scale
+            lines.append((placed, x - letter_spacing if names else 0.0))
+
+        if missing:
+            print(f"Warning: font has no glyph for: {' '.join(sorted(missing))}")
+
+        widest = max(width for _, width in lines)
+        outlines = []
+        for row, (placed, width) in enumerate(lines):
+            shift = {'center': (widest - width) / 2, 'right': widest - width}.get(align, 0.0)
+            offset_y = -row * size * line_spacing
+            for name, x in placed:
+                for outline in TextProcessor.glyph_outline(str(font_path), name, size, tolerance):
+                    outlines.append(outline + (x + shift, offset_y))
+        return outlines
+
+    @staticmethod
+    def load_and_process(font_path, text, size=25.0, tolerance=None, letter_spacing=0.0,
+                         line_spacing=1.2, align='left'):
+        """
+        Lay out text as paths for the rest of the pipeline
+
+        Args:
+            font_path: TTF/OTF font file
+            text: Text to engrave; newlines start new lines
+            size: Font size (em height) in mm
+            tolerance: Curve flattening tolerance in mm (default: 0.01)
+            letter_spacing: Extra space after every character in mm
+            line_spacing: Distance between baselines as a multiple of size
+            align: 'left', 'center' or 'right'
+
+        Returns:
+            paths: List of paths in mm, in a y-down frame starting at (0, 0)
+            width: Text width in mm
+            height: Text height in mm
+        """
+        if tolerance is None:
+            tolerance = 0.01
+        outlines = TextProcessor.layout(text, font_path, size, tolerance, letter_spacing, line_spacing, align)
+        if not outlines:
+            return [], 0, 0
+
+        all_points = np.vstack(outlines)
+        min_x, min_y = all_points.min(axis=0)
+        max_x, max_y = all_points.max(axis=0)
+        paths = [np.column_stack((o[:, 0] - min_x, max_y - o[:, 1])).tolist() for o in outlines]
+        return paths, float(max_x - min_x), float(max_y - min_y)
+
+
+def remove_duplicate_paths(paths, distance_threshold=5.0):
+    """
+    Remove duplicate or very close parallel paths.
+    This fixes the "double line" issue when both edges of a thick line are detected.
+    
+    Args:
+        paths: List of paths
+        distance_threshold: Maximum distance between paths to consider them duplicates
+    
+    Returns:
+        Filtered list of paths with duplicates removed
+    """
+    if len(paths) <= 1:
+        return paths
+    
+    # Calculate representative points for each path (centroid)
+    path_centroids = []
+    for path in paths:
+        if len(path) > 0:
+            xs = [p[0] for p in path]
+            ys = [p[1] for p in path]
+            centroid = (np.mean(xs), np.mean(ys))
+            path_centroids.append(centroid)
+        else:
+            path_centroids.append(None)
+    
+    # Mark paths to keep
+    keep = [True] * len(paths)
+    
+    for i in range(len(paths)):
+        if not keep[i] or path_centroids[i] is None:
+            continue
+            
+        for j in range(i + 1, len(paths)):
+            if not keep[j] or path_centroids[j] is None:
+                continue
+            
+            # Check if centroids are very close
+            dx = path_centroids[i][0] - path_centroids[j][0]
+            dy = path_centroids[i][1] - path_centroids[j][1]
+            dist = np.sqrt(dx*dx + dy*dy)
+            
+            # If paths are very close, keep the longer one
+            if dist < distance_threshold:
+                if len(paths[i]) >= len(paths[j]):
+                    keep[j] = False
+                else:
+                    keep[i] = False
+                    break
+    
+    # Return filtered paths
+    filtered = [paths[i] for i in range(len(paths)) if keep[i]]
+    return filtered
+
+
+def merge_close_endpoints(paths, merge_threshold=10.0):
+    """
+    Merge paths that have endpoints very close together.
+    This helps create continuous paths from broken line segments.
+    """
+    if len(paths) <= 1:
+        return paths
+    
+    merged = True
+    result_paths = list(paths)
+    
+    while merged and len(result_paths) > 1:
+        merged = False
+        
+        for i in range(len(result_paths)):
+            if i >= len(result_paths):
+                break
+                
+            path1 = result_paths[i]
+            if len(path1) < 2:
+                continue
+            
+            start1 = path1[0]
+            end1 = path1[-1]
+            
+            for j in range(i + 1, len(result_paths)):
+                if j >= len(result_paths):
+                    break
+                    
+                path2 = result_paths[j]
+                if len(path2) < 2:
+                    continue
+                
+                start2 = path2[0]
+                end2 = path2[-1]
+                
+                # Check all possible connections
+                connections = [
+                    ('end1_start2', end1, start2, lambda: path1 + path2),
+                    ('end1_end2', end1, end2, lambda: path1 + path2[::-1]),
+                    ('start1_start2', start1, start2, lambda: path1[::-1] + path2),
+                    ('start1_end2', start1, end2, lambda: path1[::-1] + path2[::-1]),
+                ]
+                
+                for conn_type, pt1, pt2, merge_func in connections:
+                    dist = np.sqrt((pt1[0] - pt2[0])**2 + (pt1[1] - pt2[1])**2)
+                    
+                    if dist < merge_threshold:
+                        # Merge the paths
+                        result_paths[i] = merge_func()
+                        result_paths.pop(j)
+                        merged = True
+                        break
+                
+                if merged:
+                    break
+            
+            if merged:
+                break
+    
+    return result_paths
+
+
+def order_paths(paths, start=(0.0, 0.0)):
+    """
+    Reorder paths with a nearest-neighbour tour to shorten the rapid moves
+    between them. Open paths may be cut from either end; closed paths keep
+    their direction.
+
+    Args:
+        paths: List of paths
+        start: (x, y) tool position before the first path
+
+    Returns:
+        Paths in the new order (open paths possibly reversed)
+    """
+    paths = [path for path in paths if len(path) > 0]
+    if len(paths) < 2:
+        return paths
+
+    starts = np.array([path[0] for path in paths], dtype=float)
+    ends = np.array([path[-1] for path in paths], dtype=float)
+    reversible = np.any(starts != ends, axis=1)
+    to_start = np.empty(len(paths))
+    to_end = np.empty(len(paths))
+    done = np.zeros(len(paths), dtype=bool)
+
+    ordered = []
+    pos = np.asarray(start, dtype=float)
+    for _ in range(len(paths)):
+        np.hypot(starts[:, 0] - pos[0], starts[:, 1] - pos[1], out=to_start)
+        np.hypot(ends[:, 0] - pos[0], ends[:, 1] - pos[1], out=to_end)
+        to_start[done] = np.inf
+        to_end[done | ~reversible] = np.inf
+        nearest_start = int(np.argmin(to_start))
+        nearest_end = int(np.argmin(to_end))
+        if to_end[nearest_end] < to_start[nearest_start]:
+            done[nearest_end] = True
+            ordered.append(paths[nearest_end][::-1])
+            pos = starts[nearest_end]
+        else:
+            done[nearest_start] = True
+            ordered.append(paths[nearest_start])
+            pos = ends[nearest_start]
+    return ordered
+
+
+def scale_paths(paths, src_width, src_height, target_width, target_height, flip_y=True):
+    """Scale paths from source dimensions to target dimensions"""
+    scale_x = target_width / src_width
+    scale_y = target_height / src_height
+    
+    scaled_paths = []
+    for path in paths:
+        scaled_path = []
+        for x, y in path:
+            new_x = x * scale_x
+            new_y = (src_height - y) * scale_y if flip_y else y * scale_y
+            scaled_path.append((new_x, new_y))
+        scaled_paths.append(scaled_path)
+    
+    return scaled_paths
+
+
+def resolution_decimals(resolution):
     """
-    Remove duplicate or very close parallel paths.
-    This fixes the "double line" issue when both edges of a thick line are detected.
-    
+    Decimal places needed to write coordinates on a grid of 1/resolution
+
+    One digit more than the step size needs, so the printed value always
+    rounds back to the intended machine step.
+    """
+    return max(1, min(6, int(np.ceil(np.log10(resolution))) + 1))
+
+
+def quantize_paths(paths, resolution):
+    """
+    Snap paths to the machine step grid and drop moves that no longer do anything.
+
+    Coordinates are rounded to integer steps (resolution steps per unit) for
+    the whole job at once. Points that land on the same step as the previous
+    point are removed, then interior points lying on a straight line between
+    their neighbours (checked exactly with integer cross products) are removed.
+    Reversals are kept. Paths left with fewer than 2 points are dropped.
+
     Args:
-        paths: List of paths
-        distance_threshold: Maximum distance between paths to consider them duplicates
-    
+        paths: List of paths (each path is list of (x, y) points)
+        resolution: Machine resolution in steps per unit (e.g. 80 steps/mm)
+
     Returns:
-        Filtered list of paths with duplicates removed
+        (paths, stats) - quantized paths and a dict with points_before,
+        points_after, paths_dropped and lines_removed
     """
-    if len(paths) <= 1:
-        return paths
-    
-    # Calculate representative points for each path (centroid)
-    path_centroids = []
-    for path in paths:
-        if len(path) > 0:
-            xs = [p[0] for p in path]
-            ys = [p[1] for p in path]
-            centroid = (np.mean(xs), np.mean(ys))
-            path_centroids.append(centroid)
+    points, offsets = pack_paths(paths)
+    lengths = np.diff(offsets)
+    lines_before = int(np.sum(np.where(lengths >= 2, lengths + 4, 1)))
+    steps = np.rint(points * resolution).astype(np.int64)
+    path_id = np.repeat(np.arange(len(paths)), lengths)
+
+    # Drop points on the same step as the previous point of the same path
+    is_start = np.zeros(len(steps), dtype=bool)
+    is_start[offsets[:-1][lengths > 0]] = True
+    keep = is_start.copy()
+    keep[1:] |= np.any(steps[1:] != steps[:-1], axis=1)
+    steps, path_id = steps[keep], path_id[keep]
+
+    # Drop interior points that continue straight on in the same direction
+    if len(steps) >= 3:
+        d_in = steps[1:-1] - steps[:-2]
+        d_out = steps[2:] - steps[1:-1]
+        cross = d_in[:, 0] * d_out[:, 1] - d_in[:, 1] * d_out[:, 0]
+        dot = d_in[:, 0] * d_out[:, 0] + d_in[:, 1] * d_out[:, 1]
+        interior = (path_id[:-2] == path_id[1:-1]) & (path_id[2:] == path_id[1:-1])
+        keep = np.ones(len(steps), dtype=bool)
+        keep[1:-1] = ~(interior & (cross == 0) & (dot > 0))
+        steps, path_id = steps[keep], path_id[keep]
+
+    new_lengths = np.bincount(path_id, minlength=len(paths))
+    survivors = new_lengths >= 2
+    mask = survivors[path_id]
+    new_offsets = np.concatenate(([0], np.cumsum(new_lengths[survivors])))
+    quantized = unpack_paths((steps[mask] / resolution, new_offsets))
+
+    kept_lengths = new_lengths[survivors]
+    stats = {
+        'points_before': int(offsets[-1]),
+        'points_after': int(new_offsets[-1]),
+        'paths_dropped': int(len(paths) - len(quantized)),
+        'lines_removed': lines_before - int(np.sum(kept_lengths + 4)),
+    }
+    return quantized, stats
+
+
+def path_segment_lengths(points):
+    """Length of every segment of a path, as a NumPy array"""
+    pts = np.asarray(points, dtype=float)
+    if len(pts) < 2:
+        return np.zeros(0)
+    seg = np.diff(pts, axis=0)
+    return np.hypot(seg[:, 0], seg[:, 1])
+
+
+def default_corner_accel(units):
+    """Default lateral acceleration allowed through corners (units/s^2)"""
+    return 50.0 if units == 'mm' else 2.0
+
+
+def plan_feed_rates(points, min_feed, max_feed, corner_accel):
+    """
+    Assign a feed rate to every segment of a path based on its geometry.
+
+    The turning angle at each vertex is turned into a local corner radius
+    (the radius of the fillet tangent to both neighbouring segments), and
+    the feed through that vertex is limited so the lateral acceleration
+    v^2 / r stays below corner_accel. Straight runs and gentle curves
+    get max_feed; sharp corners drop towards min_feed. Each segment runs
+    at the lower limit of its two end vertices.
+
+    Args:
+        points: List of (x, y) tuples
+        min_feed: Lowest feed rate to assign (units/min)
+        max_feed: Highest feed rate to assign (units/min)
+        corner_accel: Allowed lateral acceleration (units/s^2)
+
+    Returns:
+        NumPy array of feed rates, one per segment
+    """
+    pts = np.asarray(points, dtype=float)
+    if len(pts) < 2:
+        return np.zeros(0)
+
+    seg = np.diff(pts, axis=0)
+    seg_len = np.hypot(seg[:, 0], seg[:, 1])
+
+    # Path endpoints are plunge/retract points - no corner to slow for
+    vertex_feed = np.full(len(pts), float(max_feed))
+
+    if len(seg) >= 2:
+        a, b = seg[:-1], seg[1:]
+        cross = a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+        dot = np.sum(a * b, axis=1)
+        turn = np.abs(np.arctan2(cross, dot))  # 0 = straight, pi = reversal
+
+        # Fillet radius using half the shorter neighbouring segment
+        half_len = 0.5 * np.minimum(seg_len[:-1], seg_len[1:])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            radius = np.where(turn > 1e-9, half_len / np.tan(turn / 2), np.inf)
+
+        # v = sqrt(a * r), converted from units/s to units/min
+        corner_feed = np.sqrt(corner_accel * radius) * 60.0
+        vertex_feed[1:-1] = np.clip(corner_feed, min_feed, max_feed)
+
+    return np.minimum(vertex_feed[:-1], vertex_feed[1:])
+
+
+class ConversionError(Exception):
+    """A file could not be converted; the message says why"""
+
+
+# Raster inputs, traced by the binarize and extract stages
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes, or None where unknown"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def cpu_time():
+    """CPU seconds used by this process and its finished child processes (pool workers)"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def count_points(paths):
+    return sum(len(path) for path in paths)
+
+
+class Span:
+    """One timed phase of a conversion, recorded while a Profiler is active"""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.record = {'name': name}
+
+    def __enter__(self):
+        profiler = self.profiler
+        self.record['depth'] = profiler.depth
+        profiler.depth += 1
+        profiler.spans.append(self.record)
+        self.start = time.perf_counter()
+        self.start_cpu = cpu_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.record['seconds'] = time.perf_counter() - self.start
+        self.record['cpu_seconds'] = cpu_time() - self.start_cpu
+        rss = peak_rss()
+        self.record['peak_rss_mb'] = rss / 1e6 if rss is not None else None
+        self.profiler.depth -= 1
+
+    def paths(self, paths_in=None, paths_out=None):
+        """Record the path and point counts going into and out of the phase"""
+        if paths_in is not None:
+            self.record['paths_in'] = len(paths_in)
+            self.record['points_in'] = count_points(paths_in)
+        if paths_out is not None:
+            self.record['paths_out'] = len(paths_out)
+            self.record['points_out'] = count_points(paths_out)
+
+
+class NoSpan:
+    """Stand-in returned by profile_span() when nothing is being profiled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def paths(self, paths_in=None, paths_out=None):
+        pass
+
+
+NO_SPAN = NoSpan()
+
+
+class Profiler:
+    """
+    Collects Spans from the instrumented phases of a conversion
+
+    The phases call profile_span(name) unconditionally. With no profiler
+    active that returns the shared NO_SPAN, so leaving the instrumentation
+    in costs a function call per phase, not per point.
+
+    Example:
+        with Profiler() as profiler:
+            convert_file('sketch.png', args, profile)
+        print(profiler.spans)
+    """
+
+    active = None
+
+    def __init__(self):
+        self.spans = []
+        self.depth = 0
+
+    def __enter__(self):
+        self.previous = Profiler.active
+        Profiler.active = self
+        return self
+
+    def __exit__(self, *exc):
+        Profiler.active = self.previous
+
+
+def profile_span(name):
+    """Time a phase when a Profiler is active: with profile_span('trace') as span: ..."""
+    profiler = Profiler.active
+    return NO_SPAN if profiler is None else Span(profiler, name)
+
+
+class Drawing:
+    """
+    The state a Pipeline works on
+
+    Stages read and replace its fields. paths is the shared path buffer
+    (a list of paths, each a list of (x, y) points) every stage from
+    extraction on works on; width, height and units describe its
+    coordinate space. stats collects one record per stage run.
+    """
+
+    def __init__(self, source, params=None):
+        """
+        Args:
+            source: Path of the input file
+            params: Machining parameters, if already known
+        """
+        self.source = Path(source)
+        self.image = None          # grayscale image (raster inputs)
+        self.binary = None         # thresholded image (raster inputs)
+        self.method = None         # 'contour' or 'skeleton' (raster inputs)
+        self.paths = []
+        self.width = None
+        self.height = None
+        self.units = None          # 'mm', 'inch' or 'px'
+        self.y_up = False          # machine coordinates once transformed
+        self.params = params
+        self.meta = None           # metadata of a saved .npz toolpath
+        self.target_size = None    # (width, height) for the transform stage
+        self.outputs = []
+        self.info = {}             # notes stages leave for the caller
+        self.stats = []
+
+    @property
+    def kind(self):
+        """'image', 'toolpath' or 'vector'"""
+        ext = self.source.suffix.lower()
+        if ext in IMAGE_EXTENSIONS:
+            return 'image'
+        return 'toolpath' if ext == '.npz' else 'vector'
+
+    def point_count(self):
+        return sum(len(path) for path in self.paths)
+
+
+class Stage:
+    """
+    One step of a Pipeline
+
+    Subclasses set name and implement run(), which changes the drawing in
+    place. applies() lets a stage pass over drawings it has nothing to do
+    for, such as binarizing a vector drawing; skipped stages are still
+    recorded in the statistics.
+    """
+
+    name = 'stage'
+
+    def applies(self, drawing):
+        return True
+
+    def run(self, drawing):
+        raise NotImplementedError
+
+
+class LoadStage(Stage):
+    """Read the input: the grayscale image of a raster, or the paths of anything else"""
+
+    name = 'load'
+
+    def __init__(self, tolerance=None, text=None, font_size=25.0, letter_spacing=0.0, line_spacing=1.2,
+                 align='left'):
+        """
+        Args:
+            tolerance: Chord tolerance for flattening curves (vector inputs)
+            text, font_size, letter_spacing, line_spacing, align: Text to lay
+                out when the input is a TTF/OTF font (see TextProcessor.layout)
+        """
+        self.tolerance = tolerance
+        self.text = text
+        self.font_size = font_size
+        self.letter_spacing = letter_spacing
+        self.line_spacing = line_spacing
+        self.align = align
+
+    def run(self, drawing):
+        path = drawing.source
+        ext = path.suffix.lower()
+        drawing.units = 'mm' if ext in MM_INPUTS else 'px'
+        if ext == '.npz':
+            drawing.paths, drawing.width, drawing.height, drawing.meta = ToolpathFile.load(path)
+            drawing.units = drawing.meta['units']
+            drawing.y_up = drawing.meta['y_up']
+        elif ext in IMAGE_EXTENSIONS:
+            drawing.image = ImageProcessor.read_image(path)
+            drawing.height, drawing.width = drawing.image.shape
+        elif ext == '.svg':
+            drawing.paths, drawing.width, drawing.height = SVGProcessor.load_and_process(path, self.tolerance)
+        elif ext == '.dxf':
+            drawing.paths, drawing.width, drawing.height = DXFProcessor.load_and_process(path, self.tolerance)
+        elif ext == '.c2d':
+            drawing.paths, drawing.width, drawing.height = C2DProcessor.load_and_process(path, self.tolerance)
+        elif ext in ('.ttf', '.otf'):
+            if not self.text:
+                raise ConversionError("Font input needs the text to engrave: --text \"...\"")
+            drawing.paths, drawing.width, drawing.height = TextProcessor.load_and_process(
+                path, self.text,
+                size=self.font_size,
+                tolerance=self.tolerance,
+                letter_spacing=self.letter_spacing,
+                line_spacing=self.line_spacing,
+                align=self.align
+            )
         else:
-            path_centroids.append(None)
-    
-    # Mark paths to keep
-    keep = [True] * len(paths)
-    
-    for i in range(len(paths)):
-        if not keep[i] or path_centroids[i] is None:
-            continue
-            
-        for j in range(i + 1, len(paths)):
-            if not keep[j] or path_centroids[j] is None:
-                continue
-            
-            # Check if centroids are very close
-            dx = path_centroids[i][0] - path_centroids[j][0]
-            dy = path_centroids[i][1] - path_centroids[j][1]
-            dist = np.sqrt(dx*dx + dy*dy)
-            
-            # If paths are very close, keep the longer one
-            if dist < distance_threshold:
-                if len(paths[i]) >= len(paths[j]):
-                    keep[j] = False
-                else:
-                    keep[i] = False
-                    break
-    
-    # Return filtered paths
-    filtered = [paths[i] for i in range(len(paths)) if keep[i]]
-    return filtered
+            raise ConversionError(f"Unsupported file type: {ext}\n"
+                                  "Supported: .png, .jpg, .jpeg, .svg, .dxf, .c2d, .npz, .ttf/.otf with --text")
 
 
-def merge_close_endpoints(paths, merge_threshold=10.0):
+class BinarizeStage(Stage):
+    """Threshold a raster image into lines and background"""
+
+    name = 'binarize'
+
+    def __init__(self, threshold=127):
+        self.threshold = threshold
+
+    def applies(self, drawing):
+        return drawing.image is not None
+
+    def run(self, drawing):
+        drawing.binary = ImageProcessor.binarize(drawing.image, self.threshold)
+
+
+class ExtractStage(Stage):
+    """Trace paths from a binary image by contours or by skeleton"""
+
+    name = 'extract'
+
+    def __init__(self, simplify_epsilon=1.0, use_skeleton=False, smooth_level=5, use_spline=False):
+        self.simplify_epsilon = simplify_epsilon
+        self.use_skeleton = use_skeleton
+        self.smooth_level = smooth_level
+        self.use_spline = use_spline
+
+    def applies(self, drawing):
+        return drawing.binary is not None
+
+    def run(self, drawing):
+        drawing.paths = ImageProcessor.extract_paths(drawing.binary, self.simplify_epsilon, self.use_skeleton,
+                                                     self.smooth_level, self.use_spline)
+        drawing.method = 'skeleton' if self.use_skeleton else 'contour'
+        drawing.info['traced_paths'] = len(drawing.paths)
+
+
+class FilterStage(Stage):
+    """Drop paths that cannot be cut: too few points or too short"""
+
+    name = 'filter'
+
+    def __init__(self, min_points=2, min_length=0.0):
+        """
+        Args:
+            min_points: Fewest points a path may have
+            min_length: Shortest path length kept, in drawing units
+        """
+        self.min_points = min_points
+        self.min_length = min_length
+
+    def run(self, drawing):
+        paths = [path for path in drawing.paths if len(path) >= self.min_points]
+        if self.min_length > 0:
+            paths = [path for path in paths if path_segment_lengths(np.asarray(path, dtype=float)).sum()
+                     >= self.min_length]
+        drawing.paths = paths
+
+
+def needs_cleanup(drawing):
     """
-    Merge paths that have endpoints very close together.
-    This helps create continuous paths from broken line segments.
+    True for traced images that need duplicate removal and merging: saved
+    toolpaths already went through it, vector drawings are clean, and the
+    pixel thresholds would be far too coarse for their mm coordinates
     """
-    if len(paths) <= 1:
-        return paths
-    
-    merged = True
-    result_paths = list(paths)
-    
-    while merged and len(result_paths) > 1:
-        merged = False
-        
-        for i in range(len(result_paths)):
-            if i >= len(result_paths):
-                break
-                
-            path1 = result_paths[i]
-            if len(path1) < 2:
+    return drawing.method == 'skeleton' or drawing.info.get('traced_paths', 0) > 5
+
+
+class DedupeStage(Stage):
+    """Remove duplicate and parallel traces (the double lines of a traced pen stroke)"""
+
+    name = 'dedupe'
+
+    def __init__(self, distance_threshold=10.0):
+        self.distance_threshold = distance_threshold
+
+    def applies(self, drawing):
+        return needs_cleanup(drawing)
+
+    def run(self, drawing):
+        drawing.paths = remove_duplicate_paths(drawing.paths, distance_threshold=self.distance_threshold)
+
+
+class MergeStage(Stage):
+    """Join traced paths whose endpoints nearly touch into continuous paths"""
+
+    name = 'merge'
+
+    def __init__(self, merge_threshold=15.0):
+        self.merge_threshold = merge_threshold
+
+    def applies(self, drawing):
+        return needs_cleanup(drawing)
+
+    def run(self, drawing):
+        drawing.paths = merge_close_endpoints(drawing.paths, merge_threshold=self.merge_threshold)
+
+
+class OrderStage(Stage):
+    """Reorder paths nearest-first to cut down on rapid moves"""
+
+    name = 'order'
+
+    def __init__(self, start=(0.0, 0.0)):
+        self.start = start
+
+    def run(self, drawing):
+        drawing.paths = order_paths(drawing.paths, self.start)
+
+
+class TransformStage(Stage):
+    """
+    Scale the drawing to drawing.target_size in machine coordinates (Y up;
+    a drawing that is already Y up is only scaled) and snap it to machine
+    steps when the parameters set a resolution
+    """
+
+    name = 'transform'
+
+    def applies(self, drawing):
+        return drawing.target_size is not None or bool(drawing.params and drawing.params.get('resolution'))
+
+    def run(self, drawing):
+        if drawing.target_size is not None:
+            width, height = drawing.target_size
+            with profile_span('scale'):
+                drawing.paths = scale_paths(drawing.paths, drawing.width, drawing.height, width, height,
+                                            flip_y=not drawing.y_up)
+            drawing.width, drawing.height = width, height
+            drawing.y_up = True
+            drawing.target_size = None
+
+        params = drawing.params
+        if params and params.get('resolution'):
+            # Every dropped line is planner work the controller skips
+            with profile_span('quantize') as span:
+                paths_in = drawing.paths
+                drawing.paths, drawing.info['quantize'] = quantize_paths(drawing.paths, params['resolution'])
+                span.paths(paths_in, drawing.paths)
+            params['decimals'] = resolution_decimals(params['resolution'])
+
+
+class EmitStage(Stage):
+    """Write the output files: G-Code, DXF, SVG, a saved toolpath and a preview"""
+
+    name = 'emit'
+
+    def __init__(self, formats=('nc',), output_dir='.', output_base=None, workers=1, dxf_backend='builtin',
+                 dxf_version='R2000', svg_precision=4, svg_relative=False, svgz=False, save_toolpath=False,
+                 preview=False):
+        """
+        Args:
+            formats: Any of 'nc', 'dxf' and 'svg'
+            output_dir: Folder for the files
+            output_base: File name without extension (default: the input's)
+            workers: Processes for formatting large G-Code programs
+            dxf_backend, dxf_version: See DXFExporter.export
+            svg_precision, svg_relative, svgz: See SVGExporter.export
+            save_toolpath: Also write the paths as a .npz toolpath
+            preview: Also write a PNG preview
+        """
+        self.formats = formats
+        self.output_dir = Path(output_dir)
+        self.output_base = output_base
+        self.workers = workers
+        self.dxf_backend = dxf_backend
+        self.dxf_version = dxf_version
+        self.svg_precision = svg_precision
+        self.svg_relative = svg_relative
+        self.svgz = svgz
+        self.save_toolpath = save_toolpath
+        self.preview = preview
+
+    def run(self, drawing):
+        base = self.output_base or drawing.source.stem
+        params = drawing.params
+        outputs = drawing.outputs
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.save_toolpath:
+            output_file = self.output_dir / f"{base}.npz"
+            with profile_span('toolpath'):
+                ToolpathFile.save(output_file, drawing.paths, drawing.width, drawing.height, drawing.units,
+                                  params, source=drawing.source.name, y_up=drawing.y_up)
+            outputs.append(output_file)
+
+        for fmt in self.formats:
+            if fmt == 'nc':
+                if not params:
+                    raise ConversionError("G-Code output needs machining parameters")
+                output_file = self.output_dir / f"{base}.nc"
+                print(f"\nGenerating G-Code...")
+                with profile_span('gcode'):
+                    generator = GCodeGenerator(params)
+                    generator.generate_from_paths(drawing.paths, workers=self.workers)
+                    generator.save(output_file)
+                outputs.append(output_file)
+                if generator.adaptive_feed():
+                    base_time, planned_time = generator.feed_time_saving()
+                    saving = 100.0 * (base_time - planned_time) / base_time if base_time > 0 else 0.0
+                    print(f"Estimated cutting time: {planned_time:.1f} min "
+                          f"(vs {base_time:.1f} min at {params['feed_rate']} {params['units']}/min, "
+                          f"{abs(saving):.0f}% {'faster' if saving >= 0 else 'slower'})")
+
+            elif fmt == 'dxf':
+                output_file = self.output_dir / f"{base}.dxf"
+                print(f"\nGenerating DXF...")
+                with profile_span('dxf'):
+                    written = DXFExporter.export(drawing.paths, output_file, drawing.units,
+                                                 backend=self.dxf_backend, version=self.dxf_version)
+                if written:
+                    outputs.append(output_file)
+
+            elif fmt == 'svg':
+                output_file = self.output_dir / f"{base}.{'svgz' if self.svgz else 'svg'}"
+                print(f"\nGenerating SVG...")
+                with profile_span('svg'):
+                    SVGExporter.export(drawing.paths, drawing.width, drawing.height, output_file, drawing.units,
+                                       precision=self.svg_precision, relative=self.svg_relative)
+                outputs.append(output_file)
+
+        if self.preview:
+            from gcode_preview import render_paths
+            output_file = self.output_dir / f"{base}_preview.png"
+            with profile_span('preview'):
+                render_paths(drawing.paths, output_file, tool_diameter=params['tool_diameter'] if params else None,
+                             y_up=drawing.y_up)
+            outputs.append(output_file)
+
+
+class Pipeline:
+    """
+    Runs stages over a Drawing, recording time, memory and path and point
+    counts for each
+
+    run() can start and stop at named stages, so a caller can run part of
+    the pipeline, look at or change the drawing, and carry on; any stage
+    can be swapped for another object with the same name and interface.
+
+    Example:
+        pipeline = Pipeline([LoadStage(), BinarizeStage(100), ExtractStage(use_skeleton=True),
+                             FilterStage(), DedupeStage(), MergeStage(), OrderStage()])
+        drawing = pipeline.run(Drawing('sketch.png'))
+        print(Pipeline.format_stats(drawing.stats))
+    """
+
+    def __init__(self, stages, trace_memory=False):
+        """
+        Args:
+            stages: Stage objects in the order they run
+            trace_memory: Measure each stage's peak Python/NumPy allocation
+                with tracemalloc (slower) instead of the growth of the
+                process's peak memory
+        """
+        self.stages = list(stages)
+        self.trace_memory = trace_memory
+
+    @property
+    def names(self):
+        return [stage.name for stage in self.stages]
+
+    def index(self, name):
+        """Position of the named stage"""
+        if name not in self.names:
+            raise KeyError(f"No stage '{name}' (stages: {', '.join(self.names)})")
+        return self.names.index(name)
+
+    def replace(self, name, stage):
+        """Swap the named stage for another"""
+        self.stages[self.index(name)] = stage
+
+    def run(self, drawing, start=None, stop=None):
+        """
+        Run the stages from start up to (not including) stop
+
+        Args:
+            drawing: Drawing to work on
+            start: Name of the first stage to run (default: the first)
+            stop: Name of the stage to stop before (default: run to the end)
+
+        Returns:
+            The drawing, with a record per stage appended to drawing.stats
+        """
+        first = self.index(start) if start else 0
+        last = self.index(stop) if stop else len(self.stages)
+
+        import tracemalloc
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        try:
+            for stage in self.stages[first:last]:
+                drawing.stats.append(self.run_stage(stage, drawing))
+        finally:
+            if tracing:
+                tracemalloc.stop()
+        return drawing
+
+    def run_stage(self, stage, drawing):
+        """
+        Run one stage and return its statistics record: wall and CPU
+        seconds, memory growth, peak RSS, path and point counts in and out,
+        and (while a Profiler is active) the spans of its phases
+        """
+        record = {'stage': stage.name, 'skipped': False,
+                  'paths_in': len(drawing.paths), 'points_in': drawing.point_count()}
+        if not stage.applies(drawing):
+            record.update(skipped=True, seconds=0.0, cpu_seconds=0.0, memory_mb=0.0)
+        else:
+            profiler = Profiler.active
+            first_span = len(profiler.spans) if profiler else 0
+            if self.trace_memory:
+                import tracemalloc
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            else:
+                before = peak_rss()
+            start = time.perf_counter()
+            start_cpu = cpu_time()
+            stage.run(drawing)
+            record['seconds'] = time.perf_counter() - start
+            record['cpu_seconds'] = cpu_time() - start_cpu
+            rss = peak_rss()
+            if self.trace_memory:
+                record['memory_mb'] = (tracemalloc.get_traced_memory()[1] - before) / 1e6
+            else:
+                record['memory_mb'] = (rss - before) / 1e6 if before is not None else None
+            record['peak_rss_mb'] = rss / 1e6 if rss is not None else None
+            if profiler:
+                record['spans'] = profiler.spans[first_span:]
+        record['paths_out'] = len(drawing.paths)
+        record['points_out'] = drawing.point_count()
+        return record
+
+    @staticmethod
+    def format_stats(stats):
+        """Table of stage records, one line per stage, its phases indented below it, and a total"""
+        def row(name, r):
+            memory = f"{r['memory_mb']:+.1f}MB" if r.get('memory_mb') is not None else ''
+            peak = f"{r['peak_rss_mb']:.0f}MB" if r.get('peak_rss_mb') is not None else ''
+            line = f"{name:<14}{r['seconds']:>9.3f}s{r['cpu_seconds']:>9.3f}s{memory:>10}{peak:>10}"
+            if 'paths_out' in r:
+                paths_in = f"{r['paths_in']} -> " if 'paths_in' in r else ''
+                points_in = f"{r['points_in']} -> " if 'points_in' in r else ''
+                line += f"{paths_in + str(r['paths_out']):>18}{points_in + str(r['points_out']):>22}"
+            return line.rstrip()
+
+        lines = [f"{'Stage':<14}{'Wall':>10}{'CPU':>10}{'Memory':>10}{'Peak RSS':>10}{'Paths':>18}{'Points':>22}"]
+        for r in stats:
+            if r['skipped']:
+                lines.append(f"{r['stage']:<14}{'skipped':>10}")
                 continue
-            
-            start1 = path1[0]
-            end1 = path1[-1]
-            
-            for j in range(i + 1, len(result_paths)):
-                if j >= len(result_paths):
-                    break
-                    
-                path2 = result_paths[j]
-                if len(path2) < 2:
+            lines.append(row(r['stage'], r))
+            for span in r.get('spans', []):
+                lines.append(row('  ' * (span['depth'] + 1) + span['name'], span))
+        lines.append(f"{'total':<14}{sum(r['seconds'] for r in stats):>9.3f}s"
+                     f"{sum(r['cpu_seconds'] for r in stats):>9.3f}s")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def combine_stats(runs):
+        """
+        Add up the stage records of several runs (a batch) into one list
+
+        Times and counts are summed per stage and per phase; memory growth
+        and peak RSS keep the largest value seen.
+
+        Args:
+            runs: List of stage record lists, one per converted file
+
+        Returns:
+            Stage records in the same form as a single run's
+        """
+        def add(total, r):
+            for key in ('seconds', 'cpu_seconds', 'paths_in', 'points_in', 'paths_out', 'points_out'):
+                if key in r:
+                    total[key] = total.get(key, 0) + r[key]
+            for key in ('memory_mb', 'peak_rss_mb'):
+                if r.get(key) is not None:
+                    total[key] = max(total.get(key) or r[key], r[key])
+
+        stages = {}
+        for stats in runs:
+            for r in stats:
+                total = stages.setdefault(r['stage'], {'stage': r['stage'], 'skipped': True, 'spans': {}})
+                if r['skipped']:
                     continue
-                
-                start2 = path2[0]
-                end2 = path2[-1]
-                
-                # Check all possible connections
-                connections = [
-                    ('end1_start2', end1, start2, lambda: path1 + path2),
-                    ('end1_end2', end1, end2, lambda: path1 + path2[::-1]),
-                    ('start1_start2', start1, start2, lambda: path1[::-1] + path2),
-                    ('start1_end2', start1, end2, lambda: path1[::-1] + path2[::-1]),
-                ]
-                
-                for conn_type, pt1, pt2, merge_func in connections:
-                    dist = np.sqrt((pt1[0] - pt2[0])**2 + (pt1[1] - pt2[1])**2)
-                    
-                    if dist < merge_threshold:
-                        # Merge the paths
-                        result_paths[i] = merge_func()
-                        result_paths.pop(j)
-                        merged = True
-                        break
-                
-                if merged:
-                    break
-            
-            if merged:
-                break
-    
-    return result_paths
+                total['skipped'] = False
+                add(total, r)
+                for span in r.get('spans', []):
+                    add(total['spans'].setdefault((span['depth'], span['name']),
+                                                  {'name': span['name'], 'depth': span['depth']}), span)
+        for total in stages.values():
+            total['spans'] = list(total['spans'].values())
+        return list(stages.values())
 
 
-def scale_paths(paths, src_width, src_height, target_width, target_height, flip_y=True):
-    """Scale paths from source dimensions to target dimensions"""
-    scale_x = target_width / src_width
-    scale_y = target_height / src_height
-    
-    scaled_paths = []
-    for path in paths:
-        scaled_path = []
-        for x, y in path:
-            new_x = x * scale_x
-            new_y = (src_height - y) * scale_y if flip_y else y * scale_y
-            scaled_path.append((new_x, new_y))
-        scaled_paths.append(scaled_path)
-    
-    return scaled_paths
+# Machining defaults offered by the prompts and used to fill in profiles
+DEFAULT_PARAMS = {
+    'mm': {'material_width': 100, 'material_height': 100, 'tool_diameter': 3.175, 'cut_depth': 1,
+           'feed_rate': 500, 'plunge_rate': 200, 'safe_height': 5, 'spindle_speed': 0},
+    'inch': {'material_width': 4, 'material_height': 4, 'tool_diameter': 0.125, 'cut_depth': 0.04,
+             'feed_rate': 30, 'plunge_rate': 10, 'safe_height': 0.2, 'spindle_speed': 0},
+}
+
+# Keys a machining profile may set
+PROFILE_KEYS = ('units', 'material_width', 'material_height', 'tool_diameter', 'cut_depth', 'feed_rate',
+                'plunge_rate', 'safe_height', 'spindle_speed', 'resolution', 'min_feed_rate',
+                'max_feed_rate', 'corner_accel')
+
+BUILTIN_PROFILES = Path(__file__).with_name('machining_profiles.json')
 
 
-def get_user_inputs():
-    """Get machining parameters from user"""
+def get_user_inputs(design_size=None):
+    """Get machining parameters from user
+
+    Args:
+        design_size: Optional (width, height) of the design in mm, offered
+            as the default material size so it cuts at its drawn size
+
+    Returns:
+        Dictionary of machining parameters
+    """
     print("\n=== CNC Machining Parameters ===\n")
     
     # Units
@@ -774,22 +3208,29 @@ def get_user_inputs():
         units = 'mm'
     if units == 'in':
         units = 'inch'
+    defaults = DEFAULT_PARAMS[units]
     
     # Material dimensions
     print(f"\nMaterial dimensions ({units}):")
-    material_width = float(input(f"  Width [{100 if units == 'mm' else 4}]: ") or (100 if units == 'mm' else 4))
-    material_height = float(input(f"  Height [{100 if units == 'mm' else 4}]: ") or (100 if units == 'mm' else 4))
+    if design_size:
+        scale = 1 if units == 'mm' else 1 / 25.4
+        default_width = round(design_size[0] * scale, 3)
+        default_height = round(design_size[1] * scale, 3)
+    else:
+        default_width, default_height = defaults['material_width'], defaults['material_height']
+    material_width = float(input(f"  Width [{default_width}]: ") or default_width)
+    material_height = float(input(f"  Height [{default_height}]: ") or default_height)
     
     # Tool parameters
     print(f"\nTool parameters ({units}):")
-    tool_diameter = float(input(f"  Tool diameter [{3.175 if units == 'mm' else 0.125}]: ") or (3.175 if units == 'mm' else 0.125))
-    cut_depth = float(input(f"  Cut depth [{1 if units == 'mm' else 0.04}]: ") or (1 if units == 'mm' else 0.04))
+    tool_diameter = float(input(f"  Tool diameter [{defaults['tool_diameter']}]: ") or defaults['tool_diameter'])
+    cut_depth = float(input(f"  Cut depth [{defaults['cut_depth']}]: ") or defaults['cut_depth'])
     
     # Speeds and feeds
     print(f"\nSpeeds and feeds ({units}/min):")
-    feed_rate = float(input(f"  Feed rate [{500 if units == 'mm' else 30}]: ") or (500 if units == 'mm' else 30))
-    plunge_rate = float(input(f"  Plunge rate [{200 if units == 'mm' else 10}]: ") or (200 if units == 'mm' else 10))
-    safe_height = float(input(f"  Safe height [{5 if units == 'mm' else 0.2}]: ") or (5 if units == 'mm' else 0.2))
+    feed_rate = float(input(f"  Feed rate [{defaults['feed_rate']}]: ") or defaults['feed_rate'])
+    plunge_rate = float(input(f"  Plunge rate [{defaults['plunge_rate']}]: ") or defaults['plunge_rate'])
+    safe_height = float(input(f"  Safe height [{defaults['safe_height']}]: ") or defaults['safe_height'])
     
     # Spindle
     spindle_speed = input("  Spindle speed (RPM) [0 for manual]: ").strip()
@@ -810,9 +3251,155 @@ def get_user_inputs():
     return params
 
 
-def main():
+def read_profile_file(profile_path):
+    """Read a JSON or TOML profile file into a dictionary"""
+    profile_path = Path(profile_path)
+    if profile_path.suffix.lower() == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ConversionError("TOML profiles need Python 3.11+ or: pip install tomli")
+        with open(profile_path, 'rb') as f:
+            return tomllib.load(f)
+    with open(profile_path) as f:
+        return json.load(f)
+
+
+def load_params_profile(spec):
+    """
+    Load a machining profile
+
+    Args:
+        spec: A JSON/TOML file holding one profile, FILE#NAME for a named
+              profile in a file of several, or the name of a built-in
+              profile from machining_profiles.json
+
+    Returns:
+        Dictionary of profile values (a subset of PROFILE_KEYS, units normalized)
+    """
+    file_part, _, name = spec.partition('#')
+    if Path(file_part).is_file():
+        data = read_profile_file(file_part)
+        source = file_part
+    else:
+        data = read_profile_file(BUILTIN_PROFILES)
+        source = BUILTIN_PROFILES.name
+        name = spec
+
+    if not any(key in data for key in PROFILE_KEYS):
+        # A collection of named profiles
+        named = {key.lower(): value for key, value in data.items() if isinstance(value, dict)}
+        if not name and len(named) == 1:
+            name = next(iter(named))
+        if name.lower() not in named:
+            raise ConversionError(f"No profile '{name}' in {source} (available: {', '.join(sorted(data))})")
+        data = named[name.lower()]
+
+    unknown = sorted(set(data) - set(PROFILE_KEYS) - {'description'})
+    if unknown:
+        raise ConversionError(f"Unknown profile settings: {', '.join(unknown)}")
+    profile = {key: data[key] for key in PROFILE_KEYS if key in data}
+    units = str(profile.get('units', 'mm')).lower()
+    profile['units'] = 'inch' if units in ('in', 'inch') else 'mm'
+    return profile
+
+
+def params_from_profile(profile, design_size=None, src_size=None):
+    """
+    Complete machining parameters from a profile without prompting
+
+    The material size comes from the profile if it sets one, else from the
+    design's real size (mm inputs), else the prompt defaults. The drawing is
+    fitted into it keeping its proportions.
+
+    Args:
+        profile: Output of load_params_profile()
+        design_size: (width, height) of the design in mm, if it has a real size
+        src_size: (width, height) of the drawing in its own units
+
+    Returns:
+        Dictionary of machining parameters
+    """
+    units = profile['units']
+    params = dict(DEFAULT_PARAMS[units])
+    params.update(profile)
+
+    if 'material_width' not in profile and 'material_height' not in profile and design_size:
+        scale = 1 if units == 'mm' else 1 / 25.4
+        params['material_width'] = design_size[0] * scale
+        params['material_height'] = design_size[1] * scale
+    elif src_size and src_size[0] > 0 and src_size[1] > 0:
+        fit = min(params['material_width'] / src_size[0], params['material_height'] / src_size[1])
+        params['material_width'] = src_size[0] * fit
+        params['material_height'] = src_size[1] * fit
+    return params
+
+
+def apply_param_overrides(params, args):
+    """Apply machining parameters given on the command line"""
+    overrides = {
+        'feed_rate': args.feed_rate,
+        'plunge_rate': args.plunge_rate,
+        'cut_depth': args.cut_depth,
+        'safe_height': args.safe_height,
+        'spindle_speed': args.spindle_speed,
+        'resolution': args.resolution,
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            params[key] = value
+    for key, value in (('min_feed_rate', args.min_feed), ('max_feed_rate', args.max_feed),
+                       ('corner_accel', args.corner_accel)):
+        if value is not None:
+            params[key] = value
+    check_feed_range(params)
+    return params
+
+
+def check_feed_range(params):
+    """
+    Reject a curvature-aware feed range the planner cannot use
+
+    Raises:
+        ConversionError: naming the bad value
+    """
+    low, high = params.get('min_feed_rate'), params.get('max_feed_rate')
+    for name, value in (('min feed rate (--min-feed)', low), ('max feed rate (--max-feed)', high),
+                        ('corner acceleration (--corner-accel)', params.get('corner_accel'))):
+        if value is not None and value <= 0:
+            raise ConversionError(f"The {name} must be above 0, not {value:g}")
+    if (low is None) != (high is None):
+        given = f"--min-feed {low:g}" if low is not None else f"--max-feed {high:g}"
+        raise ConversionError(f"Curvature-aware feeds need both --min-feed and --max-feed (only {given} given)")
+    if low is not None and high <= low:
+        raise ConversionError(f"The max feed rate ({high:g}) must be above the min feed rate ({low:g})")
+
+
+# Input types the converter reads, for expanding folders in batch mode
+INPUT_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.svg', '.dxf', '.c2d', '.npz')
+
+
+def positive_float(text):
+    """argparse type for values that must be above zero"""
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {text!r}")
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be above 0, not {text}")
+    return value
+
+
+def build_parser():
+    """Command-line options shared by single-file and batch conversion"""
     parser = argparse.ArgumentParser(description='Convert line drawings to G-Code, DXF, or SVG')
-    parser.add_argument('input_file', help='Input file (PNG, JPG, or SVG)')
+    parser.add_argument('input_files', nargs='*',
+                       help='Input file (PNG, JPG, SVG, DXF, Carbide Create .c2d, a saved .npz toolpath, '
+                            'or a TTF/OTF font with --text). Several files, folders or globs convert '
+                            'in batch mode (needs --params for G-Code)')
     parser.add_argument('-o', '--output', help='Output file base name (extensions added automatically)')
     parser.add_argument('--format', choices=['nc', 'gcode', 'dxf', 'svg', 'all'], 
                        default='nc', 
@@ -827,112 +3414,267 @@ def main():
                        help='Smoothing level for skeleton paths (default: 5)')
     parser.add_argument('--spline', action='store_true',
                        help='Use spline fitting for very smooth curves (requires scipy)')
-    parser.add_argument('--params', help='JSON file with machining parameters')
+    parser.add_argument('--tolerance', type=float,
+                       help='Chord tolerance for flattening DXF/SVG/C2D/text curves, in drawing units '
+                            '(DXF default: 0.01 mm / 0.0005 inch, others: 0.01 mm)')
+    parser.add_argument('--min-feed', type=positive_float,
+                       help='Lowest feed rate for curvature-aware feeds (enables feed planning with --max-feed)')
+    parser.add_argument('--max-feed', type=positive_float,
+                       help='Highest feed rate for curvature-aware feeds on straight runs and gentle curves')
+    parser.add_argument('--corner-accel', type=positive_float,
+                       help='Lateral acceleration allowed through corners in units/s^2 (default: 50 mm or 2 inch)')
+    parser.add_argument('--svg-precision', type=int, default=4,
+                       help='Decimal places for SVG coordinates (default: 4)')
+    parser.add_argument('--svg-relative', action='store_true',
+                       help='Write SVG paths with relative commands for a smaller file')
+    parser.add_argument('--svgz', action='store_true',
+                       help='Write compressed .svgz instead of .svg')
+    parser.add_argument('--dxf-backend', choices=['builtin', 'ezdxf'], default='builtin',
+                       help='DXF writer: built-in streaming writer (default) or ezdxf')
+    parser.add_argument('--dxf-version', choices=['R2000', 'R12'], default='R2000',
+                       help='DXF version for the built-in writer (default: R2000)')
+    parser.add_argument('--resolution', type=float,
+                       help='Machine resolution in steps per unit (e.g. 80 for 80 steps/mm). '
+                            'Snaps G-Code to whole steps and drops moves that round away')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Processes used to format G-Code for very large path sets (default: 1, 0 = all CPUs)')
+    parser.add_argument('--text', help='Text to engrave when the input is a TTF/OTF font (\\n for new lines)')
+    parser.add_argument('--font-size', type=float, default=25.0,
+                       help='Font size (em height) in mm for --text (default: 25)')
+    parser.add_argument('--letter-spacing', type=float, default=0.0,
+                       help='Extra space after each character in mm for --text (default: 0)')
+    parser.add_argument('--line-spacing', type=float, default=1.2,
+                       help='Baseline distance as a multiple of the font size for --text (default: 1.2)')
+    parser.add_argument('--align', choices=['left', 'center', 'right'], default='left',
+                       help='Alignment of multi-line --text (default: left)')
+    parser.add_argument('--preview', action='store_true',
+                       help='Also write a PNG preview of the toolpath (<output>_preview.png)')
+    parser.add_argument('--order', action='store_true',
+                       help='Reorder paths nearest-first to shorten the rapid moves between them')
+    parser.add_argument('--stop-after', choices=['load', 'binarize', 'extract', 'filter', 'dedupe', 'merge',
+                                                 'order', 'transform'],
+                       help='Run the pipeline only up to this stage, print its statistics and write nothing')
+    parser.add_argument('--profile', action='store_true',
+                       help='Print wall/CPU time, memory and path and point counts for every stage '
+                            'and the phases inside it (in batch mode, added up over all files)')
+    parser.add_argument('--stats-json', metavar='FILE',
+                       help='Write the profile (and, in batch mode, every file\'s) as JSON to FILE')
+    parser.add_argument('--profile-dump', metavar='FILE',
+                       help='Run a single conversion under cProfile and save the stats to FILE '
+                            '(view with python -m pstats FILE)')
+    parser.add_argument('--save-toolpath', action='store_true',
+                       help='Also save the final scaled paths as a binary toolpath (.npz) for fast regeneration')
+    parser.add_argument('--feed-rate', type=float, help='Override the feed rate')
+    parser.add_argument('--plunge-rate', type=float, help='Override the plunge rate')
+    parser.add_argument('--cut-depth', type=float, help='Override the cut depth')
+    parser.add_argument('--safe-height', type=float, help='Override the safe height')
+    parser.add_argument('--spindle-speed', type=int, help='Override the spindle speed (RPM)')
+    parser.add_argument('--params',
+                       help='Machining profile instead of prompting: a JSON/TOML file (FILE or FILE#NAME) '
+                            'or a built-in profile name such as "1/8in hardwood" (see --list-params)')
+    parser.add_argument('--list-params', action='store_true', help='List the built-in machining profiles')
     parser.add_argument('--skip-gcode-params', action='store_true',
                        help='Skip machining parameter input (only for DXF/SVG output)')
-    
-    args = parser.parse_args()
-    
-    # Check if input file exists
-    input_path = Path(args.input_file)
+    parser.add_argument('--output-dir', help='Folder for the output files (default: current folder)')
+    parser.add_argument('--jobs', type=int, default=0,
+                       help='Files converted at once in batch mode (default: 0 = all CPUs)')
+    return parser
+
+
+def build_pipeline(args, formats=('nc',), output_dir='.', output_base=None):
+    """The conversion pipeline described by the command-line options"""
+    stages = [
+        LoadStage(tolerance=args.tolerance, text=args.text, font_size=args.font_size,
+                  letter_spacing=args.letter_spacing, line_spacing=args.line_spacing, align=args.align),
+        BinarizeStage(args.threshold),
+        ExtractStage(simplify_epsilon=args.simplify, use_skeleton=args.skeleton, smooth_level=args.smooth,
+                     use_spline=args.spline),
+        FilterStage(),
+        DedupeStage(distance_threshold=10.0),
+        MergeStage(merge_threshold=15.0),
+    ]
+    if args.order:
+        stages.append(OrderStage())
+    stages += [
+        TransformStage(),
+        EmitStage(formats, output_dir, output_base,
+                  workers=args.workers or os.cpu_count() or 1,
+                  dxf_backend=args.dxf_backend, dxf_version=args.dxf_version,
+                  svg_precision=args.svg_precision, svg_relative=args.svg_relative, svgz=args.svgz,
+                  save_toolpath=args.save_toolpath, preview=args.preview),
+    ]
+    return Pipeline(stages)
+
+
+def describe_input(drawing):
+    """One-line description of what was read from the input"""
+    n = len(drawing.paths)
+    w, h = drawing.width, drawing.height
+    ext = drawing.source.suffix.lower()
+    if drawing.kind == 'toolpath':
+        return f"Loaded {n} paths from toolpath file ({w}x{h} {drawing.units})"
+    if drawing.kind == 'image':
+        return f"Extracted {n} paths from image using {drawing.method} method ({w}x{h})"
+    if ext in ('.ttf', '.otf'):
+        return f"Laid out {n} outlines of text ({w:.3f}x{h:.3f} mm)"
+    if ext == '.c2d':
+        return f"Extracted {n} paths from Carbide Create project ({w:.3f}x{h:.3f} mm stock)"
+    if ext == '.svg':
+        return f"Extracted {n} paths from SVG ({w:.3f}x{h:.3f} mm)"
+    return f"Extracted {n} paths from DXF ({w:.3f}x{h:.3f})"
+
+
+def convert_file(input_path, args, profile=None, output_dir=None, interactive=True):
+    """
+    Convert one input file to the requested outputs
+
+    With --profile or --stats-json the phases inside each stage (decode,
+    threshold, skeleton, trace, smooth, simplify, scale, each exporter)
+    are timed as well, and --profile prints the table at the end.
+
+    Args:
+        input_path: Path of the drawing
+        args: Parsed command-line options (see build_parser)
+        profile: Machining profile from load_params_profile(); when given
+                 nothing is prompted for
+        output_dir: Folder for the outputs (default: from -o, else '.')
+        interactive: Allow prompting when there is no profile
+
+    Returns:
+        Dictionary with the input, output files, path and point counts,
+        total wall and CPU seconds and peak RSS, and the per-stage statistics
+
+    Raises:
+        ConversionError: if the file cannot be converted
+    """
+    start = time.perf_counter()
+    start_cpu = cpu_time()
+    if args.profile or args.stats_json:
+        with Profiler():
+            result = _convert_file(input_path, args, profile, output_dir, interactive)
+    else:
+        result = _convert_file(input_path, args, profile, output_dir, interactive)
+    result['seconds'] = time.perf_counter() - start
+    result['cpu_seconds'] = cpu_time() - start_cpu
+    rss = peak_rss()
+    result['peak_rss_mb'] = rss / 1e6 if rss is not None else None
+
+    if args.profile and not result.get('stopped'):
+        print(f"\n=== Profile ===\n")
+        print(Pipeline.format_stats(result['stages']))
+    return result
+
+
+def _convert_file(input_path, args, profile, output_dir, interactive):
+    input_path = Path(input_path)
     if not input_path.exists():
-        print(f"Error: File not found: {input_path}")
-        sys.exit(1)
+        raise ConversionError(f"File not found: {input_path}")
     
     # Determine file type
     file_ext = input_path.suffix.lower()
     
+    # Determine output format(s)
+    output_formats = []
+    if args.format == 'all':
+        output_formats = ['nc', 'dxf', 'svg']
+    else:
+        output_formats = [args.format if args.format != 'gcode' else 'nc']
+    
+    # Determine output base filename
+    if args.output:
+        output_base = Path(args.output).stem
+        output_dir = output_dir or (Path(args.output).parent if Path(args.output).parent.name else Path('.'))
+    else:
+        # Text is named after what it says rather than the font
+        output_base = input_path.stem
+        if file_ext in ('.ttf', '.otf'):
+            output_base = re.sub(r'\W+', '_', args.text).strip('_')[:40] or output_base
+    output_dir = Path(output_dir or args.output_dir or '.')
+
+    pipeline = build_pipeline(args, output_formats, output_dir, output_base)
+    drawing = Drawing(input_path)
+    
     print(f"Loading: {input_path}")
+    if args.skeleton and drawing.kind == 'image':
+        print(f"Processing with skeletonization (smooth level: {args.smooth})...")
     
-    # Check if spline requested but scipy not available
-    if args.spline:
+    if args.stop_after and args.stop_after != 'transform':
+        # Partial run, e.g. to tune tracing settings without writing anything
+        if args.stop_after not in pipeline.names:
+            raise ConversionError(f"No {args.stop_after} stage in this run (stages: {', '.join(pipeline.names)})")
         try:
-            import scipy
-            print("Using spline fitting for smooth curves")
-        except ImportError:
-            print("Warning: scipy not installed. Falling back to moving average smoothing.")
-            print("Install scipy with: pip install scipy")
-            args.spline = False
+            pipeline.run(drawing, stop=pipeline.names[pipeline.index(args.stop_after) + 1])
+        except ConversionError:
+            raise
+        except Exception as e:
+            raise ConversionError(f"Could not process file: {e}") from e
+        return stopped_early(drawing, args.stop_after)
     
-    # Load and process file
+    # Load and trace the file, then clean up the paths
     try:
-        if file_ext in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']:
-            if args.skeleton:
-                print(f"Processing with skeletonization (smooth level: {args.smooth})...")
-            
-            paths, src_width, src_height = ImageProcessor.load_and_process(
-                input_path, 
-                threshold=args.threshold,
-                simplify_epsilon=args.simplify,
-                use_skeleton=args.skeleton,
-                smooth_level=args.smooth,
-                use_spline=args.spline
-            )
-            
-            processing_method = "skeleton" if args.skeleton else "contour"
-            print(f"Extracted {len(paths)} paths from image using {processing_method} method ({src_width}x{src_height})")
-            
-        elif file_ext == '.svg':
-            paths, src_width, src_height = SVGProcessor.load_and_process(input_path)
-            print(f"Extracted {len(paths)} paths from SVG ({src_width}x{src_height})")
-            
-        else:
-            print(f"Error: Unsupported file type: {file_ext}")
-            print("Supported: .png, .jpg, .jpeg, .svg")
-            sys.exit(1)
-    
+        pipeline.run(drawing, stop='filter')
+        print(describe_input(drawing))
+        if not drawing.paths:
+            raise ConversionError("No paths found in file")
+        pipeline.run(drawing, start='filter', stop='transform')
+    except ConversionError:
+        raise
     except Exception as e:
-        print(f"Error processing file: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
-    
-    if not paths:
-        print("Error: No paths found in file")
-        sys.exit(1)
-    
-    # Remove duplicate/parallel paths (fixes double-line issue)
-    if args.skeleton or len(paths) > 5:
-        print(f"Found {len(paths)} initial paths")
-        paths = remove_duplicate_paths(paths, distance_threshold=10.0)
-        print(f"After removing duplicates: {len(paths)} paths")
-        
-        # Merge paths with close endpoints
-        paths = merge_close_endpoints(paths, merge_threshold=15.0)
-        print(f"After merging close paths: {len(paths)} paths")
-    
-    if not paths:
-        print("Error: No paths remaining after filtering")
-        sys.exit(1)
+        raise ConversionError(f"Could not process file: {e}") from e
+
+    cleanup = {r['stage']: r for r in drawing.stats if not r['skipped']}
+    if 'dedupe' in cleanup:
+        print(f"Found {cleanup['dedupe']['paths_in']} initial paths")
+        print(f"After removing duplicates: {cleanup['dedupe']['paths_out']} paths")
+    if 'merge' in cleanup:
+        print(f"After merging close paths: {cleanup['merge']['paths_out']} paths")
+    if 'order' in cleanup:
+        print(f"Ordered {cleanup['order']['paths_out']} paths nearest-first")
     
-    # Determine output format(s)
-    output_formats = []
-    if args.format == 'all':
-        output_formats = ['nc', 'dxf', 'svg']
-    else:
-        output_formats = [args.format if args.format != 'gcode' else 'nc']
+    if not drawing.paths:
+        raise ConversionError("No paths remaining after filtering")
     
     # Check if G-Code output is requested
     needs_gcode_params = 'nc' in output_formats
+    src_width, src_height = drawing.width, drawing.height
+    design_size = (src_width, src_height) if file_ext in MM_INPUTS else None
+    toolpath_meta = drawing.meta
+    if toolpath_meta is not None and drawing.y_up:
+        # Saved after scaling: its size is real, like an SVG's
+        scale = 25.4 if drawing.units == 'inch' else 1
+        design_size = (src_width * scale, src_height * scale)
     
     # Get machining parameters if generating G-Code
-    if needs_gcode_params and not args.skip_gcode_params:
-        params = get_user_inputs()
+    # (the transform stage scales to target_size in machine coordinates, Y up;
+    # without one the original size is kept)
+    if toolpath_meta is not None and (toolpath_meta['params'] or not needs_gcode_params):
+        # Saved toolpath: paths are already scaled, reuse its parameters
+        params = toolpath_meta['params']
+        if params:
+            apply_param_overrides(params, args)
+            print(f"Using machining parameters saved with the toolpath "
+                  f"({params['material_width']}x{params['material_height']} {params['units']})")
+    elif profile is not None or (needs_gcode_params and not args.skip_gcode_params):
+        if profile is not None:
+            params = params_from_profile(profile, design_size, (src_width, src_height))
+        elif interactive:
+            params = get_user_inputs(design_size)
+        else:
+            raise ConversionError("G-Code output needs machining parameters: use --params")
         params['filename'] = input_path.name
+        params.setdefault('min_feed_rate', args.min_feed)
+        params.setdefault('max_feed_rate', args.max_feed)
+        params.setdefault('corner_accel', args.corner_accel)
+        apply_param_overrides(params, args)
         
         # Scale paths to material size
-        print(f"\nScaling paths to {params['material_width']}x{params['material_height']} {params['units']}")
-        scaled_paths = scale_paths(
-            paths, 
-            src_width, 
-            src_height, 
-            params['material_width'], 
-            params['material_height'],
-            flip_y=True
-        )
+        print(f"\nScaling paths to {params['material_width']:g}x{params['material_height']:g} {params['units']}")
+        drawing.target_size = (params['material_width'], params['material_height'])
+        drawing.units = params['units']
     else:
+        params = None
         # For DXF/SVG only, use original dimensions or prompt for scaling
-        if not args.skip_gcode_params:
+        if not args.skip_gcode_params and interactive:
             print("\n=== Output Dimensions ===")
             units = input("Units (mm/inch) [mm]: ").strip().lower() or 'mm'
             if units not in ['mm', 'inch', 'in']:
@@ -947,82 +3689,251 @@ def main():
                 output_width = float(output_width)
                 output_height = float(output_height)
                 print(f"Scaling to {output_width}x{output_height} {units}")
-                scaled_paths = scale_paths(paths, src_width, src_height, 
-                                         output_width, output_height, flip_y=True)
+                drawing.target_size = (output_width, output_height)
+                drawing.units = units
             else:
                 print("Using original dimensions")
-                scaled_paths = paths
-                output_width = src_width
-                output_height = src_height
-                units = 'px'
-        else:
-            scaled_paths = paths
-            output_width = src_width
-            output_height = src_height
-            units = 'px'
-            params = None
-    
-    # Determine output base filename
-    if args.output:
-        output_base = Path(args.output).stem
-        output_dir = Path(args.output).parent if Path(args.output).parent.name else Path('.')
-    else:
-        output_base = input_path.stem
-        output_dir = Path('.')
-    
-    # Generate output files
-    print("\n=== Generating Output Files ===")
-    output_files = []
+    drawing.params = params
     
-    for fmt in output_formats:
-        if fmt == 'nc':
-            # Generate G-Code
-            output_file = output_dir / f"{output_base}.nc"
-            print(f"\nGenerating G-Code...")
-            generator = GCodeGenerator(params)
-            generator.generate_from_paths(scaled_paths)
-            generator.save(output_file)
-            output_files.append(output_file)
-            
-        elif fmt == 'dxf':
-            # Generate DXF
-            output_file = output_dir / f"{output_base}.dxf"
-            print(f"\nGenerating DXF...")
-            if DXFExporter.export(scaled_paths, output_file, units):
-                output_files.append(output_file)
-            
-        elif fmt == 'svg':
-            # Generate SVG
-            output_file = output_dir / f"{output_base}.svg"
-            print(f"\nGenerating SVG...")
-            if needs_gcode_params:
-                svg_width = params['material_width']
-                svg_height = params['material_height']
-                svg_units = params['units']
-            else:
-                svg_width = output_width
-                svg_height = output_height
-                svg_units = units
-            SVGExporter.export(scaled_paths, svg_width, svg_height, output_file, svg_units)
-            output_files.append(output_file)
+    try:
+        pipeline.run(drawing, start='transform', stop='emit')
+        stats = drawing.info.get('quantize')
+        if stats:
+            print(f"\nQuantized to {params['resolution']} steps/{params['units']}: "
+                  f"{stats['points_before']} -> {stats['points_after']} points, "
+                  f"{stats['paths_dropped']} paths dropped, {stats['lines_removed']} G-Code lines removed")
+        if args.stop_after == 'transform':
+            return stopped_early(drawing, args.stop_after)
+        print("\n=== Generating Output Files ===")
+        pipeline.run(drawing, start='emit')
+    except ConversionError:
+        raise
+    except Exception as e:
+        raise ConversionError(f"Could not write output: {e}") from e
     
     # Print summary
     print("\n=== Summary ===")
     print(f"Input file: {input_path}")
     print(f"Processing: {'Skeleton + smoothing' if args.skeleton else 'Contour detection'}")
-    print(f"Paths generated: {len(scaled_paths)}")
-    print(f"Total points: {sum(len(p) for p in scaled_paths)}")
+    print(f"Paths generated: {len(drawing.paths)}")
+    print(f"Total points: {drawing.point_count()}")
     print(f"\nOutput files created:")
-    for output_file in output_files:
+    for output_file in drawing.outputs:
         print(f"  - {output_file}")
     
     if needs_gcode_params and params:
         print(f"\nG-Code Details:")
-        print(f"  Material: {params['material_width']} x {params['material_height']} {params['units']}")
+        print(f"  Material: {params['material_width']:g} x {params['material_height']:g} {params['units']}")
         print(f"  Cut depth: {params['cut_depth']} {params['units']}")
         print(f"  Feed rate: {params['feed_rate']} {params['units']}/min")
     
     print("\nDone!")
+    return conversion_result(drawing)
+
+
+def conversion_result(drawing):
+    """What convert_file() reports about a finished (or stopped) drawing"""
+    return {
+        'input': str(drawing.source),
+        'outputs': [str(f) for f in drawing.outputs],
+        'paths': len(drawing.paths),
+        'points': drawing.point_count(),
+        'stages': drawing.stats,
+    }
+
+
+def stopped_early(drawing, stage):
+    """Report a run ended by --stop-after"""
+    print(f"\nStopped after the {stage} stage:\n")
+    print(Pipeline.format_stats(drawing.stats))
+    result = conversion_result(drawing)
+    result['stopped'] = stage
+    return result
+
+
+def expand_inputs(specs):
+    """
+    Turn files, folders and glob patterns into a list of input files
+
+    Returns:
+        (files, batch) - batch is True when more than a single plain file was named
+    """
+    import glob as globbing
+    files = []
+    batch = len(specs) > 1
+    for spec in specs:
+        path = Path(spec)
+        if path.is_dir():
+            batch = True
+            files.extend(sorted(p for p in path.iterdir()
+                                if p.is_file() and p.suffix.lower() in INPUT_EXTENSIONS))
+        elif path.exists():
+            files.append(path)
+        elif globbing.has_magic(spec):
+            batch = True
+            files.extend(sorted(Path(p) for p in globbing.glob(spec) if Path(p).is_file()))
+        else:
+            files.append(path)  # reported as not found
+    return files, batch
+
+
+def init_worker():
+    """Set up a pool worker: Ctrl+C is left to the parent, which stops the pool"""
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if HAS_CV2:
+        import cv2
+        # One OpenCV thread per worker; the pool already keeps every core busy
+        cv2.setNumThreads(1)
+
+
+def convert_job(job):
+    """Worker: convert one file quietly, returning its result or error"""
+    import io
+    import contextlib
+    input_path, args, profile, output_dir, output_base = job
+    args.output = output_base
+    log = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            result = convert_file(input_path, args, profile, output_dir, interactive=False)
+        result['ok'] = True
+    except Exception as e:
+        result = {'input': str(input_path), 'ok': False, 'error': str(e) or type(e).__name__}
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def batch_convert(files, args, profile=None):
+    """
+    Convert many files on a process pool and print a status line for each
+
+    Returns:
+        List of per-file result dictionaries
+    """
+    output_dir = Path(args.output_dir or '.')
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Files that would write to the same name (heart.png and heart.svg) keep their extension in it
+    stems = {}
+    for path in files:
+        stems.setdefault(path.stem, []).append(path)
+    jobs = []
+    for path in files:
+        output_base = f"{path.stem}_{path.suffix.lstrip('.').lower()}" if len(stems[path.stem]) > 1 else None
+        jobs.append((path, args, profile, output_dir, output_base))
+
+    jobs_count = args.jobs or os.cpu_count() or 1
+    print(f"Converting {len(files)} files with {min(jobs_count, len(files))} worker(s) into {output_dir}/\n")
+    start = time.perf_counter()
+    results = []
+    width = len(str(len(files)))
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs_count, initializer=init_worker) as pool:
+        for done, result in enumerate(pool.map(convert_job, jobs), 1):
+            results.append(result)
+            name = Path(result['input']).name
+            if result['ok']:
+                print(f"[{done:>{width}}/{len(files)}] ok    {name}: {result['paths']} paths, "
+                      f"{result['points']} points ({result['seconds']:.2f}s)")
+            else:
+                print(f"[{done:>{width}}/{len(files)}] FAIL  {name}: {result['error'].splitlines()[0]}")
+
+    elapsed = time.perf_counter() - start
+    converted = [r for r in results if r['ok']]
+    points = sum(r['points'] for r in converted)
+    print(f"\nConverted {len(converted)}/{len(results)} files in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.1f} files/s, {points / elapsed:,.0f} points/s)")
+    failed = [r for r in results if not r['ok']]
+    if failed:
+        print(f"Failed: {', '.join(Path(r['input']).name for r in failed)}")
+
+    stages = Pipeline.combine_stats([r['stages'] for r in converted])
+    if args.profile and converted:
+        print(f"\n=== Profile (all {len(converted)} files, summed over workers) ===\n")
+        print(Pipeline.format_stats(stages))
+    if args.stats_json:
+        write_stats_json(args.stats_json, {'seconds': elapsed, 'files': results, 'stages': stages})
+    return results
+
+
+def write_stats_json(stats_file, stats):
+    """Save a profile (see convert_file and batch_convert) as JSON"""
+    with open(stats_file, 'w') as f:
+        json.dump(stats, f, indent=2)
+    print(f"Statistics saved to: {stats_file}")
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.text:
+        args.text = args.text.replace('\\n', '\n')
+
+    if args.list_params:
+        for name, profile in read_profile_file(BUILTIN_PROFILES).items():
+            print(f"{name:<20} {profile.get('description', '')}")
+        return
+    if not args.input_files:
+        parser.error("an input file is required")
+
+    profile = None
+    if args.params:
+        try:
+            profile = load_params_profile(args.params)
+        except (ConversionError, OSError, ValueError) as e:
+            print(f"Error: Could not load machining profile: {e}")
+            sys.exit(1)
+        print(f"Using machining profile: {args.params}")
+    
+    # Check if spline requested but scipy not available
+    if args.spline:
+        if HAS_SCIPY:
+            print("Using spline fitting for smooth curves")
+        else:
+            print("Warning: scipy not installed. Falling back to moving average smoothing.")
+            print("Install scipy with: pip install scipy")
+            args.spline = False
+
+    files, batch = expand_inputs(args.input_files)
+    if batch:
+        if args.output:
+            print("Error: -o/--output names a single output; use --output-dir in batch mode")
+            sys.exit(1)
+        if profile is None and args.format in ('nc', 'gcode', 'all'):
+            print("Error: Batch G-Code output needs machining parameters: use --params")
+            sys.exit(1)
+        if not files:
+            print("Error: No input files found")
+            sys.exit(1)
+        if args.profile_dump:
+            print("Error: --profile-dump profiles a single conversion; use --profile or --stats-json in batch mode")
+            sys.exit(1)
+        results = batch_convert(files, args, profile)
+        sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+    if args.profile_dump:
+        import cProfile
+        profiler = cProfile.Profile()
+    try:
+        if args.profile_dump:
+            result = profiler.runcall(convert_file, files[0], args, profile)
+        else:
+            result = convert_file(files[0], args, profile)
+    except ConversionError as e:
+        print(f"Error: {e}")
+        if e.__cause__ is not None:
+            import traceback
+            traceback.print_exception(e.__cause__)
+        sys.exit(1)
+    finally:
+        if args.profile_dump:
+            profiler.dump_stats(args.profile_dump)
+            print(f"cProfile stats saved to: {args.profile_dump}")
+
+    if args.stats_json:
+        write_stats_json(args.stats_json, result)
 
 
 if __name__ == '__main__':
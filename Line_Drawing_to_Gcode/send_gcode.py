@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+"""
+G-Code Sender for GRBL
+Streams .nc files to a GRBL controller (X-Carve) over serial using the
+character-counting protocol, so GRBL's planner never starves on programs
+made of many short segments.
+
+Run with --fake to stream to a simulated GRBL on a local pty instead of
+real hardware.
+"""
+
+import sys
+import os
+import re
+import time
+import select
+import argparse
+import threading
+from collections import deque
+from pathlib import Path
+
+try:
+    import termios
+    import tty
+    HAS_TERMIOS = True
+except ImportError:
+    HAS_TERMIOS = False
+
+
+# GRBL's serial receive buffer is 128 bytes (RX_BUFFER_SIZE in config.h)
+RX_BUFFER_SIZE = 128
+
+# Real-time commands - picked off the serial stream by GRBL immediately,
+# they never enter the RX buffer
+STATUS_REPORT = b'?'
+FEED_HOLD = b'!'
+CYCLE_START = b'~'
+SOFT_RESET = b'\x18'
+
+BAUD_RATES = {
+    9600: 'B9600',
+    19200: 'B19200',
+    38400: 'B38400',
+    57600: 'B57600',
+    115200: 'B115200',
+    230400: 'B230400',
+}
+
+
+class GrblError(Exception):
+    """Raised when GRBL reports an alarm or the connection fails"""
+
+
+class SerialPort:
+    """
+    Minimal serial port wrapper.
+
+    Uses pyserial when it is installed, otherwise opens the device directly
+    with termios (Linux/macOS), which also works for pty devices.
+    """
+
+    def __init__(self, port, baudrate=115200):
+        self.port = port
+        self._ser = None
+        self._fd = None
+
+        try:
+            import serial
+        except ImportError:
+            serial = None
+
+        if serial is not None:
+            self._ser = serial.Serial(port, baudrate, timeout=0)
+            return
+
+        if not HAS_TERMIOS:
+            raise GrblError("pyserial is required on this platform. Install with: pip install pyserial")
+
+        self._fd = os.open(port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        tty.setraw(self._fd)
+        attrs = termios.tcgetattr(self._fd)
+        speed = getattr(termios, BAUD_RATES.get(baudrate, 'B115200'))
+        attrs[4] = attrs[5] = speed
+        termios.tcsetattr(self._fd, termios.TCSANOW, attrs)
+
+    def write(self, data):
+        """Write all bytes to the port"""
+        if self._ser is not None:
+            self._ser.write(data)
+            return
+        view = memoryview(data)
+        while view:
+            try:
+                n = os.write(self._fd, view)
+            except BlockingIOError:
+                select.select([], [self._fd], [], 0.1)
+                continue
+            view = view[n:]
+
+    def read(self, timeout):
+        """Read whatever bytes arrive within timeout seconds"""
+        if self._ser is not None:
+            self._ser.timeout = timeout
+            return self._ser.read(max(1, self._ser.in_waiting))
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return b''
+        try:
+            return os.read(self._fd, 4096)
+        except (BlockingIOError, OSError):
+            return b''
+
+    def close(self):
+        """Close the port"""
+        if self._ser is not None:
+            self._ser.close()
+        elif self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def prepare_lines(gcode_text):
+    """
+    Clean G-Code for streaming.
+
+    Strips comments and whitespace (GRBL ignores them, but they still take
+    up space in its 128-byte RX buffer) and drops empty lines.
+
+    Args:
+        gcode_text: Full program text
+
+    Returns:
+        List of (source_line_number, command) tuples
+    """
+    comment_re = re.compile(r'\([^)]*\)|;.*')
+    lines = []
+    for number, raw in enumerate(gcode_text.splitlines(), 1):
+        line = comment_re.sub('', raw)
+        line = ''.join(line.split()).upper()
+        if not line or line == '%':
+            continue
+        if len(line) + 1 > RX_BUFFER_SIZE:
+            raise ValueError(f"Line {number} is longer than GRBL's {RX_BUFFER_SIZE}-byte buffer: {raw}")
+        lines.append((number, line))
+    return lines
+
+
+def parse_status(report):
+    """
+    Parse a GRBL 1.1 status report such as <Run|MPos:1.000,2.000,0.000|FS:500,0>
+
+    Returns:
+        Dictionary with 'state' and any position/buffer/feed fields found
+    """
+    fields = report.strip('<>').split('|')
+    status = {'state': fields[0]}
+    for field in fields[1:]:
+        key, _, value = field.partition(':')
+        if key in ('MPos', 'WPos', 'WCO'):
+            status[key] = tuple(float(v) for v in value.split(','))
+        elif key in ('Bf', 'FS', 'F'):
+            status[key] = tuple(float(v) for v in value.split(','))
+        else:
+            status[key] = value
+    return status
+
+
+class GrblStreamer:
+    """
+    Streams G-Code to GRBL.
+
+    In 'count' mode the streamer keeps track of how many bytes are sitting
+    in GRBL's RX buffer and sends the next line as soon as it fits, so GRBL
+    always has the following moves queued. In 'simple' mode it sends one
+    line and waits for its 'ok' (the classic, slower protocol).
+
+    The first 'error:' reply stops the job (feed hold, then soft reset so
+    the lines already in GRBL's buffer are not run) unless stop_on_error
+    is False.
+    """
+
+    def __init__(self, port, rx_buffer_size=RX_BUFFER_SIZE, status_interval=0.2, verbose=True,
+                 stop_on_error=True):
+        self.port = port
+        self.rx_buffer_size = rx_buffer_size
+        self.status_interval = status_interval
+        self.verbose = verbose
+        self.stop_on_error = stop_on_error
+        self.status = {'state': 'Unknown'}
+        self.messages = []
+        self._partial = b''
+
+    def _read_responses(self, timeout):
+        """Read complete response lines from GRBL"""
+        data = self.port.read(timeout)
+        if not data:
+            return []
+        data = self._partial + data
+        *complete, self._partial = data.split(b'\n')
+        return [line.strip().decode('ascii', 'replace') for line in complete if line.strip()]
+
+    def wake_up(self, timeout=3.0):
+        """Wake GRBL up and wait for its welcome banner"""
+        self.port.write(b'\r\n\r\n')
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for response in self._read_responses(0.1):
+                if response.startswith('Grbl'):
+                    if self.verbose:
+                        print(f"Connected: {response}")
+                    # Anything after the banner belongs to the wake-up newlines
+                    self._read_responses(0.2)
+                    return response
+        if self.verbose:
+            print("Warning: no GRBL banner received, continuing anyway")
+        return None
+
+    def feed_hold(self):
+        """Pause motion (real-time command '!')"""
+        self.port.write(FEED_HOLD)
+
+    def resume(self):
+        """Resume after a feed hold (real-time command '~')"""
+        self.port.write(CYCLE_START)
+
+    def request_status(self):
+        """Ask for a status report (real-time command '?')"""
+        self.port.write(STATUS_REPORT)
+
+    def soft_reset(self):
+        """Stop immediately and reset GRBL (Ctrl-X)"""
+        self.port.write(SOFT_RESET)
+
+    def _handle_response(self, response, in_flight, stats):
+        """Process one response line; returns True if it acknowledged a line"""
+        if response == 'ok' or response.startswith('error'):
+            if not in_flight:
+                return False  # late reply to the wake-up newlines
+            line_number, length, _ = in_flight.popleft()
+            stats['acked'] += 1
+            if response.startswith('error'):
+                stats['errors'].append((line_number, response))
+                if self.verbose:
+                    print(f"\nLine {line_number}: {response}")
+            return True
+        if response.startswith('<'):
+            self.status = parse_status(response)
+        elif response.startswith('ALARM'):
+            raise GrblError(f"GRBL alarm: {response}")
+        else:
+            self.messages.append(response)
+        return False
+
+    def _handle_keyboard(self):
+        """Real-time commands typed on the console: ! (hold), ~ (resume), ? (status)"""
+        if not sys.stdin.isatty():
+            return
+        ready, _, _ = select.select([sys.stdin], [], [], 0)
+        if not ready:
+            return
+        command = sys.stdin.readline().strip()
+        if command == '!':
+            self.feed_hold()
+            print("\nFeed hold - type ~ and Enter to resume")
+        elif command == '~':
+            self.resume()
+            print("\nResuming")
+        elif command == '?':
+            self.request_status()
+
+    def stream(self, lines, mode='count'):
+        """
+        Stream prepared lines to GRBL.
+
+        Args:
+            lines: List of (source_line_number, command) from prepare_lines()
+            mode: 'count' for character-counting, 'simple' for send-and-wait
+
+        Returns:
+            Dictionary of throughput statistics
+        """
+        limit = self.rx_buffer_size if mode == 'count' else 1
+        in_flight = deque()  # (source line, bytes, sent time) waiting for 'ok'
+        buffered = 0
+        next_line = 0
+        total = len(lines)
+        stats = {
+            'lines': total,
+            'sent': 0,
+            'bytes': 0,
+            'acked': 0,
+            'errors': [],
+            'max_buffer': 0,
+            'buffer_samples': 0,
+            'buffer_sum': 0,
+            'stopped': None,
+        }
+
+        start = time.monotonic()
+        next_poll = start
+        next_progress = start
+
+        try:
+            while next_line < total or in_flight:
+                # Send as many lines as fit in GRBL's RX buffer
+                while next_line < total:
+                    line_number, command = lines[next_line]
+                    length = len(command) + 1
+                    if in_flight and (buffered + length > limit):
+                        break
+                    self.port.write(command.encode('ascii') + b'\n')
+                    in_flight.append((line_number, length, time.monotonic()))
+                    buffered += length
+                    stats['bytes'] += length
+                    stats['sent'] += 1
+                    next_line += 1
+                    if mode != 'count':
+                        break
+
+                stats['max_buffer'] = max(stats['max_buffer'], buffered)
+                stats['buffer_sum'] += buffered
+                stats['buffer_samples'] += 1
+
+                now = time.monotonic()
+                if self.status_interval and now >= next_poll:
+                    self.request_status()
+                    next_poll = now + self.status_interval
+
+                self._handle_keyboard()
+
+                for response in self._read_responses(0.05):
+                    if self._handle_response(response, in_flight, stats):
+                        buffered = sum(item[1] for item in in_flight)
+
+                if stats['errors'] and self.stop_on_error:
+                    self._stop_after_error(stats)
+                    break
+
+                if self.verbose and now >= next_progress:
+                    self._print_progress(stats['acked'], total)
+                    next_progress = now + 0.5
+
+            if stats['stopped'] is None:
+                self.wait_for_idle()
+
+        except KeyboardInterrupt:
+            self.feed_hold()
+            time.sleep(0.2)
+            self.soft_reset()
+            print("\nStopped: feed hold and soft reset sent")
+            raise
+
+        stats['elapsed'] = time.monotonic() - start
+        if self.verbose:
+            self._print_progress(stats['acked'], total)
+            print()
+        return stats
+
+    def _stop_after_error(self, stats):
+        """Hold the machine and drop the queued lines after GRBL rejected one"""
+        self.feed_hold()
+        time.sleep(0.2)
+        self.soft_reset()
+        line_number, error = stats['errors'][0]
+        stats['stopped'] = line_number
+        if self.verbose:
+            print(f"\nStopped at line {line_number} ({error}): feed hold and soft reset sent, "
+                  f"the rest of the program was not run. Use --continue-on-error to keep going.")
+
+    def wait_for_idle(self, timeout=None):
+        """Poll status until GRBL reports Idle (all motion finished)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while deadline is None or time.monotonic() < deadline:
+            self.request_status()
+            for response in self._read_responses(max(self.status_interval, 0.05)):
+                if response.startswith('<'):
+                    self.status = parse_status(response)
+                elif response.startswith('ALARM'):
+                    raise GrblError(f"GRBL alarm: {response}")
+            if self.status['state'] == 'Idle':
+                return True
+            self._handle_keyboard()
+        return False
+
+    def _print_progress(self, acked, total):
+        """Single-line progress with machine state and position"""
+        percent = 100.0 * acked / total if total else 100.0
+        line = f"\r  {acked}/{total} lines  {percent:5.1f}%  {self.status['state']:<8}"
+        pos = self.status.get('MPos') or self.status.get('WPos')
+        if pos:
+            line += f"  X{pos[0]:.3f} Y{pos[1]:.3f} Z{pos[2]:.3f}"
+        print(line, end='', flush=True)
+
+
+def print_stats(stats, mode):
+    """Print streaming throughput statistics"""
+    elapsed = stats['elapsed']
+    average_fill = stats['buffer_sum'] / stats['buffer_samples'] if stats['buffer_samples'] else 0
+
+    print("\n=== Streaming Summary ===")
+    print(f"Protocol: {'character-counting' if mode == 'count' else 'send-and-wait'}")
+    print(f"Lines sent: {stats['sent']} of {stats['lines']}")
+    print(f"Bytes sent: {stats['bytes']}")
+    print(f"Elapsed: {elapsed:.2f} s")
+    if elapsed > 0:
+        print(f"Throughput: {stats['sent'] / elapsed:.1f} lines/s, {stats['bytes'] / elapsed:.0f} bytes/s")
+    print(f"RX buffer fill: average {average_fill:.0f}, max {stats['max_buffer']} of {RX_BUFFER_SIZE} bytes")
+    if stats['stopped'] is not None:
+        print(f"Stopped at line {stats['stopped']} after an error; the rest of the program was not run")
+    if stats['errors']:
+        print(f"Errors: {len(stats['errors'])}")
+        for line_number, error in stats['errors'][:10]:
+            print(f"  Line {line_number}: {error}")
+
+
+class FakeGrbl:
+    """
+    Simulated GRBL 1.1 controller on a local pty, for testing without hardware.
+
+    Models the parts that matter for streaming: a 128-byte RX buffer that
+    overflows if the sender over-fills it, a 15-block planner that takes
+    block_time seconds per move, 'ok' once a line is moved into the planner,
+    'error:20' for G/M codes GRBL does not support, and the real-time
+    commands ?, !, ~ and Ctrl-X. Responses are delayed
+    by latency seconds to mimic the USB-serial round trip.
+    """
+
+    PLANNER_BLOCKS = 15
+
+    # G and M codes GRBL 1.1 accepts; anything else gets error:20
+    SUPPORTED_G = {'0', '1', '2', '3', '4', '10', '17', '18', '19', '20', '21', '28', '28.1', '30', '30.1',
+                   '38.2', '38.3', '38.4', '38.5', '40', '43.1', '49', '53', '54', '55', '56', '57', '58',
+                   '59', '61', '80', '90', '91', '91.1', '92', '92.1', '93', '94'}
+    SUPPORTED_M = {'0', '1', '2', '3', '4', '5', '7', '8', '9', '30', '56'}
+
+    def __init__(self, block_time=0.002, latency=0.004):
+        self.block_time = block_time
+        self.latency = latency
+        self._outbox = deque()
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+        self.rx = bytearray()
+        self.planner = deque()
+        self.position = [0.0, 0.0, 0.0]
+        self.feed = 0.0
+        self.hold = False
+        self.lines_received = 0
+        self.max_rx = 0
+        self.overflow = False
+        self.planner_starved = 0
+        self._block_done = 0.0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the simulator thread"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the simulator and close the pty"""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _send(self, text):
+        self._outbox.append((time.monotonic() + self.latency, text.encode('ascii')))
+
+    def _flush(self, now):
+        while self._outbox and self._outbox[0][0] <= now:
+            os.write(self._master, self._outbox.popleft()[1])
+
+    def _state(self):
+        if self.hold:
+            return 'Hold:0'
+        return 'Run' if self.planner else 'Idle'
+
+    def _status_report(self):
+        x, y, z = self.position
+        return (f"<{self._state()}|MPos:{x:.3f},{y:.3f},{z:.3f}"
+                f"|Bf:{self.PLANNER_BLOCKS - len(self.planner)},{RX_BUFFER_SIZE - len(self.rx)}"
+                f"|FS:{self.feed:.0f},0>\r\n")
+
+    def _reset(self):
+        self._outbox.clear()
+        self.rx.clear()
+        self.planner.clear()
+        self.hold = False
+        self._send("\r\nGrbl 1.1h ['$' for help]\r\n")
+
+    def _receive(self, data):
+        for byte in data:
+            char = bytes([byte])
+            if char == STATUS_REPORT:
+                self._send(self._status_report())
+            elif char == FEED_HOLD:
+                self.hold = True
+            elif char == CYCLE_START:
+                self.hold = False
+            elif char == SOFT_RESET:
+                self._reset()
+            else:
+                self.rx.append(byte)
+        self.max_rx = max(self.max_rx, len(self.rx))
+        if len(self.rx) > RX_BUFFER_SIZE:
+            self.overflow = True
+
+    def _supported(self, line):
+        for letter, value in re.findall(r'([GM])([0-9.]+)', line):
+            code = value.lstrip('0') or '0'
+            if code.startswith('.'):
+                code = '0' + code
+            if code not in (self.SUPPORTED_G if letter == 'G' else self.SUPPORTED_M):
+                return False
+        return True
+
+    def _parse_line(self, line):
+        words = dict(re.findall(r'([A-Z])([-+]?[0-9.]+)', line))
+        if 'F' in words:
+            self.feed = float(words['F'])
+        target = list(self.planner[-1] if self.planner else self.position)
+        for i, axis in enumerate('XYZ'):
+            if axis in words:
+                target[i] = float(words[axis])
+        return target
+
+    def _run(self):
+        self._reset()
+        while self._running:
+            try:
+                ready, _, _ = select.select([self._master], [], [], 0.0005)
+                if ready:
+                    self._receive(os.read(self._master, 1024))
+            except OSError:
+                break
+
+            now = time.monotonic()
+
+            # Execute planner blocks
+            if self.planner and not self.hold and now >= self._block_done:
+                self.position = self.planner.popleft()
+                self._block_done = now + self.block_time
+                if not self.planner and b'\n' not in self.rx:
+                    self.planner_starved += 1
+
+            # Move complete lines from the RX buffer into the planner
+            while b'\n' in self.rx and len(self.planner) < self.PLANNER_BLOCKS:
+                end = self.rx.index(b'\n')
+                line = self.rx[:end].decode('ascii', 'replace').strip()
+                del self.rx[:end + 1]
+                if not line:
+                    continue
+                self.lines_received += 1
+                if line.startswith('$'):
+                    self._send("ok\r\n")
+                    continue
+                if not self._supported(line):
+                    self._send("error:20\r\n")
+                    continue
+                if not self.planner:
+                    self._block_done = now + self.block_time
+                self.planner.append(self._parse_line(line))
+                self._send("ok\r\n")
+
+            self._flush(now)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream a G-Code file to a GRBL controller')
+    parser.add_argument('input_file', help='G-Code file (.nc, .gcode)')
+    parser.add_argument('-p', '--port', help='Serial port (e.g. /dev/ttyUSB0, /dev/tty.usbmodem1411, COM3)')
+    parser.add_argument('-b', '--baud', type=int, default=115200, help='Baud rate (default: 115200)')
+    parser.add_argument('--mode', choices=['count', 'simple'], default='count',
+                       help='count: character-counting (fast, default); simple: send and wait for ok')
+    parser.add_argument('--status-interval', type=float, default=0.2,
+                       help='Seconds between ? status polls (default: 0.2, 0 to disable)')
+    parser.add_argument('--continue-on-error', action='store_true',
+                       help='Keep streaming after GRBL rejects a line (default: feed hold and stop)')
+    parser.add_argument('--fake', action='store_true',
+                       help='Stream to a simulated GRBL on a local pty (no hardware needed)')
+    parser.add_argument('--fake-block-time', type=float, default=0.002,
+                       help='Seconds the simulated GRBL spends per move (default: 0.002)')
+    parser.add_argument('--fake-latency', type=float, default=0.004,
+                       help='Simulated serial round-trip latency in seconds (default: 0.004)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='No progress output')
+
+    args = parser.parse_args()
+
+    input_path = Path(args.input_file)
+    if not input_path.exists():
+        print(f"Error: File not found: {input_path}")
+        sys.exit(1)
+
+    if not args.port and not args.fake:
+        print("Error: Specify --port, or --fake to use the simulator")
+        sys.exit(1)
+
+    try:
+        lines = prepare_lines(input_path.read_text(errors='replace'))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Loaded {len(lines)} commands from {input_path}")
+
+    fake = None
+    if args.fake:
+        if not HAS_TERMIOS:
+            print("Error: --fake needs a pty (Linux/macOS)")
+            sys.exit(1)
+        fake = FakeGrbl(block_time=args.fake_block_time, latency=args.fake_latency).start()
+        port_name = fake.port
+        print(f"Simulated GRBL on {port_name}")
+    else:
+        port_name = args.port
+
+    port = SerialPort(port_name, args.baud)
+    streamer = GrblStreamer(port, status_interval=args.status_interval, verbose=not args.quiet,
+                            stop_on_error=not args.continue_on_error)
+
+    try:
+        streamer.wake_up()
+        if sys.stdin.isatty() and not args.quiet:
+            print("Type ! + Enter for feed hold, ~ + Enter to resume, ? + Enter for status")
+        stats = streamer.stream(lines, mode=args.mode)
+    except GrblError as e:
+        print(f"\nError: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        port.close()
+        if fake:
+            fake.stop()
+
+    print_stats(stats, args.mode)
+    if fake:
+        print(f"\nSimulator: {fake.lines_received} lines received, "
+              f"max RX buffer {fake.max_rx} bytes, "
+              f"planner starved {fake.planner_starved} times"
+              f"{', RX BUFFER OVERFLOW' if fake.overflow else ''}")
+
+    if stats['errors']:
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
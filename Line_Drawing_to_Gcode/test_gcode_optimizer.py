@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Runs gcode_optimizer.py --verify on the G-Code programs that ship with the
+repo: the optimized program must keep the cut length, cutting bounds and
+tool changes of the original.
+
+Usage:
+    python -m pytest test_gcode_optimizer.py
+    python test_gcode_optimizer.py
+"""
+
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+
+HERE = Path(__file__).resolve().parent
+
+PROGRAMS = [
+    # Two tools, each loaded with G53 Z moves and an M6, so Z is unknown at the first segment
+    HERE.parent / 'Barrelheads File Sets' / 'PocketBoudreau_G-Code.nc',
+    HERE.parent / 'Bottle Openers' / 'DrinkUpBitches_gcode.c2d.nc',
+    HERE / 'Heart.nc',
+    HERE / 'grapes2.nc',
+    HERE / 'test_pencil_sketch.nc',
+]
+
+
+class VerifyShippedPrograms(unittest.TestCase):
+
+    def test_optimized_programs_verify(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for program in PROGRAMS:
+                if not program.exists():
+                    continue
+                with self.subTest(program=program.name):
+                    result = subprocess.run(
+                        [sys.executable, str(HERE / 'gcode_optimizer.py'), str(program),
+                         '-o', str(Path(tmp) / program.name), '--verify'],
+                        capture_output=True, text=True)
+                    self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+                    self.assertIn('Cut length preserved: yes', result.stdout)
+                    self.assertIn('Tool changes identical: yes', result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Streams programs to the simulated GRBL (FakeGrbl) over a real pty and
+checks the sender's flow control and error handling, plus how the command
+line reports programs it cannot send.
+
+Usage:
+    python -m pytest test_send_gcode.py
+    python test_send_gcode.py
+"""
+
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from send_gcode import HAS_TERMIOS, RX_BUFFER_SIZE, FakeGrbl, GrblStreamer, SerialPort, prepare_lines
+
+
+def program(moves, bad_line=None):
+    """A G-Code program of short moves, with an unsupported command at bad_line"""
+    lines = ['G21', 'G90', 'G0 Z5', 'G1 Z-1 F300']
+    lines += [f"G1 X{i * 0.5:.3f} Y{(i % 7) * 0.25:.3f} F600" for i in range(moves)]
+    if bad_line is not None:
+        lines.insert(bad_line - 1, 'G99 X1')
+    return prepare_lines('\n'.join(lines + ['G0 Z5', 'M30']))
+
+
+@unittest.skipUnless(HAS_TERMIOS, 'FakeGrbl needs a pty')
+class StreamToFakeGrbl(unittest.TestCase):
+
+    def stream(self, lines, mode='count', stop_on_error=True, block_time=0.001):
+        fake = FakeGrbl(block_time=block_time, latency=0.002).start()
+        port = SerialPort(fake.port)
+        try:
+            streamer = GrblStreamer(port, status_interval=0.05, verbose=False, stop_on_error=stop_on_error)
+            self.assertIsNotNone(streamer.wake_up())
+            stats = streamer.stream(lines, mode=mode)
+        finally:
+            port.close()
+            fake.stop()
+        return stats, fake
+
+    def test_character_counting_keeps_buffer_full_without_overflow(self):
+        lines = program(300)
+        stats, fake = self.stream(lines)
+        self.assertEqual(stats['acked'], len(lines))
+        self.assertEqual(fake.lines_received, len(lines))
+        self.assertFalse(fake.overflow)
+        self.assertLessEqual(stats['max_buffer'], RX_BUFFER_SIZE)
+        self.assertGreater(stats['max_buffer'], RX_BUFFER_SIZE // 2)
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual(fake.position[2], 5.0)
+
+    def test_simple_mode_sends_one_line_at_a_time(self):
+        lines = program(40)
+        stats, fake = self.stream(lines, mode='simple')
+        self.assertEqual(stats['acked'], len(lines))
+        self.assertEqual(fake.lines_received, len(lines))
+        self.assertLessEqual(fake.max_rx, max(len(command) + 1 for _, command in lines))
+
+    def test_first_error_stops_the_job(self):
+        lines = program(300, bad_line=8)
+        stats, fake = self.stream(lines, block_time=0.01)
+        self.assertEqual(stats['stopped'], 8)
+        self.assertEqual(stats['errors'], [(8, 'error:20')])
+        self.assertLess(stats['sent'], len(lines))
+        self.assertLess(fake.lines_received, len(lines))
+        self.assertFalse(fake.planner)
+        self.assertFalse(fake.hold)  # the soft reset cleared the feed hold
+
+    def test_continue_on_error_streams_everything(self):
+        lines = program(100, bad_line=8)
+        stats, fake = self.stream(lines, stop_on_error=False)
+        self.assertIsNone(stats['stopped'])
+        self.assertEqual(stats['errors'], [(8, 'error:20')])
+        self.assertEqual(stats['acked'], len(lines))
+        self.assertEqual(fake.lines_received, len(lines))
+
+
+class CommandLine(unittest.TestCase):
+
+    def test_line_too_long_for_rx_buffer_is_reported(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            program_file = Path(tmp) / 'long.nc'
+            program_file.write_text('G21\nG1 ' + ' '.join(f"X{i}.0000" for i in range(20)) + '\nM30\n')
+            result = subprocess.run([sys.executable, str(Path(__file__).with_name('send_gcode.py')),
+                                     str(program_file), '--fake'], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(f"Error: Line 2 is longer than GRBL's {RX_BUFFER_SIZE}-byte buffer", result.stdout)
+        self.assertNotIn('Traceback', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
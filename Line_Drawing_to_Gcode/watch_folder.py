@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Watch Folder
+Converts drawings as they appear in a folder: scan or save a drawing to a
+shared folder and the G-Code (and any other formats asked for) is written
+next to it a moment later.
+
+New and changed images, SVGs, DXFs and Carbide Create projects are picked
+up by polling. A file is only queued once its size and modification time
+have held still for --settle seconds, so scans still being written are
+not read half-finished. Files are converted on a fixed pool of worker
+processes that is started, and has OpenCV loaded, before the first file
+arrives; each file then takes only its own processing time.
+
+What has been converted is remembered in .gcode_watch.json in the folder,
+so a restart neither redoes old files nor mistakes outputs for new
+drawings. Takes all the options of line_to_gcode_multiformat.py.
+
+Usage:
+    python watch_folder.py /shared/scans --params "1/8in hardwood"
+    python watch_folder.py /shared/scans --params shop.toml#walnut --format all --jobs 2
+    python watch_folder.py /shared/scans --skip-gcode-params --format svg --existing
+"""
+
+import sys
+import os
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from line_to_gcode_multiformat import (build_parser, load_params_profile, init_worker, convert_job,
+                                       ConversionError, HAS_CV2)
+
+
+WATCH_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.svg', '.dxf', '.c2d')
+
+STATE_FILE = '.gcode_watch.json'
+
+
+def warm_up():
+    """Worker: run OpenCV once so the first real file does not pay for its start-up"""
+    if HAS_CV2:
+        import numpy as np
+        import cv2
+        image = np.zeros((16, 16), dtype=np.uint8)
+        image[4:12, 4:12] = 255
+        cv2.findContours(image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    return os.getpid()
+
+
+def file_stamp(entry):
+    """(size, mtime_ns) of a directory entry or path, the cheap test for a change"""
+    stat = entry.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class FolderWatcher:
+    """Polls one folder and converts its settled drawings on a warm process pool"""
+
+    def __init__(self, folder, args, profile=None, settle=2.0, interval=1.0, existing=False):
+        """
+        Args:
+            folder: Folder to watch; outputs are written into it
+            args: Parsed converter options (see build_parser)
+            profile: Machining profile from load_params_profile()
+            settle: Seconds a file must stay unchanged before it is converted
+            interval: Seconds between folder scans
+            existing: Also convert files that were there before the first run
+        """
+        self.folder = Path(folder)
+        self.args = args
+        self.profile = profile
+        self.settle = settle
+        self.interval = interval
+        self.jobs = args.jobs or os.cpu_count() or 1
+        self.state_file = self.folder / STATE_FILE
+
+        self.done = {}       # input name -> stamp it was converted at
+        self.outputs = {}    # output name -> stamp it was written with
+        self.settling = {}   # name -> (stamp, first seen with that stamp)
+        self.queue = deque()  # (name, time queued)
+        self.running = {}    # future -> (name, stamp, time queued)
+
+        if self.state_file.exists():
+            state = json.loads(self.state_file.read_text())
+            self.done, self.outputs = state['inputs'], state['outputs']
+        elif not existing:
+            # First run: what is already here is the starting point, not new work
+            self.done = {entry.name: file_stamp(entry) for entry in self.scan()}
+            self.save_state()
+
+    def scan(self):
+        """Drawings currently in the folder"""
+        with os.scandir(self.folder) as entries:
+            return [entry for entry in entries
+                    if entry.is_file() and not entry.name.startswith(('.', '~'))
+                    and os.path.splitext(entry.name)[1].lower() in WATCH_EXTENSIONS]
+
+    def save_state(self):
+        temp = self.state_file.with_suffix('.tmp')
+        temp.write_text(json.dumps({'inputs': self.done, 'outputs': self.outputs}))
+        os.replace(temp, self.state_file)
+
+    def output_base(self, name, names):
+        """
+        Output name for an input, keeping its extension in the name where the
+        plain stem would overwrite the input or another drawing's output
+        """
+        path = Path(name)
+        ext = path.suffix.lstrip('.').lower()
+        formats = ['nc', 'dxf', 'svg'] if self.args.format == 'all' else [self.args.format]
+        clash = ext in formats or any(other != name and Path(other).stem == path.stem
+                                      and other not in self.outputs for other in names)
+        return f"{path.stem}_{ext}" if clash else path.stem
+
+    def poll(self):
+        """Scan the folder once and queue the files that have settled"""
+        now = time.monotonic()
+        entries = self.scan()
+        names = [entry.name for entry in entries]
+        busy = {name for name, _, _ in self.running.values()} | {name for name, _ in self.queue}
+        for entry in entries:
+            name = entry.name
+            try:
+                stamp = file_stamp(entry)
+            except FileNotFoundError:
+                continue
+            if self.done.get(name) == stamp or self.outputs.get(name) == stamp or name in busy:
+                continue
+            if stamp[0] == 0:
+                continue  # created but nothing written yet
+            seen = self.settling.get(name)
+            if seen is None or seen[0] != stamp:
+                self.settling[name] = (stamp, now)
+            elif now - seen[1] >= self.settle:
+                del self.settling[name]
+                self.queue.append((name, now))
+                print(f"{time.strftime('%H:%M:%S')} queued {name}")
+        for name in set(self.settling) - set(names):
+            del self.settling[name]  # deleted or renamed before it settled
+        return names
+
+    def submit(self, pool, names):
+        """Hand queued files to idle workers"""
+        while self.queue and len(self.running) < self.jobs:
+            name, queued = self.queue.popleft()
+            path = self.folder / name
+            try:
+                stamp = file_stamp(path)
+            except FileNotFoundError:
+                continue
+            job = (path, self.args, self.profile, self.folder, self.output_base(name, names))
+            self.running[pool.submit(convert_job, job)] = (name, stamp, queued)
+
+    def collect(self, finished):
+        """Report finished conversions and remember what they wrote"""
+        for future in finished:
+            name, stamp, queued = self.running.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                result = {'ok': False, 'error': str(e) or type(e).__name__, 'seconds': 0.0}
+            latency = time.monotonic() - queued
+            self.done[name] = stamp
+            if result['ok']:
+                for output in map(Path, result['outputs']):
+                    self.outputs[output.name] = file_stamp(output)
+                print(f"{time.strftime('%H:%M:%S')} ok    {name}: {result['paths']} paths -> "
+                      f"{', '.join(Path(o).name for o in result['outputs'])} "
+                      f"({result['seconds']:.2f}s, {latency:.2f}s after queueing)")
+            else:
+                print(f"{time.strftime('%H:%M:%S')} FAIL  {name}: {result['error'].splitlines()[0]}")
+            self.save_state()
+
+    def start_pool(self):
+        """Start every worker now, with OpenCV loaded, instead of on the first file"""
+        pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=init_worker)
+        pids = {future.result() for future in [pool.submit(warm_up) for _ in range(self.jobs)]}
+        return pool, len(pids)
+
+    def run(self):
+        """Watch until interrupted"""
+        start = time.perf_counter()
+        pool, workers = self.start_pool()
+        print(f"Watching {self.folder} with {workers} warm worker(s) "
+              f"(started in {time.perf_counter() - start:.2f}s); Ctrl+C to stop\n")
+        try:
+            while True:
+                names = self.poll()
+                self.submit(pool, names)
+                if self.running:
+                    finished, _ = wait(list(self.running), timeout=self.interval, return_when=FIRST_COMPLETED)
+                    try:
+                        self.collect(finished)
+                    except BrokenProcessPool:
+                        # A worker died (out of memory, crash in a library): requeue and restart the pool
+                        print(f"{time.strftime('%H:%M:%S')} worker pool failed, restarting it")
+                        self.queue.extendleft((name, queued) for name, _, queued in self.running.values())
+                        self.running.clear()
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool, _ = self.start_pool()
+                else:
+                    time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\nStopping")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.save_state()
+
+
+def main():
+    parser = build_parser()
+    parser.description = 'Convert drawings as they are added to a folder'
+    parser.add_argument('--settle', type=float, default=2.0,
+                        help='Seconds a file must stay unchanged before it is converted (default: 2)')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Seconds between folder scans (default: 1)')
+    parser.add_argument('--existing', action='store_true',
+                        help='On the first run, also convert the drawings already in the folder')
+    args = parser.parse_args()
+
+    if len(args.input_files) != 1 or not Path(args.input_files[0]).is_dir():
+        print("Error: Give one folder to watch")
+        sys.exit(1)
+    if args.output or args.output_dir:
+        print("Error: Outputs are written next to the inputs; -o and --output-dir are not used")
+        sys.exit(1)
+
+    profile = None
+    if args.params:
+        try:
+            profile = load_params_profile(args.params)
+        except (ConversionError, OSError, ValueError) as e:
+            print(f"Error: Could not load machining profile: {e}")
+            sys.exit(1)
+        print(f"Using machining profile: {args.params}")
+    elif args.format in ('nc', 'gcode', 'all'):
+        print("Error: G-Code output needs machining parameters: use --params")
+        sys.exit(1)
+
+    FolderWatcher(args.input_files[0], args, profile, settle=args.settle, interval=args.interval,
+                  existing=args.existing).run()
+
+
+if __name__ == '__main__':
+    main()